@@ -154,7 +154,7 @@ def carrega_dados_json(arquivo: str) -> Dados:
         >>> print(f"Máximo de {dados.r} viagens por ônibus")
     
     Nota:
-        - As matrizes são automaticamente convertidas para np.ndarray
+        - As matrizes são automaticamente convertidas para np.ndarray (float64)
         - O índice 0 sempre representa a garagem nos arrays
         - As janelas de tempo são indexadas de 0 a n-1 (sem incluir garagem)
     """
@@ -166,12 +166,12 @@ def carrega_dados_json(arquivo: str) -> Dados:
     return Dados(
         numeroRequisicoes=dados_dict["numeroRequisicoes"],
         numeroOnibus=dados_dict["numeroOnibus"],
-        distanciaRequisicoes=np.array(dados_dict["distanciaRequisicoes"]),
-        custo=np.array(dados_dict["custo"]),
-        tempoServico=np.array(dados_dict["tempoServico"]),
-        tempoRequisicoes=np.array(dados_dict["tempoRequisicoes"]),
-        inicioJanela=np.array(dados_dict["inicioJanela"]),
-        fimJanela=np.array(dados_dict["fimJanela"]),
+        distanciaRequisicoes=np.array(dados_dict["distanciaRequisicoes"], dtype=np.float64),
+        custo=np.array(dados_dict["custo"], dtype=np.float64),
+        tempoServico=np.array(dados_dict["tempoServico"], dtype=np.float64),
+        tempoRequisicoes=np.array(dados_dict["tempoRequisicoes"], dtype=np.float64),
+        inicioJanela=np.array(dados_dict["inicioJanela"], dtype=np.float64),
+        fimJanela=np.array(dados_dict["fimJanela"], dtype=np.float64),
         numeroMaximoViagens=dados_dict["numeroMaximoViagens"],
         tempoMaximo=dados_dict.get("tempoMaximoViagem", dados_dict.get("distanciaMaxima", None))
     )
@@ -80,7 +80,7 @@ def recalcular_chegadas_e_validar_rota(rota: List[int], t_partida: float, dados:
     
     if v_init != 0:
         tempo_saida_u_init = t_partida + dados.s[u_init] 
-        chegada_em_v_init = tempo_saida_u_init + dados.T[u_init][v_init]
+        chegada_em_v_init = tempo_saida_u_init + dados.T[u_init, v_init]
         inicio_servico_v_init = max(chegada_em_v_init, dados.e[v_init-1])
         if inicio_servico_v_init > dados.l[v_init-1] + TOLERANCIA: return None 
         chegadas.append(inicio_servico_v_init)
@@ -91,7 +91,7 @@ def recalcular_chegadas_e_validar_rota(rota: List[int], t_partida: float, dados:
     for i in range(2, len(rota)):
         u, v = rota[i-1], rota[i]
         tempo_saida_u = chegadas[i-1] + dados.s[u]
-        chegada_em_v = tempo_saida_u + dados.T[u][v]
+        chegada_em_v = tempo_saida_u + dados.T[u, v]
         
         if v != 0:
             inicio_servico = max(chegada_em_v, dados.e[v-1])
@@ -106,7 +106,7 @@ def recalcular_chegadas_e_validar_rota(rota: List[int], t_partida: float, dados:
 def calcular_custo_rota(rota: List[int], dados: Any) -> float:
     custo = 0.0
     for i in range(len(rota) - 1):
-        custo += dados.c[rota[i]][rota[i+1]]
+        custo += dados.c[rota[i], rota[i+1]]
     return custo
 
 def calcular_custo_total_solucao(solucao_dict: Dict, dados: Any) -> float:
@@ -115,7 +115,7 @@ def calcular_custo_total_solucao(solucao_dict: Dict, dados: Any) -> float:
         for v_str, dados_viagem in viagens.items():
             rota = dados_viagem["rota"]
             for i in range(len(rota) - 1):
-                custo += dados.c[rota[i]][rota[i+1]]
+                custo += dados.c[rota[i], rota[i+1]]
     return custo
 
 def calcular_funcao_objetivo(solucao_dict: Dict, dados: Any, contador: Any) -> float:
@@ -202,8 +202,12 @@ def atualizar_feromonio(feromonio_map: np.ndarray, melhor_solucao_dict: Dict, me
 
 # --- REPARO INTELIGENTE COM RETRY ---
 
-def _calcular_melhores_insercoes(solucao: Dict, cliente: int, dados: Dados) -> List[Tuple[float, Dict]]:
-    """Encontra todas as posições de inserção viáveis para um cliente."""
+def _calcular_melhores_insercoes(solucao: Dict, cliente: int, dados: Dados, custos_rota: Optional[Dict] = None) -> List[Tuple[float, Dict]]:
+    """
+    Encontra todas as posições de inserção viáveis para um cliente.
+    custos_rota (opcional) guarda o custo de cada viagem entre chamadas da mesma rodada:
+    (k_str, v_str) -> (lista da rota, custo), válido enquanto a lista não for substituída.
+    """
     opcoes_viaveis = []
 
     for k_str, viagens in solucao["onibus"].items():
@@ -212,7 +216,13 @@ def _calcular_melhores_insercoes(solucao: Dict, cliente: int, dados: Dados) -> L
             v = int(v_str.split('_')[1])
             rota_atual = dados_viagem["rota"]
             chegada_atual_inicio = dados_viagem["chegada"][0]
-            custo_atual = calcular_custo_rota(rota_atual, dados)
+            # Inserções trocam a lista da rota inteira: a mesma lista significa o mesmo custo
+            entrada = custos_rota.get((k_str, v_str)) if custos_rota is not None else None
+            if entrada is not None and entrada[0] is rota_atual:
+                custo_atual = entrada[1]
+            else:
+                custo_atual = calcular_custo_rota(rota_atual, dados)
+                if custos_rota is not None: custos_rota[(k_str, v_str)] = (rota_atual, custo_atual)
             
             for pos in range(1, len(rota_atual)):
                 nova_rota = rota_atual[:pos] + [cliente] + rota_atual[pos:]
@@ -236,7 +246,7 @@ def _calcular_melhores_insercoes(solucao: Dict, cliente: int, dados: Dados) -> L
             
             nova_v = ultima_v_num + 1
             T_saida_min = tempo_disp + dados.s[0]
-            T_necessario_para_janela = dados.e[cliente-1] - dados.T[0][cliente] - dados.s[0]
+            T_necessario_para_janela = dados.e[cliente-1] - dados.T[0, cliente] - dados.s[0]
             t_partida = max(T_necessario_para_janela, T_saida_min)
             rota_nova = [0, cliente, 0]
             chegadas_nova = recalcular_chegadas_e_validar_rota(rota_nova, t_partida, dados)
@@ -253,12 +263,13 @@ def _calcular_melhores_insercoes(solucao: Dict, cliente: int, dados: Dados) -> L
 
 def _executar_rodada_regret(solucao: Dict, pendentes: List[int], dados: Dados) -> Tuple[Dict, List[int]]:
     """Executa uma rodada completa de inserção Regret-2."""
+    custos_rota = {}
     while pendentes:
         melhores_opcoes_por_cliente = []
         clientes_sem_opcao = []
         
         for cliente in pendentes:
-            opcoes = _calcular_melhores_insercoes(solucao, cliente, dados)
+            opcoes = _calcular_melhores_insercoes(solucao, cliente, dados, custos_rota)
             if not opcoes:
                 clientes_sem_opcao.append(cliente)
                 continue
@@ -295,9 +306,10 @@ def _executar_rodada_gulosa_random(solucao: Dict, pendentes: List[int], dados: D
     """Executa inserção gulosa com ordem aleatória (Fallback)."""
     random.shuffle(pendentes)
     nao_inseridos = []
+    custos_rota = {}
     
     for cliente in pendentes:
-        opcoes = _calcular_melhores_insercoes(solucao, cliente, dados)
+        opcoes = _calcular_melhores_insercoes(solucao, cliente, dados, custos_rota)
         if opcoes:
             meta = opcoes[0][1]
             k_str, v_key = str(meta["k"]), f"viagem_{meta['v']}"
@@ -363,15 +375,15 @@ def construir_solucao_global_aco(dados: Dados, feromonio_map: np.ndarray, alpha:
                  i = rota[-1]
                  if not recalcular_chegadas_e_validar_rota(rota + [j_escolhido, 0], chegada[0], dados): continue 
                  
-                 chegada_estimada = rota_data["tempo_fim_servico"] + dados.T[i][j_escolhido]
+                 chegada_estimada = rota_data["tempo_fim_servico"] + dados.T[i, j_escolhido]
                  inicio_servico = max(chegada_estimada, dados.e[j_escolhido-1])
                  melhor_tempo_fim_servico = inicio_servico + dados.s[j_escolhido]
                  folga_temporal = dados.l[j_escolhido-1] - inicio_servico
                  
-                 custo_adc = dados.c[i][j_escolhido] + greedy_factor_retorno * dados.c[j_escolhido][0]
+                 custo_adc = dados.c[i, j_escolhido] + greedy_factor_retorno * dados.c[j_escolhido, 0]
                  heuristica = (1.0 / (custo_adc + 1e-6)) * ((1.0 / (folga_temporal + 1.0)))
                  atratividade = calcular_atratividade(feromonio_map[i][j_escolhido], heuristica, alpha, beta)
-                 candidatos_globais.append({"j": j_escolhido, "k": k, "v": v, "tipo": "existente", "atratividade": atratividade, "custo_adicional": dados.c[i][j_escolhido], "T_saida_garagem": chegada[0], "melhor_tempo_fim_servico": melhor_tempo_fim_servico})
+                 candidatos_globais.append({"j": j_escolhido, "k": k, "v": v, "tipo": "existente", "atratividade": atratividade, "custo_adicional": dados.c[i, j_escolhido], "T_saida_garagem": chegada[0], "melhor_tempo_fim_servico": melhor_tempo_fim_servico})
                      
             # 1.B. Nova Viagem
             for k in range(1, m + 1):
@@ -381,15 +393,15 @@ def construir_solucao_global_aco(dados: Dados, feromonio_map: np.ndarray, alpha:
                 if not recalcular_chegadas_e_validar_rota([0, j_escolhido, 0], T_inicio, dados): continue
                 
                 T_partida = T_inicio + dados.s[0]
-                chegada_est = T_partida + dados.T[0][j_escolhido]
+                chegada_est = T_partida + dados.T[0, j_escolhido]
                 inicio_servico = max(chegada_est, dados.e[j_escolhido-1])
                 melhor_tempo_fim = inicio_servico + dados.s[j_escolhido]
                 folga_temporal = dados.l[j_escolhido-1] - inicio_servico
                 
-                custo_adc = dados.c[0][j_escolhido] + greedy_factor_retorno * dados.c[j_escolhido][0]
+                custo_adc = dados.c[0, j_escolhido] + greedy_factor_retorno * dados.c[j_escolhido, 0]
                 heuristica = (1.0 / (custo_adc + 1e-6)) * ((1.0 / (folga_temporal + 1.0)))
                 atratividade = calcular_atratividade(feromonio_map[0][j_escolhido], heuristica, alpha, beta)
-                candidatos_globais.append({"j": j_escolhido, "k": k, "v": v, "tipo": "novo", "atratividade": atratividade, "custo_adicional": dados.c[0][j_escolhido], "T_saida_garagem": T_inicio, "melhor_tempo_fim_servico": melhor_tempo_fim})
+                candidatos_globais.append({"j": j_escolhido, "k": k, "v": v, "tipo": "novo", "atratividade": atratividade, "custo_adicional": dados.c[0, j_escolhido], "T_saida_garagem": T_inicio, "melhor_tempo_fim_servico": melhor_tempo_fim})
         
         # 2. SELEÇÃO
         if not candidatos_globais:
@@ -397,7 +409,7 @@ def construir_solucao_global_aco(dados: Dados, feromonio_map: np.ndarray, alpha:
              for (k, v), rota_data in rotas_em_construcao.items():
                  i = rota_data["rota"][-1]
                  if i != 0: 
-                     T_cheg = rota_data["tempo_fim_servico"] + dados.T[i][0]
+                     T_cheg = rota_data["tempo_fim_servico"] + dados.T[i, 0]
                      if (T_cheg - rota_data["chegada"][0]) <= dados.Tmax + TOLERANCIA:
                          movimentos_retorno.append({"k": k, "v": v, "T_chegada_garagem": T_cheg})
              if movimentos_retorno:
@@ -427,7 +439,7 @@ def construir_solucao_global_aco(dados: Dados, feromonio_map: np.ndarray, alpha:
         j_nao_atendidas.remove(j)
 
     for (k, v), rota_data in rotas_em_construcao.items():
-         T_cheg = rota_data["tempo_fim_servico"] + dados.T[rota_data["rota"][-1]][0]
+         T_cheg = rota_data["tempo_fim_servico"] + dados.T[rota_data["rota"][-1], 0]
          rota_data["rota"].append(0)
          rota_data["chegada"].append(T_cheg)
          solucao["onibus"][str(k)][f"viagem_{v}"] = rota_data
@@ -0,0 +1,527 @@
+"""
+Núcleo comum dos ACO prioritários (colônias em ilhas com reforço da melhor global).
+
+run_aco(dados, construtor) roda o laço de colônias sobre a instância já lida; o construtor de
+formigas é construir_solucao (roleta por fim de janela, uma viagem por ônibus) ou
+construir_solucao_critica (encaixe guloso por largura de janela em todos os slots).
+"""
+
+import json
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+# Numba é opcional: sem ele, a escolha do próximo nó e a construção crítica rodam em NumPy
+try:
+    from numba import njit
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]): return args[0]
+        return lambda f: f
+
+# orjson é opcional: lê a instância e grava a solução bem mais rápido que o json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NUM_COLONIAS = 4
+NUM_FORMIGAS = 72
+MAX_AVALIACOES = 3000
+# Colônias em processos separados (modelo de ilhas); os filhos recebem a instância e o construtor
+# uma vez, no inicializador do pool. O construtor crítico roda sempre em série (ver run_aco)
+N_PROCESSOS_COLONIAS = min(NUM_COLONIAS, os.cpu_count() or 1)
+
+colonia_parametros = [
+    {"alpha": 3.0, "beta": 2.0, "rho": 0.1},  # Exploitation
+    {"alpha": 0.5, "beta": 2.0, "rho": 0.7},  # Exploration (alta evaporação)
+    {"alpha": 1.0, "beta": 5.0, "rho": 0.5},  # Greedy/Heurística
+    {"alpha": 0.1, "beta": 1.0, "rho": 0.9},  # Quase aleatória
+]
+
+
+class Instancia(NamedTuple):
+    """Dados da instância em arrays NumPy contíguos (float64 mantém a precisão da soma do fx)."""
+    n: int
+    m: int
+    r_max: int
+    capacidade_onibus: int
+    tempo_maximo_viagem: float
+    custo: np.ndarray
+    tempo_servico: np.ndarray
+    tempo_requisicoes: np.ndarray
+    inicio_janela: np.ndarray
+    fim_janela: np.ndarray
+    # Ordem de prioridade fixa (menor fim de janela; estável, empates por id) da roleta
+    ordem_janela: np.ndarray
+    # Ordem de encaixe fixa da construção crítica: (largura da janela, fim da janela), empates por id
+    reqs_ordenadas: np.ndarray
+    # Heurística eta = 1/deslocamento já elevada ao beta de cada colônia (beta é fixo por colônia)
+    eta_beta: list
+
+
+def carregar_instancia(caminho):
+    with open(caminho, "rb") as f:
+        return orjson.loads(f.read()) if orjson is not None else json.load(f)
+
+
+def preparar_instancia(dados):
+    tempo_requisicoes = np.asarray(dados["tempoRequisicoes"], dtype=np.float64)
+    inicio_janela = np.asarray(dados["inicioJanela"], dtype=np.float64)
+    fim_janela = np.asarray(dados["fimJanela"], dtype=np.float64)
+    return Instancia(
+        n=dados["numeroRequisicoes"],
+        m=dados["numeroOnibus"],
+        r_max=dados["numeroMaximoViagens"],
+        capacidade_onibus=dados.get("capacidade_onibus", 9999),
+        tempo_maximo_viagem=dados.get("tempoMaximoViagem", float("inf")),
+        custo=np.asarray(dados["custo"], dtype=np.float64),
+        tempo_servico=np.asarray(dados["tempoServico"], dtype=np.float64),
+        tempo_requisicoes=tempo_requisicoes,
+        inicio_janela=inicio_janela,
+        fim_janela=fim_janela,
+        ordem_janela=(np.argsort(fim_janela, kind="stable") + 1).astype(np.int64),
+        reqs_ordenadas=(np.lexsort((fim_janela, fim_janela - inicio_janela)) + 1).astype(np.int64),
+        eta_beta=[(1 / (tempo_requisicoes + 1e-6)) ** p["beta"] for p in colonia_parametros],
+    )
+
+
+def validar_solucao(inst, solucao):
+    # Todas as requisições aparecem em alguma viagem (prefixo válido de cada slot)
+    rotas, tam, _ = solucao
+    nos = rotas[np.arange(rotas.shape[2]) < tam[..., None]]
+    return np.count_nonzero(np.bincount(nos, minlength=inst.n+1)[1:]) == inst.n
+
+@njit(cache=True)
+def _restricoes_kernel(rotas, tam, T, e, l, s, tempo_max, n):
+    # Cada viagem recomeça o relógio em 0 na garagem: janelas, tempo máximo por viagem,
+    # nenhuma requisição repetida e todas atendidas
+    atendida = np.zeros(n + 1, dtype=np.bool_)
+    total = 0
+    m, r_max = tam.shape
+    for k in range(m):
+        for v in range(r_max):
+            tempo = 0.0
+            em_viagem = False
+            for i in range(tam[k, v]):
+                ponto = rotas[k, v, i]
+                if ponto == 0:
+                    # Nova viagem
+                    if em_viagem:
+                        if tempo > tempo_max:
+                            return False
+                        em_viagem = False
+                        tempo = 0.0
+                    continue
+                ultimo = rotas[k, v, i-1] if i > 0 else 0
+                tempo += T[ultimo, ponto]
+                # Espera pela janela
+                if tempo < e[ponto-1]:
+                    tempo = e[ponto-1]
+                # Verifica janela
+                if tempo > l[ponto-1]:
+                    return False
+                tempo += s[ponto]
+                em_viagem = True
+                if atendida[ponto]:
+                    return False
+                atendida[ponto] = True
+                total += 1
+            # Checa última viagem
+            if em_viagem and tempo > tempo_max:
+                return False
+    # Checa se todas as requisições foram atendidas
+    return total == n
+
+def restricoes_atendidas(inst, solucao):
+    rotas, tam, _ = solucao
+    return _restricoes_kernel(rotas, tam, inst.tempo_requisicoes, inst.inicio_janela, inst.fim_janela,
+                              inst.tempo_servico, inst.tempo_maximo_viagem, inst.n)
+
+def calcular_fx(inst, solucao):
+    origens, destinos = arcos_solucao(solucao)
+    return float(inst.custo[origens, destinos].sum())
+
+def arcos_solucao(solucao):
+    # Arcos de todas as viagens como arrays (origens, destinos), na ordem ônibus, viagem, posição:
+    # a posição p de um slot é origem de arco enquanto p + 1 < tam
+    rotas, tam, _ = solucao
+    usados = np.arange(rotas.shape[2] - 1) < (tam - 1)[..., None]
+    return rotas[..., :-1][usados], rotas[..., 1:][usados]
+
+def solucao_para_dict(solucao):
+    # Estrutura de saída ônibus -> viagem -> rota/arcos/chegada, montada só para a solução salva
+    rotas, tam, chegadas = solucao
+    onibus = {}
+    for k in range(rotas.shape[0]):
+        onibus[str(k)] = {}
+        for v in range(rotas.shape[1]):
+            t = tam[k, v]
+            if t > 1:
+                rota = rotas[k, v, :t].tolist()
+                onibus[str(k)][f"viagem_{v}"] = {
+                    "rota": rota,
+                    "arcos": [[i, j] for i, j in zip(rota[:-1], rota[1:])],
+                    "chegada": chegadas[k, v, :t-1].tolist()
+                }
+    return onibus
+
+# ---------------------------------------------------------------------------
+# Construtor por roleta: uma viagem por ônibus, candidatos por fim de janela
+# ---------------------------------------------------------------------------
+
+@njit(cache=True)
+def _pesos_candidatos_kernel(i, candidatos, tempo_atual, peso, T, e, l):
+    # Candidatos que ainda cabem na janela e seus pesos peso[i, j] (na ordem recebida)
+    viaveis = np.empty(candidatos.shape[0], dtype=np.int64)
+    pesos = np.empty(candidatos.shape[0], dtype=np.float64)
+    total = 0.0
+    q = 0
+    for j in candidatos:
+        deslocamento = T[i, j]
+        inicio_servico = max(tempo_atual + deslocamento, e[j-1])
+        if inicio_servico > l[j-1]:
+            continue
+        valor = peso[i, j]
+        viaveis[q] = j
+        pesos[q] = valor
+        total += valor
+        q += 1
+    return viaveis[:q], pesos[:q], total
+
+@njit(cache=True)
+def _roleta_kernel(pesos, total, r):
+    # Primeiro índice cuja probabilidade acumulada alcança r
+    acumulado = 0.0
+    for p in range(pesos.shape[0]):
+        acumulado += pesos[p] / total
+        if r <= acumulado:
+            return p
+    return pesos.shape[0] - 1
+
+def escolher_proximo(inst, i, cand, tempo_atual, peso, r):
+    # cand já vem na ordem de prioridade (menor fim de janela, empates por id); r é o sorteio
+    # uniforme da formiga para este passo
+    if NUMBA_DISPONIVEL:
+        viaveis, pesos, total = _pesos_candidatos_kernel(i, cand, tempo_atual, peso, inst.tempo_requisicoes,
+                                                         inst.inicio_janela, inst.fim_janela)
+        if viaveis.shape[0] == 0 or total == 0:
+            return None
+        return int(viaveis[_roleta_kernel(pesos, total, r)])
+    # Sem Numba: janelas e pesos de todos os candidatos de uma vez
+    deslocamentos = inst.tempo_requisicoes[i, cand]
+    inicio_servico = np.maximum(tempo_atual + deslocamentos, inst.inicio_janela[cand - 1])
+    viavel = inicio_servico <= inst.fim_janela[cand - 1]
+    viaveis = cand[viavel]
+    if viaveis.shape[0] == 0:
+        return None
+    pesos = peso[i, viaveis]
+    total = np.cumsum(pesos)[-1]  # soma sequencial, como no acumulado da roleta
+    if total == 0:
+        return None
+    # Roleta por busca binária na distribuição acumulada
+    p = np.searchsorted(np.cumsum(pesos / total), r)
+    return int(viaveis[min(p, viaveis.shape[0] - 1)])
+
+def construir_solucao(inst, peso, rng):
+    # Solução em arrays (m, 1, ...): cada ônibus faz uma viagem (rota sem retorno à garagem);
+    # o dict de saída só é montado para a melhor solução
+    n, m = inst.n, inst.m
+    rotas = np.zeros((m, 1, n+1), dtype=np.int64)
+    tam = np.ones((m, 1), dtype=np.int64)
+    chegadas = np.zeros((m, 1, n), dtype=np.float64)
+    # Máscara das requisições ainda não atendidas (índice 0 é a garagem)
+    restantes = np.ones(n+1, dtype=np.bool_)
+    restantes[0] = False
+    num_restantes = n
+    # Sorteios da roleta em lote: no máximo uma escolha por requisição
+    sorteios = rng.random(n)
+    passo = 0
+    for k in range(m):
+        rota = [0]
+        chegada = []
+        tempo_atual = inst.tempo_servico[0]
+        capacidade = 0
+        while num_restantes:
+            i = rota[-1]
+            # Restantes na ordem de prioridade: filtra a ordem fixa pela máscara (sem ordenar a cada passo)
+            candidatos = inst.ordem_janela[restantes[inst.ordem_janela]]
+            escolhido = escolher_proximo(inst, i, candidatos, tempo_atual, peso, sorteios[passo])
+            if escolhido is None:
+                break
+            passo += 1
+            deslocamento = inst.tempo_requisicoes[rota[-1], escolhido]
+            chegada_estimada = tempo_atual + deslocamento
+            inicio_servico = max(chegada_estimada, inst.inicio_janela[escolhido-1])
+            tempo_atual = inicio_servico + inst.tempo_servico[escolhido]
+            rota.append(escolhido)
+            chegada.append(inicio_servico)
+            restantes[escolhido] = False
+            num_restantes -= 1
+            capacidade += 1
+            if capacidade >= inst.r_max:
+                break
+        rotas[k, 0, :len(rota)] = rota
+        tam[k, 0] = len(rota)
+        chegadas[k, 0, :len(chegada)] = chegada
+    solucao = (rotas, tam, chegadas)
+    if validar_solucao(inst, solucao):
+        fx = calcular_fx(inst, solucao)
+        return fx, solucao
+    return None, None
+
+# ---------------------------------------------------------------------------
+# Construtor crítico: encaixe guloso por largura de janela em todos os slots
+# ---------------------------------------------------------------------------
+
+@njit(cache=True)
+def _construir_critica_kernel(T, e, l, s, reqs_ordenadas, capacidade, rotas, tam, chegadas, tempos):
+    # Encaixa cada requisição (na ordem dada) no slot (ônibus, viagem) de início de serviço mais cedo.
+    # Cada slot é uma viagem própria que sai da garagem; rotas[k, v, :tam[k, v]] é a rota do slot
+    # e chegadas[k, v, :tam[k, v]-1] os horários de chegada (o último é o retorno à garagem).
+    # Os buffers (m, r_max, ...) são reaproveitados: só o prefixo válido de cada slot é reinicializado
+    m, r_max = tam.shape
+    tam[:, :] = 1
+    rotas[:, :, 0] = 0
+    tempos[:, :] = s[0]
+    for req in reqs_ordenadas:
+        melhor_k = -1
+        melhor_v = -1
+        melhor_inicio = 0.0
+        for k in range(m):
+            for v in range(r_max):
+                atendidas = tam[k, v] - 1
+                if atendidas >= 1 and atendidas >= capacidade:
+                    continue
+                ultimo = rotas[k, v, tam[k, v] - 1]
+                inicio_servico = max(tempos[k, v] + T[ultimo, req], e[req - 1])
+                if inicio_servico > l[req - 1]:
+                    continue
+                if melhor_k < 0 or inicio_servico < melhor_inicio:
+                    melhor_inicio = inicio_servico
+                    melhor_k = k
+                    melhor_v = v
+        if melhor_k >= 0:
+            t = tam[melhor_k, melhor_v]
+            rotas[melhor_k, melhor_v, t] = req
+            chegadas[melhor_k, melhor_v, t - 1] = melhor_inicio
+            tam[melhor_k, melhor_v] = t + 1
+            tempos[melhor_k, melhor_v] = melhor_inicio + s[req]
+    # Fecha as viagens usadas na garagem
+    for k in range(m):
+        for v in range(r_max):
+            t = tam[k, v]
+            if t > 1:
+                chegadas[k, v, t - 1] = tempos[k, v] + T[rotas[k, v, t - 1], 0]
+                rotas[k, v, t] = 0
+                tam[k, v] = t + 1
+
+def _construir_critica_numpy(T, e, l, s, reqs_ordenadas, capacidade, rotas, tam, chegadas, tempos):
+    # Mesma construção do kernel sem Numba: a busca de slot de cada requisição é uma expressão
+    # sobre os m x r_max slots, e o argmin devolve o primeiro melhor (mesma ordem k, v do laço)
+    m, r_max = tam.shape
+    tam[:, :] = 1
+    rotas[:, :, 0] = 0
+    tempos[:, :] = s[0]
+    # Views planas (m * r_max,) dos slots e último nó de cada um, mantido a cada encaixe
+    # (evita regatar rotas[k, v, tam - 1] para toda requisição)
+    tam_slots = tam.reshape(-1)
+    tempos_slots = tempos.reshape(-1)
+    ultimos = np.zeros(m * r_max, dtype=np.int64)
+    for req in reqs_ordenadas:
+        # Uma coluna da matriz de tempos, lida só nos últimos nós dos slots
+        inicio_servico = np.maximum(tempos_slots + np.take(T[:, req], ultimos), e[req - 1])
+        atendidas = tam_slots - 1
+        livre = (atendidas < 1) | (atendidas < capacidade)
+        inicio_servico[~livre | (inicio_servico > l[req - 1])] = np.inf
+        slot = int(np.argmin(inicio_servico))
+        melhor_inicio = inicio_servico[slot]
+        if melhor_inicio == np.inf:
+            continue
+        k, v = divmod(slot, r_max)
+        t = tam[k, v]
+        rotas[k, v, t] = req
+        chegadas[k, v, t - 1] = melhor_inicio
+        tam[k, v] = t + 1
+        tempos[k, v] = melhor_inicio + s[req]
+        ultimos[slot] = req
+    # Fecha as viagens usadas na garagem
+    k, v = np.nonzero(tam > 1)
+    t = tam[k, v]
+    chegadas[k, v, t - 1] = tempos[k, v] + T[rotas[k, v, t - 1], 0]
+    rotas[k, v, t] = 0
+    tam[k, v] = t + 1
+
+# Buffers da construção crítica por dimensão (m, r_max, n), reaproveitados entre formigas (cada
+# solução guardada é uma cópia): até n requisições + saída e retorno à garagem por slot
+_BUFFERS_CRITICA = {}
+
+def _buffers_critica(inst):
+    chave = (inst.m, inst.r_max, inst.n)
+    if chave not in _BUFFERS_CRITICA:
+        _BUFFERS_CRITICA[chave] = (np.zeros((inst.m, inst.r_max, inst.n+2), dtype=np.int64),
+                                   np.ones((inst.m, inst.r_max), dtype=np.int64),
+                                   np.zeros((inst.m, inst.r_max, inst.n+1), dtype=np.float64),
+                                   np.empty((inst.m, inst.r_max), dtype=np.float64))
+    return _BUFFERS_CRITICA[chave]
+
+def construir_solucao_critica(inst, peso, rng):
+    # Construção gulosa e determinística: peso e rng só mantêm a assinatura comum dos construtores
+    rotas, tam, chegadas, tempos = _buffers_critica(inst)
+    construir = _construir_critica_kernel if NUMBA_DISPONIVEL else _construir_critica_numpy
+    construir(inst.tempo_requisicoes, inst.inicio_janela, inst.fim_janela, inst.tempo_servico,
+              inst.reqs_ordenadas, inst.capacidade_onibus, rotas, tam, chegadas, tempos)
+    # Só calcula fx se todas as restrições forem atendidas
+    if restricoes_atendidas(inst, (rotas, tam, chegadas)):
+        # Os buffers são reaproveitados pela próxima formiga: a solução guardada é uma cópia
+        solucao = (rotas.copy(), tam.copy(), chegadas.copy())
+        return calcular_fx(inst, solucao), solucao
+    return None, None
+
+# ---------------------------------------------------------------------------
+# Feromônio e laço das colônias
+# ---------------------------------------------------------------------------
+
+def resumir_colonia(solucoes_colonia):
+    """
+    O que o laço principal usa de uma iteração da colônia: (formigas, depósito, (melhor_fx, melhor_solucao)).
+    O depósito junta os arcos de todas as formigas válidas em (origens, destinos, deltas), ou é None;
+    é só isso (e não as 72 soluções) que volta dos processos filhos.
+    """
+    origens, destinos, deltas = [], [], []
+    melhor_fx, melhor_solucao = float("inf"), None
+    for fx, solucao in solucoes_colonia:
+        if fx is not None:
+            o, d = arcos_solucao(solucao)
+            origens.append(o)
+            destinos.append(d)
+            deltas.append(np.full(len(o), 1.0 / (fx + 1e-6)))
+            if fx < melhor_fx:
+                melhor_fx, melhor_solucao = fx, solucao
+    deposito = None
+    if origens:
+        deposito = (np.concatenate(origens), np.concatenate(destinos), np.concatenate(deltas))
+    return len(solucoes_colonia), deposito, (melhor_fx, melhor_solucao)
+
+def atualizar_feromonio(feromonio, rho, deposito):
+    feromonio *= np.float32(1 - rho)
+    if deposito is not None:
+        # Arcos de todas as formigas válidas da colônia em um único depósito; np.add.at acumula arcos repetidos
+        origens, destinos, deltas = deposito
+        np.add.at(feromonio, (origens, destinos), deltas)
+
+def reforcar_melhor_global(feromonios, melhor_solucao_global):
+    if melhor_solucao_global:
+        fx = melhor_solucao_global["fx"]
+        delta = 1.0 / (fx + 1e-6)
+        origens, destinos = melhor_solucao_global["arcos"]
+        # Mesmo depósito nas matrizes de todas as colônias de uma vez
+        np.add.at(feromonios, (slice(None), origens, destinos), delta)
+
+def construir_colonia(inst, construtor, c, feromonio, rng):
+    # As NUM_FORMIGAS formigas de uma iteração da colônia c (cada uma conta como uma avaliação)
+    alpha = colonia_parametros[c]["alpha"]
+    # Peso de transição tau**alpha * eta**beta uma vez por iteração (em float64): o feromônio
+    # só muda depois de todas as formigas
+    peso = feromonio.astype(np.float64) ** alpha * inst.eta_beta[c]
+    return [construtor(inst, peso, rng) for _ in range(NUM_FORMIGAS)]
+
+# Instância e construtor de cada processo filho, recebidos uma vez pelo inicializador do pool
+_ESTADO_PROCESSO = {}
+
+def _inicializar_processo(inst, construtor):
+    _ESTADO_PROCESSO["inst"] = inst
+    _ESTADO_PROCESSO["construtor"] = construtor
+
+def _construir_colonia_processo(tarefa):
+    # Executa construir_colonia em um processo filho e devolve só o resumo da colônia; o gerador volta
+    # avançado para o processo principal
+    c, feromonio, rng = tarefa
+    solucoes = construir_colonia(_ESTADO_PROCESSO["inst"], _ESTADO_PROCESSO["construtor"], c, feromonio, rng)
+    return resumir_colonia(solucoes), rng
+
+def run_aco(dados, construtor, max_avaliacoes=MAX_AVALIACOES, log_interval=100):
+    """
+    Roda as NUM_COLONIAS colônias por max_avaliacoes iterações sobre a instância (dict do JSON)
+    com o construtor de formigas dado, grava melhorsolucao.json e historico_fx.json e retorna
+    (melhor_fx, melhor_solucao, historico_fx); melhor_solucao é o dict ônibus -> viagem ou None.
+    """
+    inst = preparar_instancia(dados)
+
+    # Feromônio de todas as colônias em um bloco float32 contíguo (metade da banda na evaporação e
+    # nas leituras); feromonios[c] é uma view. Custos e fx seguem em float64
+    feromonios = np.ones((NUM_COLONIAS, inst.n+1, inst.n+1), dtype=np.float32)
+
+    # Gerador próprio por colônia (estado separado entre as ilhas, serial ou em processos). As sementes
+    # saem do random global, então random.seed ainda reproduz a execução
+    rngs = [np.random.default_rng(random.getrandbits(64)) for _ in range(NUM_COLONIAS)]
+
+    melhor_solucao_global = None
+    melhor_fx_global = float("inf")
+    avaliacoes = 0
+    historico_fx = []
+
+    # O construtor crítico é guloso e determinístico (ignora feromônio e rng): barato demais para pagar
+    # a ida e volta entre processos a cada iteração
+    executor = None
+    if N_PROCESSOS_COLONIAS > 1 and construtor is not construir_solucao_critica:
+        # spawn explícito: os filhos só veem o que o inicializador manda, em qualquer sistema (no Linux o padrão é fork)
+        executor = ProcessPoolExecutor(max_workers=N_PROCESSOS_COLONIAS,
+                                       mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_inicializar_processo, initargs=(inst, construtor))
+
+    for _ in range(max_avaliacoes):
+        # As colônias só interagem no reforço da melhor global: todas constroem antes das atualizações
+        if executor is not None:
+            tarefas = [(c, feromonios[c], rngs[c]) for c in range(NUM_COLONIAS)]
+            resultados = []
+            for c, (resumo, rng) in enumerate(executor.map(_construir_colonia_processo, tarefas)):
+                rngs[c] = rng
+                resultados.append(resumo)
+        else:
+            resultados = [resumir_colonia(construir_colonia(inst, construtor, c, feromonios[c], rngs[c]))
+                          for c in range(NUM_COLONIAS)]
+        for c, (n_formigas, deposito, (fx, solucao)) in enumerate(resultados):
+            avaliacoes += n_formigas
+            if fx < melhor_fx_global:
+                melhor_fx_global = fx
+                # Arcos extraídos uma vez por melhoria (o reforço roda toda iteração)
+                melhor_solucao_global = {
+                    "fx": fx,
+                    "solucao": solucao,
+                    "arcos": arcos_solucao(solucao)
+                }
+            atualizar_feromonio(feromonios[c], colonia_parametros[c]["rho"], deposito)
+        reforcar_melhor_global(feromonios, melhor_solucao_global)
+        # LOG a cada intervalo
+        if avaliacoes % log_interval == 0:
+            print(f"[LOG] Avaliações: {avaliacoes} | Melhor fx: {melhor_fx_global}")
+            historico_fx.append((avaliacoes, melhor_fx_global))
+
+    if executor is not None:
+        executor.shutdown()
+
+    onibus = None
+    if melhor_solucao_global:
+        onibus = solucao_para_dict(melhor_solucao_global["solucao"])
+        saida = {"fx": melhor_fx_global, "onibus": onibus}
+        with open("melhorsolucao.json", "wb") as f:
+            if orjson is not None:
+                f.write(orjson.dumps(saida, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(saida, indent=2).encode())
+        print(f"Melhor solução encontrada com fx = {melhor_fx_global} após {avaliacoes} avaliações.")
+    else:
+        print("Nenhuma solução viável foi encontrada após o número máximo de avaliações.")
+
+    # Salva histórico de evolução para análise posterior
+    with open("historico_fx.json", "w") as f:
+        json.dump(historico_fx, f, indent=2)
+
+    return melhor_fx_global, onibus, historico_fx
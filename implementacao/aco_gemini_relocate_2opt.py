@@ -1,16 +1,29 @@
 import json
+import hashlib
+import heapq
 import numpy as np
-import math
+import multiprocessing
 import random
 import time
-import copy
 import os
-from typing import Dict, Any, Tuple, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Tuple, List, NamedTuple, Optional
 # Assume que exemplo_prof.dados está acessível
 from exemplo_prof.dados import Dados
 from exemplo_prof.dados import carrega_dados_json
 import matplotlib.pyplot as plt
 
+# Numba é opcional: sem ele, o construtivo roda na versão em Python puro
+try:
+    from numba import njit, prange, set_num_threads, config as numba_config
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+    prange = range
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]): return args[0]
+        return lambda f: f
+
 # --- CONSTANTE DE TOLERÂNCIA FLOAT ---
 TOLERANCIA = 1e-4 # Tolerância do factível (mantida)
 TOLERANCIA_CUSTO = 1e-4 # Tolerância de Custo para o VND (mantida para alta precisão)
@@ -25,6 +38,39 @@ FATOR_RUINA = 0.25 # AUMENTADO PARA 25% - MAXIMIZA A DIVERSIFICAÇÃO
 # CORREÇÃO CRÍTICA DE VELOCIDADE: Amostragem agressiva na Reconstrução
 AMOSTRA_J_RNR = 3
 
+# --- FORMIGAS EM PARALELO (caminho Numba) ---
+# Formigas construídas simultaneamente por colônia; usa-se a primeira sem deadlock, então o
+# número de avaliações por iteração não muda. Fixo (e não um por núcleo) para a busca dar o
+# mesmo resultado em qualquer máquina; as threads do prange é que seguem os núcleos
+N_FORMIGAS_PARALELAS = 4
+
+# A partir deste tamanho de rota, recalcular_chegadas_e_validar_rota usa a versão
+# vetorizada (abaixo disso o overhead do NumPy supera o laço escalar)
+LIMIAR_ROTA_VETORIZADA = 16
+
+# --- PODA DE VIZINHANÇA NO RELOCATE ---
+# Só tenta inserir o cliente ao lado de um dos K_NN vizinhos mais baratos
+K_NN = 15
+
+# --- COLÔNIAS EM PARALELO ---
+# Uma colônia por processo (contorna o GIL); com 1 núcleo as colônias rodam em sequência
+N_PROCESSOS_COLONIAS = min(3, os.cpu_count() or 1)
+
+# --- TROCA DE ELITE ENTRE COLÔNIAS ---
+# A cada INTERVALO_TROCA_ELITE iterações o mapa da colônia com a melhor solução polida
+# é misturado nos das outras: tau = (1 - PESO_ELITE) * tau + PESO_ELITE * tau_elite
+INTERVALO_TROCA_ELITE = 10
+PESO_ELITE = 0.3
+
+# --- CACHE DA FUNÇÃO OBJETIVO (hash da estrutura das rotas -> custo) ---
+# Limpo no início de cada 'resolva' (as chaves não identificam a instância)
+_FO_CACHE: Dict[bytes, float] = {}
+_FO_CACHE_MAX = 10_000
+
+# --- MAPAS DE FEROMÔNIO (reaproveitados entre chamadas de 'resolva' na mesma instância) ---
+# n -> bloco float32 (3, n+1, n+1) com os mapas das três colônias; reinicializado no lugar
+_MAPAS_FEROMONIO: Dict[int, np.ndarray] = {}
+
 # --- CLASSE CONTADOR (Para contagem mutável) ---
 class Contador:
     def __init__(self):
@@ -49,11 +95,114 @@ class Solucao:
         self.rota = {}
         self.chegada = {}
         self.fx = 0.0
+        # Cache do último factivel(): invalidado por alterar_onibus() (_dirty)
+        self._dirty = True
+        self._factivel_cache = None # (id(dados), resultado): só a chave, para não arrastar a instância no pickle
+        # Registro de desfazer do VND: k -> (viagens, chegadas) do ônibus antes da alteração (None = não existia)
+        self._desfazer = None
+        self._fx_desfazer = 0.0
+
+    def __getstate__(self):
+        """No pickle (envio aos processos das colônias) vão só rotas, chegadas e fx: o cache de
+        factibilidade não vale do outro lado e o registro de desfazer é só do VND em curso."""
+        estado = self.__dict__.copy()
+        estado['_dirty'] = True
+        estado['_factivel_cache'] = None
+        estado['_desfazer'] = None
+        return estado
+
+    def alterar_onibus(self, k):
+        """Chamado pelos operadores antes de alterar o ônibus k: invalida o cache e o registra para desfazer()."""
+        self._dirty = True
+        if self._desfazer is not None and k not in self._desfazer:
+            rotas = self.rota.get(k)
+            self._desfazer[k] = None if rotas is None else (dict(rotas), dict(self.chegada[k]))
+
+    def iniciar_desfazer(self):
+        """Começa um novo registro: desfazer() volta a solução a este ponto."""
+        self._desfazer = {}
+        self._fx_desfazer = self.fx
+
+    def desfazer(self):
+        """Restaura só os ônibus alterados desde iniciar_desfazer() e encerra o registro."""
+        for k, salvo in self._desfazer.items():
+            if salvo is None:
+                self.rota.pop(k, None)
+                self.chegada.pop(k, None)
+            else:
+                self.rota[k], self.chegada[k] = salvo
+        self.fx = self._fx_desfazer
+        self._dirty = True
+        self._desfazer = None
+
+    def encerrar_desfazer(self):
+        """Mantém as alterações e desliga o registro."""
+        self._desfazer = None
 
     def factivel(self, dados, verbose=False):
+        """
+        Verifica se a solução é factível, reaproveitando o último resultado
+        enquanto nenhum operador alterou a solução (um False com verbose refaz a checagem).
+        """
+        cache = self._factivel_cache
+        if not self._dirty and cache is not None and cache[0] == id(dados) and (cache[1] or not verbose):
+            return cache[1]
+        resultado = self._verificar_factibilidade(dados, verbose)
+        self._factivel_cache = (id(dados), resultado)
+        self._dirty = False
+        return resultado
+
+    def arcos_array(self) -> np.ndarray:
+        """Arcos (origem, destino) de todas as viagens como array int32 (E, 2), para o depósito de feromônio."""
+        origens, destinos = [], []
+        for viagens in self.rota.values():
+            for rota in viagens.values():
+                origens.extend(rota[:-1])
+                destinos.extend(rota[1:])
+        return np.array((origens, destinos), dtype=np.int32).T
+
+    def as_hashable(self) -> tuple:
+        """
+        Estrutura das rotas como tupla de tuplas (ignora chegadas e ônibus vazios),
+        ordenada por ônibus: chave estável para contar soluções únicas.
+        """
+        return tuple((k, tuple(tuple(rota) for rota in self.rota[k].values()))
+                     for k in sorted(self.rota) if self.rota[k])
+
+    def para_arrays(self, dados):
+        """
+        Visão plana (SoA) das viagens de 1..K x 1..r, na ordem da verificação: nós (int32) e
+        chegadas (float64) concatenados, com o início de cada viagem em 'inicio' (viagens + 1).
+        Retorna None se alguma viagem tiver rota e chegadas de tamanhos diferentes.
+        """
+        rotas, chegadas = [], []
+        for k in range(1, dados.K + 1):
+            viagens = self.rota.get(k)
+            if not viagens: continue
+            chegadas_k = self.chegada[k]
+            for v in range(1, dados.r + 1):
+                rota = viagens.get(v)
+                if not rota: continue
+                if len(chegadas_k[v]) != len(rota): return None
+                rotas.append(rota)
+                chegadas.append(chegadas_k[v])
+        inicio = np.zeros(len(rotas) + 1, dtype=np.int64)
+        np.cumsum([len(rota) for rota in rotas], out=inicio[1:])
+        total = int(inicio[-1])
+        nos = np.fromiter((no for rota in rotas for no in rota), dtype=np.int32, count=total)
+        chegadas_arr = np.fromiter((t for cheg in chegadas for t in cheg), dtype=np.float64, count=total)
+        return nos, chegadas_arr, inicio
+
+    def _verificar_factibilidade(self, dados, verbose=False):
         """
         Verifica se a solução é factível. (Sua função completa)
+        Sem verbose, as checagens rodam no kernel Numba sobre a visão plana (para_arrays).
         """
+        if NUMBA_DISPONIVEL and not verbose:
+            arrays = self.para_arrays(dados)
+            if arrays is not None:
+                return bool(_factivel_kernel(*arrays, dados.s, dados.T, dados.e, dados.l, float(dados.Tmax), dados.n))
+        
         K_range = range(1, dados.K + 1)
         V_range = range(1, dados.r + 1)
         N = list(range(1, dados.n + 1)) 
@@ -122,6 +271,30 @@ class Solucao:
         
         return True
 
+@njit(cache=True)
+def _factivel_kernel(nos, chegadas, inicio, s, T, e, l, Tmax, n):
+    """Mesmas checagens de Solucao.factivel sobre a visão plana (uma varredura contígua)."""
+    atendida = np.zeros(n + 1, dtype=np.bool_)
+    for t in range(inicio.shape[0] - 1):
+        a, b = inicio[t], inicio[t + 1]
+        # 1. Garagem no início e no fim
+        if nos[a] != 0 or nos[b - 1] != 0: return False
+        # 2. Consistência de tempo interna
+        for i in range(a + 1, b):
+            if chegadas[i] < chegadas[i - 1] + s[nos[i - 1]] + T[nos[i - 1], nos[i]] - 1e-4: return False
+        # 3. Tmax
+        if chegadas[b - 1] - chegadas[a] > Tmax + 1e-4: return False
+        # 4. Janelas e 5. atendimento único
+        for i in range(a + 1, b - 1):
+            req = nos[i]
+            if req < 1 or req > n or atendida[req]: return False
+            if chegadas[i] < e[req - 1] - 1e-4 or chegadas[i] > l[req - 1] + 1e-4: return False
+            atendida[req] = True
+    # 6. Todas as requisições atendidas
+    for req in range(1, n + 1):
+        if not atendida[req]: return False
+    return True
+
 # --- FUNÇÕES AUXILIARES DO ACO E R&R ---
 
 def pode_inserir_requisicao(rota_atual, chegadas_atuais, req_nova, tempo_atual, dados):
@@ -134,66 +307,76 @@ def pode_inserir_requisicao(rota_atual, chegadas_atuais, req_nova, tempo_atual,
         min_arrival = tempo_atual + deslocamento
         
     inicio_janela, fim_janela = dados.e[req_nova-1], dados.l[req_nova-1]
-    T_inicio_servico_projetado = max(min_arrival, inicio_janela)
-    
-    if T_inicio_servico_projetado > fim_janela + TOLERANCIA: return False
-        
+    # max sem desvio: espera = parte positiva de (e - chegada)
+    T_inicio_servico_projetado = min_arrival + max(0.0, inicio_janela - min_arrival)
     T_chegada_final_projetada = T_inicio_servico_projetado + dados.s[req_nova] + dados.T[req_nova][0]
-    duracao_projetada = T_chegada_final_projetada - chegadas_atuais[0]
-    
-    if duracao_projetada > dados.Tmax + TOLERANCIA: return False
     
-    return True
+    # Janela e Tmax combinados em um único teste
+    return (T_inicio_servico_projetado <= fim_janela + TOLERANCIA) & \
+           (T_chegada_final_projetada - chegadas_atuais[0] <= dados.Tmax + TOLERANCIA)
 
 def calcular_atratividade(tau, eta, alpha, beta):
-    return math.exp(alpha * math.log(max(1e-6, tau)) + beta * math.log(max(1e-6, eta)))
+    # Aceita escalares ou arrays (avaliação de vários slots de uma vez)
+    return np.exp(alpha * np.log(np.maximum(1e-6, tau)) + beta * np.log(np.maximum(1e-6, eta)))
 
 def escolher_slot_por_probabilidade(candidatos_slot, dados):
-    total_atratividade = sum(c['atratividade'] for c in candidatos_slot)
+    n_cands = len(candidatos_slot)
+    atratividades = np.fromiter((c['atratividade'] for c in candidatos_slot), dtype=np.float64, count=n_cands)
+    total_atratividade = atratividades.sum()
     if total_atratividade == 0:
-        return min(candidatos_slot, key=lambda x: x['custo_adicional'])
+        custos = np.fromiter((c['custo_adicional'] for c in candidatos_slot), dtype=np.float64, count=n_cands)
+        return candidatos_slot[int(np.argmin(custos))]
     
-    r_val = random.random()
-    acumulado = 0
-    for c in candidatos_slot:
-        prob = c['atratividade'] / total_atratividade
-        acumulado += prob
-        if r_val <= acumulado: return c
-    return candidatos_slot[-1]
+    # Roleta: busca binária na soma acumulada
+    acumulado = np.cumsum(atratividades)
+    idx = int(np.searchsorted(acumulado, random.random() * total_atratividade))
+    return candidatos_slot[min(idx, n_cands - 1)]
 
 def calcular_funcao_objetivo(solucao_dict, dados, contador: Contador):
     """
     CALCULADOR DA FUNÇÃO OBJETIVO E CONTADOR DE AVALIAÇÃO OFICIAL (FX TOTAL)
+    Memoizado pelo hash da estrutura das rotas: toda chamada conta como avaliação,
+    mas soluções repetidas não percorrem as arestas novamente.
     """
-    custo = 0.0
-    for k_str, viagens in solucao_dict.get("onibus", {}).items():
-        for v_str, dados_viagem in viagens.items():
-            rota = dados_viagem["rota"]
-            for i in range(len(rota) - 1):
-                custo += dados.c[rota[i]][rota[i+1]]
+    # Sequência de nós de todas as viagens, separadas por -1 (serve para o hash e para o custo)
+    nos = []
+    for viagem in solucao_dict.get("viagens", []):
+        nos.extend(viagem["rota"])
+        nos.append(-1)
+    arr = np.array(nos, dtype=np.int32)
+    chave = hashlib.blake2b(arr.tobytes(), digest_size=16).digest()
+    
+    custo = _FO_CACHE.get(chave)
+    if custo is None:
+        # Junta as arestas de todas as viagens e soma os custos em uma única redução NumPy
+        origens, destinos = arr[:-1], arr[1:]
+        validas = (origens >= 0) & (destinos >= 0)
+        custo = float(np.asarray(dados.c)[origens[validas], destinos[validas]].sum())
+        
+        if len(_FO_CACHE) >= _FO_CACHE_MAX:
+            _FO_CACHE.pop(next(iter(_FO_CACHE))) # Descarta a entrada mais antiga (FIFO)
+        _FO_CACHE[chave] = custo
     
     contador.incrementar() 
     return custo
 
-def atualizar_feromonio(feromonio_map, melhor_solucao_dict, melhor_custo, rho, Q, dados, fator_elite):
+def atualizar_feromonio(feromonio_map, arcos, melhor_custo, rho, Q, dados, fator_elite):
     """
     ATENÇÃO: Função de depósito de feromônio. 
     O nome foi corrigido de 'actualizar_feromonio' para 'atualizar_feromonio'.
+    arcos é o array (E, 2) de Solucao.arcos_array() (origens -> destinos, depósito em scatter).
     """
-    # Evaporação
-    feromonio_map *= (1.0 - rho)
+    if melhor_custo == float('inf'): arcos = arcos[:0]
+    origens, destinos = arcos[:, 0], arcos[:, 1]
+    # Delta Tau baseado na melhor solução de toda a execução (Best-So-Far)
+    delta_tau = np.float32((fator_elite * Q) / max(1e-6, melhor_custo)) if origens.size else np.float32(0.0)
     
-    # Depósito
-    if melhor_solucao_dict and melhor_custo < float('inf'):
-        # Delta Tau baseado na melhor solução de toda a execução (Best-So-Far)
-        delta_tau = (fator_elite * Q) / max(1e-6, melhor_custo)
-        
-        for k_str, viagens in melhor_solucao_dict.get("onibus", {}).items():
-            for v_str, dados_viagem in viagens.items():
-                rota = dados_viagem["rota"]
-                for i in range(len(rota) - 1):
-                    # O depósito usa o custo da melhor solução global
-                    feromonio_map[rota[i]][rota[i+1]] += delta_tau
+    # Evaporação (mapa em float32: mantém o dtype na operação in-place)
+    feromonio_map *= np.float32(1.0 - rho)
+    
+    # Depósito: np.add.at acumula corretamente arestas repetidas
+    if origens.size:
+        np.add.at(feromonio_map, (origens, destinos), delta_tau)
     return feromonio_map
 
 def dict_para_solucao(dict_solucao: Dict[str, Any], dados: Dados, contador: Contador) -> Solucao:
@@ -202,125 +385,392 @@ def dict_para_solucao(dict_solucao: Dict[str, Any], dados: Dados, contador: Cont
     sol.chegada = {k: {} for k in range(1, dados.K + 1)}
     if dict_solucao is None: return sol
     
-    for k_str, onibus_data in dict_solucao.get("onibus", {}).items():
-        try: k = int(k_str)
-        except ValueError: continue
-        if k not in sol.rota: sol.rota[k] = {}
-        if k not in sol.chegada: sol.chegada[k] = {}
-        for v_str, viagem in onibus_data.items():
-            try: v = int(v_str.split('_')[1])
-            except (IndexError, ValueError): continue
-            if 'rota' in viagem and 'chegada' in viagem:
-                sol.rota[k][v] = viagem['rota']
-                sol.chegada[k][v] = viagem['chegada']
+    for viagem in dict_solucao.get("viagens", []):
+        k, v = viagem["k"], viagem["v"]
+        sol.rota.setdefault(k, {})[v] = viagem["rota"]
+        sol.chegada.setdefault(k, {})[v] = viagem["chegada"]
     
     sol.fx = calcular_funcao_objetivo(dict_solucao, dados, contador)
     return sol
 
-def solucao_to_hash(solucao_obj: Solucao) -> str:
+def clonar_solucao(sol: Solucao, copiar_listas: bool = True) -> Solucao:
+    """
+    Cópia estrutural de uma Solucao: novos dicts por ônibus e cópias rasas das
+    listas de rota/chegada (substitui o copy.deepcopy, que percorre cada objeto).
+    Com copiar_listas=False as listas são compartilhadas: basta para quem só
+    substitui rotas inteiras (nunca altera uma lista no lugar), como o R&R.
+    """
+    nova = Solucao()
+    if copiar_listas:
+        nova.rota = {k: {v: rota[:] for v, rota in viagens.items()} for k, viagens in sol.rota.items()}
+        nova.chegada = {k: {v: cheg[:] for v, cheg in viagens.items()} for k, viagens in sol.chegada.items()}
+    else:
+        nova.rota = {k: dict(viagens) for k, viagens in sol.rota.items()}
+        nova.chegada = {k: dict(viagens) for k, viagens in sol.chegada.items()}
+    nova.fx = sol.fx
+    return nova
+
+def solucao_para_dict(sol: Solucao) -> Dict[str, Any]:
+    """
+    Converte um objeto Solucao para o formato interno plano:
+    {"fx": ..., "viagens": [{"k", "v", "rota", "chegada"}, ...]}.
+    """
+    return {
+        "fx": sol.fx,
+        "viagens": [
+            {"k": k, "v": v, "rota": rota, "chegada": sol.chegada[k][v]}
+            for k, viagens in sol.rota.items()
+            for v, rota in viagens.items()
+        ]
+    }
+
+
+# --- KERNEL NUMBA DO CONSTRUTIVO (uma formiga inteira em código compilado) ---
+@njit(cache=True)
+def _construir_formiga_kernel(T, C, S, E, L, INV_L, INV_E, feromonio, alpha, beta,
+                              FATOR_L, FATOR_E, Tmax, tol, K, r_max, pendente, semente):
     """
-    Cria um hash único para a estrutura da rota (ignora os tempos de chegada).
-    Utilizado para contar soluções únicas (Diversificação).
+    Mesma lógica de construir_solucao_global_aco, sobre arrays:
+    rotas/chegadas (K+1, r+1, n+2) com comprimento em tam (0 = viagem não usada).
+    Cada ônibus tem no máximo uma viagem aberta (a de índice bus_viagem[k]).
+    Retorna (rotas, chegadas, tam, cliente_faltante), com cliente_faltante = 0 em caso de sucesso.
     """
-    rotas_tuplas = []
+    np.random.seed(semente)
+    n = pendente.shape[0] - 1
+    rotas = np.zeros((K + 1, r_max + 1, n + 2), dtype=np.int32)
+    chegadas = np.zeros((K + 1, r_max + 1, n + 2), dtype=np.float64)
+    tam = np.zeros((K + 1, r_max + 1), dtype=np.int32)
+    bus_tempo = np.zeros(K + 1, dtype=np.float64)
+    bus_viagem = np.ones(K + 1, dtype=np.int32)
+    aberta = np.zeros(K + 1, dtype=np.bool_)
+    tfim = np.zeros(K + 1, dtype=np.float64)
+    n_pend = 0
+    for j in range(1, n + 1):
+        if pendente[j]: n_pend += 1
     
-    # Coleta todas as rotas (k, v)
-    for k in sorted(solucao_obj.rota.keys()):
-        for v in sorted(solucao_obj.rota[k].keys()):
-            rota = solucao_obj.rota[k][v]
-            # Adiciona (ônibus, viagem, rota_como_tupla)
-            rotas_tuplas.append((k, v, tuple(rota)))
+    cand_k = np.empty(K, dtype=np.int32)
+    cand_fim = np.empty(K, dtype=np.float64)
+    cand_custo = np.empty(K, dtype=np.float64)
+    cand_atr = np.empty(K, dtype=np.float64)
+    
+    while n_pend > 0:
+        # 1. Cliente factível mais restritivo (menor L) e seus slots
+        j1 = -1
+        for j in range(1, n + 1):
+            if not pendente[j]: continue
+            if j1 != -1 and L[j - 1] >= L[j1 - 1]: continue
+            for k in range(1, K + 1):
+                if aberta[k]:
+                    v = bus_viagem[k]
+                    ini = max(tfim[k] + T[rotas[k, v, tam[k, v] - 1], j], E[j - 1])
+                    c0 = chegadas[k, v, 0]
+                elif bus_viagem[k] <= r_max:
+                    c0 = bus_tempo[k]
+                    ini = max(c0 + S[0] + T[0, j], E[j - 1])
+                else:
+                    continue
+                if (ini <= L[j - 1] + tol) & (ini + S[j] + T[j, 0] - c0 <= Tmax + tol):
+                    j1 = j
+                    break
+        
+        if j1 != -1:
+            fu = 1.0 + FATOR_L * INV_L[j1 - 1] + FATOR_E * INV_E[j1 - 1]
+            n_c = 0
+            total = 0.0
+            for k in range(1, K + 1):
+                if aberta[k]:
+                    v = bus_viagem[k]
+                    ultimo = rotas[k, v, tam[k, v] - 1]
+                    ini = max(tfim[k] + T[ultimo, j1], E[j1 - 1])
+                    c0 = chegadas[k, v, 0]
+                    custo = C[ultimo, j1]
+                    eta = fu / (custo + 0.8 * C[j1, 0] + 1e-6)
+                    tau = feromonio[ultimo, j1]
+                elif bus_viagem[k] <= r_max:
+                    c0 = bus_tempo[k]
+                    ini = max(c0 + S[0] + T[0, j1], E[j1 - 1])
+                    custo = C[0, j1]
+                    eta = fu / (custo + C[j1, 0] + 1e-6)
+                    tau = feromonio[0, j1]
+                else:
+                    continue
+                if (ini <= L[j1 - 1] + tol) & (ini + S[j1] + T[j1, 0] - c0 <= Tmax + tol):
+                    cand_k[n_c] = k
+                    cand_fim[n_c] = ini + S[j1]
+                    cand_custo[n_c] = custo
+                    cand_atr[n_c] = np.exp(alpha * np.log(max(1e-6, tau)) + beta * np.log(max(1e-6, eta)))
+                    total += cand_atr[n_c]
+                    n_c += 1
             
-    # Cria uma tupla de tuplas e a converte em string para ser usada como hash
-    # NOTA: Garante que a ordem (k, v) é consistente para que o hash seja único
-    return str(tuple(rotas_tuplas))
-
+            # 2. Roleta (soma acumulada); atratividade nula -> menor custo adicional
+            escolhido = 0
+            if total == 0.0:
+                for p in range(1, n_c):
+                    if cand_custo[p] < cand_custo[escolhido]: escolhido = p
+            else:
+                alvo = np.random.random() * total
+                acumulado = 0.0
+                escolhido = n_c - 1
+                for p in range(n_c):
+                    acumulado += cand_atr[p]
+                    if acumulado >= alvo:
+                        escolhido = p
+                        break
+            
+            # 3. Aplicação
+            k = cand_k[escolhido]
+            v = bus_viagem[k]
+            if not aberta[k]:
+                aberta[k] = True
+                rotas[k, v, 0] = 0
+                chegadas[k, v, 0] = bus_tempo[k]
+                tam[k, v] = 1
+            pos = tam[k, v]
+            rotas[k, v, pos] = j1
+            chegadas[k, v, pos] = cand_fim[escolhido] - S[j1]
+            tam[k, v] = pos + 1
+            tfim[k] = cand_fim[escolhido]
+            pendente[j1] = False
+            n_pend -= 1
+            continue
+        
+        # FASE DEADLOCK/FECHAMENTO: fecha a rota aberta de menor custo de retorno (respeitando Tmax)
+        k_fechar = -1
+        melhor_retorno = np.inf
+        for k in range(1, K + 1):
+            if not aberta[k]: continue
+            v = bus_viagem[k]
+            ultimo = rotas[k, v, tam[k, v] - 1]
+            if tfim[k] + T[ultimo, 0] - chegadas[k, v, 0] <= Tmax + tol and C[ultimo, 0] < melhor_retorno:
+                melhor_retorno = C[ultimo, 0]
+                k_fechar = k
+        if k_fechar != -1:
+            k = k_fechar
+            v = bus_viagem[k]
+            pos = tam[k, v]
+            rotas[k, v, pos] = 0
+            chegadas[k, v, pos] = tfim[k] + T[rotas[k, v, pos - 1], 0]
+            tam[k, v] = pos + 1
+            bus_tempo[k] = chegadas[k, v, pos]
+            bus_viagem[k] += 1
+            aberta[k] = False
+            continue
+        
+        # ROTA DE RESGATE: viagem dedicada [0, j, 0] para o cliente mais restritivo
+        # (só em ônibus sem viagem aberta, para não sobrescrever a rota em construção)
+        j_restritivo = -1
+        for j in range(1, n + 1):
+            if pendente[j] and (j_restritivo == -1 or L[j - 1] < L[j_restritivo - 1]):
+                j_restritivo = j
+        j = j_restritivo
+        for k in range(1, K + 1):
+            v = bus_viagem[k]
+            if aberta[k] or v > r_max: continue
+            t0 = bus_tempo[k]
+            ini = max(t0 + S[0] + T[0, j], E[j - 1])
+            if (ini <= L[j - 1] + tol) & (ini + S[j] + T[j, 0] - t0 <= Tmax + tol):
+                rotas[k, v, 0], rotas[k, v, 1], rotas[k, v, 2] = 0, j, 0
+                chegadas[k, v, 0], chegadas[k, v, 1] = t0, ini
+                chegadas[k, v, 2] = ini + S[j] + T[j, 0]
+                tam[k, v] = 3
+                bus_tempo[k] = chegadas[k, v, 2]
+                bus_viagem[k] += 1
+                pendente[j] = False
+                n_pend -= 1
+                break
+        if pendente[j]:
+            return rotas, chegadas, tam, j
+    
+    # FASE DE FINALIZAÇÃO
+    for k in range(1, K + 1):
+        if aberta[k]:
+            v = bus_viagem[k]
+            pos = tam[k, v]
+            rotas[k, v, pos] = 0
+            chegadas[k, v, pos] = tfim[k] + T[rotas[k, v, pos - 1], 0]
+            tam[k, v] = pos + 1
+    return rotas, chegadas, tam, 0
+
+@njit(parallel=True, cache=True)
+def _construir_formigas_kernel(T, C, S, E, L, INV_L, INV_E, feromonio, alpha, beta,
+                               FATOR_L, FATOR_E, Tmax, tol, K, r_max, pendente, sementes):
+    """Constrói uma formiga por semente em paralelo (prange); o mapa de feromônio é só lido."""
+    n_formigas = sementes.shape[0]
+    n = pendente.shape[0] - 1
+    rotas = np.zeros((n_formigas, K + 1, r_max + 1, n + 2), dtype=np.int32)
+    chegadas = np.zeros((n_formigas, K + 1, r_max + 1, n + 2), dtype=np.float64)
+    tam = np.zeros((n_formigas, K + 1, r_max + 1), dtype=np.int32)
+    faltantes = np.zeros(n_formigas, dtype=np.int64)
+    for a in prange(n_formigas):
+        r_a, c_a, t_a, f_a = _construir_formiga_kernel(T, C, S, E, L, INV_L, INV_E, feromonio, alpha, beta,
+                                                       FATOR_L, FATOR_E, Tmax, tol, K, r_max,
+                                                       pendente.copy(), sementes[a])
+        rotas[a], chegadas[a], tam[a] = r_a, c_a, t_a
+        faltantes[a] = f_a
+    return rotas, chegadas, tam, faltantes
+
+def _construir_solucao_numba(dados, feromonio_map, alpha, beta, FATOR_PESO_L, FATOR_PESO_E, clientes_iniciais):
+    """
+    Prepara os arrays, constrói N_FORMIGAS_PARALELAS formigas no kernel paralelo e
+    traduz para o formato de solução apenas a primeira sem deadlock.
+    """
+    n = dados.n
+    pendente = np.zeros(n + 1, dtype=np.bool_)
+    if clientes_iniciais is None: pendente[1:] = True
+    else: pendente[np.fromiter(clientes_iniciais, dtype=np.int64, count=len(clientes_iniciais))] = True
+    
+    E_vec = np.asarray(dados.e, dtype=np.float64)
+    L_vec = np.asarray(dados.l, dtype=np.float64)
+    sementes = np.array([random.getrandbits(31) for _ in range(N_FORMIGAS_PARALELAS)], dtype=np.int64)
+    rotas, chegadas, tam, faltantes = _construir_formigas_kernel(
+        np.ascontiguousarray(dados.T, dtype=np.float64), np.ascontiguousarray(dados.c, dtype=np.float64),
+        np.asarray(dados.s, dtype=np.float64), E_vec, L_vec,
+        1.0 / np.maximum(1e-6, L_vec), 1.0 / np.maximum(1e-6, E_vec + 1.0),
+        feromonio_map, float(alpha), float(beta), float(FATOR_PESO_L), float(FATOR_PESO_E),
+        float(dados.Tmax), TOLERANCIA, dados.K, dados.r, pendente, sementes
+    )
+    sem_deadlock = np.flatnonzero(faltantes == 0)
+    if sem_deadlock.size == 0:
+        print(f"--- Log CRÍTICO: DEADLOCK REAL - Rota de resgate impossível para R{faltantes[0]}. ---")
+        return None, int(faltantes[0])
+    
+    a = sem_deadlock[0]
+    rotas, chegadas, tam = rotas[a], chegadas[a], tam[a]
+    solucao = {"viagens": []}
+    for k, v in zip(*np.nonzero(tam)):
+        t = tam[k, v]
+        solucao["viagens"].append({"k": int(k), "v": int(v), "rota": rotas[k, v, :t].tolist(), "chegada": chegadas[k, v, :t].tolist()})
+    return solucao, None
 
 # --- FUNÇÃO PRINCIPAL DO CONSTRUTIVO (ACO MELHORADO) ---
 def construir_solucao_global_aco(dados, feromonio_map, alpha, beta, FATOR_PESO_L: float, FATOR_PESO_E: float, clientes_iniciais: Optional[set] = None) -> Tuple[Optional[Dict], Optional[int]]:
     
+    # Caminho compilado (uma formiga inteira no kernel Numba), se disponível
+    if NUMBA_DISPONIVEL:
+        return _construir_solucao_numba(dados, feromonio_map, alpha, beta, FATOR_PESO_L, FATOR_PESO_E, clientes_iniciais)
+    
     n, m, r_max = dados.n, dados.K, dados.r
     j_nao_atendidas = clientes_iniciais if clientes_iniciais is not None else set(range(1, n + 1))
     
+    # Heap (l[j], j) dos clientes pendentes, com remoção preguiçosa: o cliente mais
+    # restritivo sai em O(log n) em vez de um min() sobre todo o conjunto.
+    heap_restritivos = [(dados.l[j - 1], j) for j in j_nao_atendidas]
+    heapq.heapify(heap_restritivos)
+    
+    def cliente_mais_restritivo():
+        while heap_restritivos and heap_restritivos[0][1] not in j_nao_atendidas:
+            heapq.heappop(heap_restritivos)
+        return heap_restritivos[0][1] if heap_restritivos else None
+    
+    # Rotas em construção: buffers NumPy pré-alocados (n+2 posições) + comprimento atual.
+    # A conversão para listas acontece só no fechamento (finalizar_rota).
     rotas_em_construcao = {} 
-    bus_status = {k: {"tempo": 0.0, "viagem": 1} for k in range(1, m + 1)}
-    solucao = {"onibus": {str(k): {} for k in range(1, m + 1)}}
+    # Estado dos ônibus em arrays planos (índice 0 não usado): tempo de retorno,
+    # próxima viagem e se essa viagem já está aberta
+    bus_tempo = np.zeros(m + 1, dtype=np.float64)
+    bus_viagem = np.ones(m + 1, dtype=np.int32)
+    bus_aberta = np.zeros(m + 1, dtype=np.bool_)
+    # Solução no formato plano: lista de viagens (k, v, rota, chegada)
+    solucao = {"viagens": []}
     
     iteracao_construtiva = 0 
     
+    # Vetores de urgência (constantes da instância): calculados uma vez por construção
+    INV_L = 1.0 / np.maximum(1e-6, np.asarray(dados.l, dtype=np.float64))
+    INV_E = 1.0 / np.maximum(1e-6, np.asarray(dados.e, dtype=np.float64) + 1.0)
+    
+    # Dados da instância como arrays (leitura vetorizada na geração de candidatos)
+    T_mat = np.asarray(dados.T, dtype=np.float64)
+    C_mat = np.asarray(dados.c, dtype=np.float64)
+    S_vec = np.asarray(dados.s, dtype=np.float64)
+    E_vec = np.asarray(dados.e, dtype=np.float64)
+    L_vec = np.asarray(dados.l, dtype=np.float64)
+    
+    # Espelho SoA das rotas abertas: uma linha por rota em construção com
+    # (k, v, último nó, fim do serviço do último nó, chegada[0]), atualizada a cada passo.
+    # linha_aberta mapeia (k, v) -> linha; o fechamento remove a linha por swap-pop.
+    open_k = np.zeros(m * r_max, dtype=np.int64)
+    open_v = np.zeros(m * r_max, dtype=np.int64)
+    open_last = np.zeros(m * r_max, dtype=np.int64)
+    open_tfim = np.zeros(m * r_max, dtype=np.float64)
+    open_c0 = np.zeros(m * r_max, dtype=np.float64)
+    linha_aberta = {}
+    n_abertas = 0
+    
     # Sub-função para gerar candidatos 
-    def gerar_candidatos(j_pool, FATOR_L, FATOR_E, rotas_em_construcao_snapshot):
+    def gerar_candidatos(j_pool, FATOR_L, FATOR_E, n_abertas):
+        """
+        Avalia de uma vez (matrizes rotas x clientes) a factibilidade de todos os clientes
+        pendentes e retorna apenas os candidatos do cliente factível mais restritivo (menor L).
+        """
+        J = np.fromiter(j_pool, dtype=np.int64, count=len(j_pool))
+        e_J, l_J = E_vec[J-1], L_vec[J-1]
+        s_J, retorno_J = S_vec[J], T_mat[J, 0]
+        
+        # 1.A. Extensão em Rotas Abertas (R x |J|)
+        ultimos = open_last[:n_abertas]
+        c0_A = open_c0[:n_abertas, None]
+        inicio_A = np.maximum(open_tfim[:n_abertas, None] + T_mat[ultimos[:, None], J[None, :]], e_J)
+        ok_A = (inicio_A <= l_J + TOLERANCIA) & (inicio_A + s_J + retorno_J - c0_A <= dados.Tmax + TOLERANCIA)
+        
+        # 1.B. Nova Viagem (B x |J|): ônibus cuja próxima viagem ainda não está aberta
+        ks_novos = np.flatnonzero((bus_viagem[1:] <= r_max) & ~bus_aberta[1:]) + 1
+        t0_B = bus_tempo[ks_novos][:, None]
+        inicio_B = np.maximum(t0_B + S_vec[0] + T_mat[0, J], e_J)
+        ok_B = (inicio_B <= l_J + TOLERANCIA) & (inicio_B + s_J + retorno_J - t0_B <= dados.Tmax + TOLERANCIA)
+        
+        # Cliente mais restritivo (menor L) com ao menos um slot factível
+        factivel_j = ok_A.any(axis=0) | ok_B.any(axis=0)
+        if not factivel_j.any(): return []
+        idx = int(np.argmin(np.where(factivel_j, l_J, np.inf)))
+        j1 = int(J[idx])
+        fator_urgencia_composto = 1.0 + FATOR_L * INV_L[j1-1] + FATOR_E * INV_E[j1-1]
+        
         cands = []
-        for j_escolhido in j_pool:
+        linhas = np.flatnonzero(ok_A[:, idx])
+        if linhas.size:
+            origens = ultimos[linhas]
+            custo_incremental = C_mat[origens, j1]
+            custo_adicional_efetivo = custo_incremental + 0.8 * C_mat[j1, 0]
+            heuristica_extensao = fator_urgencia_composto / (custo_adicional_efetivo + 1e-6)
+            atratividade = calcular_atratividade(feromonio_map[origens, j1], heuristica_extensao, alpha, beta)
+            melhor_tempo_fim_servico = inicio_A[linhas, idx] + S_vec[j1]
             
-            # Cálculo de Urgência
-            urgencia_l = 1.0 / max(1e-6, dados.l[j_escolhido-1])
-            urgencia_e = 1.0 / max(1e-6, dados.e[j_escolhido-1] + 1) 
-            fator_urgencia_composto = 1.0 + FATOR_L * urgencia_l + FATOR_E * urgencia_e
+            for p, linha in enumerate(linhas.tolist()):
+                cands.append({
+                    "j": j1, "k": int(open_k[linha]), "v": int(open_v[linha]), "tipo": "existente",
+                    "atratividade": float(atratividade[p]), 
+                    "custo_adicional": float(custo_incremental[p]), 
+                    "T_saida_garagem": float(open_c0[linha]),
+                    "melhor_tempo_fim_servico": float(melhor_tempo_fim_servico[p]),
+                    "heuristica_eta": float(heuristica_extensao[p])
+                })
+        
+        linhas = np.flatnonzero(ok_B[:, idx])
+        if linhas.size:
+            custo_adicional = float(C_mat[0, j1])
+            custo_total_previsto = custo_adicional + C_mat[j1, 0]
+            heuristica_nova_viagem = float(fator_urgencia_composto / (custo_total_previsto + 1e-6))
+            atratividade = float(calcular_atratividade(feromonio_map[0, j1], heuristica_nova_viagem, alpha, beta))
             
-            # 1.A. Extensão em Rotas Abertas
-            for (k, v), rota_data in rotas_em_construcao_snapshot.items():
-                 rota, chegada = rota_data["rota"], rota_data["chegada"]
-                 tempo_fim_servico_ultimo = rota_data["tempo_fim_servico"]
-                 i = rota[-1]
-                 
-                 if pode_inserir_requisicao(rota, chegada, j_escolhido, tempo_fim_servico_ultimo, dados):
-                     
-                     chegada_estimada = tempo_fim_servico_ultimo + dados.T[i][j_escolhido]
-                     inicio_servico = max(chegada_estimada, dados.e[j_escolhido-1])
-                     melhor_tempo_fim_servico = inicio_servico + dados.s[j_escolhido]
-                     
-                     custo_incremental = dados.c[i][j_escolhido]
-                     custo_retorno_previsto = dados.c[j_escolhido][0]
-                     custo_adicional_efetivo = custo_incremental + 0.8 * custo_retorno_previsto 
-                     
-                     heuristica_extensao = 1.0 / (custo_adicional_efetivo + 1e-6)
-                     heuristica_extensao *= fator_urgencia_composto
-
-                     atratividade = calcular_atratividade(feromonio_map[i][j_escolhido], heuristica_extensao, alpha, beta)
-                     
-                     cands.append({
-                         "j": j_escolhido, "k": k, "v": v, "tipo": "existente",
-                         "atratividade": atratividade, 
-                         "custo_adicional": custo_incremental, 
-                         "T_saida_garagem": chegada[0],
-                         "melhor_tempo_fim_servico": melhor_tempo_fim_servico,
-                         "heuristica_eta": heuristica_extensao
-                     })
-                     
-            # 1.B. Nova Viagem
-            for k in range(1, m + 1):
-                v = bus_status[k]["viagem"]
-                if (k, v) in rotas_em_construcao_snapshot or v > r_max: continue
-                
-                tempo_retorno_ultimo = bus_status[k]["tempo"]
-                T_chegada_inicio_viagem = tempo_retorno_ultimo 
-                
-                if pode_inserir_requisicao([0], [T_chegada_inicio_viagem], j_escolhido, T_chegada_inicio_viagem, dados):
-                    
-                    T_partida_garagem = T_chegada_inicio_viagem + dados.s[0]
-                    chegada_estimada = T_partida_garagem + dados.T[0][j_escolhido]
-                    inicio_servico = max(chegada_estimada, dados.e[j_escolhido-1])
-                    melhor_tempo_fim_servico = inicio_servico + dados.s[j_escolhido]
-                    
-                    custo_adicional = dados.c[0][j_escolhido]
-                    custo_retorno_inicial = dados.c[j_escolhido][0]
-                    custo_total_previsto = custo_adicional + custo_retorno_inicial
-                    
-                    heuristica_nova_viagem = 1.0 / (custo_total_previsto + 1e-6)
-                    heuristica_nova_viagem *= fator_urgencia_composto
-
-                    atratividade = calcular_atratividade(feromonio_map[0][j_escolhido], heuristica_nova_viagem, alpha, beta)
-                    
-                    cands.append({
-                        "j": j_escolhido, "k": k, "v": v, "tipo": "novo",
-                        "atratividade": atratividade, "custo_adicional": custo_adicional,
-                        "T_saida_garagem": T_chegada_inicio_viagem,
-                        "melhor_tempo_fim_servico": melhor_tempo_fim_servico,
-                        "heuristica_eta": heuristica_nova_viagem
-                    })
+            for linha in linhas.tolist():
+                k = int(ks_novos[linha])
+                cands.append({
+                    "j": j1, "k": k, "v": int(bus_viagem[k]), "tipo": "novo",
+                    "atratividade": atratividade, "custo_adicional": custo_adicional,
+                    "T_saida_garagem": float(t0_B[linha, 0]),
+                    "melhor_tempo_fim_servico": float(inicio_B[linha, idx] + S_vec[j1]),
+                    "heuristica_eta": heuristica_nova_viagem
+                })
         return cands
 
+    def finalizar_rota(rota_data, T_chegada_garagem):
+        """Fecha a rota na garagem e converte os buffers para o formato da solução (listas)."""
+        pos = rota_data["len"]
+        rota_data["rota"][pos] = 0
+        rota_data["chegada"][pos] = T_chegada_garagem
+        return {"rota": rota_data["rota"][:pos + 1].tolist(), "chegada": rota_data["chegada"][:pos + 1].tolist()}
+
     # Loop Principal: Continua até que todos os clientes sejam atendidos.
     while j_nao_atendidas:
         iteracao_construtiva += 1
@@ -330,19 +780,7 @@ def construir_solucao_global_aco(dados, feromonio_map, alpha, beta, FATOR_PESO_L
                 print(f"--- Log Const. {iteracao_construtiva}: Clientes faltantes: {len(j_nao_atendidas)}/{n} ---")
         
         # Heurística de priorização: Se houver candidatos, prioriza os mais restritivos (menor L)
-        candidatos_globais = gerar_candidatos(j_nao_atendidas, FATOR_PESO_L, FATOR_PESO_E, rotas_em_construcao)
-
-        if candidatos_globais and len(j_nao_atendidas) > 0:
-            js_unicos = list(set(c['j'] for c in candidatos_globais if 'j' in c))
-            if len(js_unicos) > 0:
-                js_ordenados = sorted(js_unicos, key=lambda x: dados.l[x-1])
-                j1 = js_ordenados[0]
-                # Apenas candidatos para o cliente mais restritivo
-                candidatos_finais = [c for c in candidatos_globais if c['j'] == j1]
-            else:
-                 candidatos_finais = candidatos_globais 
-        else:
-             candidatos_finais = candidatos_globais
+        candidatos_finais = gerar_candidatos(j_nao_atendidas, FATOR_PESO_L, FATOR_PESO_E, n_abertas)
         
         # ----------------------------------------------------------------------
         # FASE DEADLOCK/FECHAMENTO
@@ -354,7 +792,7 @@ def construir_solucao_global_aco(dados, feromonio_map, alpha, beta, FATOR_PESO_L
             if rotas_abertas:
                 candidatos_retorno = []
                 for (k, v), rota_data in rotas_em_construcao.items():
-                    i = rota_data["rota"][-1]
+                    i = int(rota_data["rota"][rota_data["len"] - 1])
                     if i != 0: 
                         T_chegada_garagem = rota_data["tempo_fim_servico"] + dados.T[i][0]
                         # A rota de retorno deve ser factível (Tmax)
@@ -370,24 +808,31 @@ def construir_solucao_global_aco(dados, feromonio_map, alpha, beta, FATOR_PESO_L
                     rota_data = rotas_em_construcao[(k, v)]
                     T_chegada_garagem = slot_escolhido_retorno['T_chegada_garagem']
                     
-                    bus_status[k]["tempo"] = T_chegada_garagem 
-                    bus_status[k]["viagem"] += 1 
-                    rota_data["rota"].append(0)
-                    rota_data["chegada"].append(T_chegada_garagem)
-                    solucao["onibus"][str(k)][f"viagem_{v}"] = rota_data
+                    bus_tempo[k] = T_chegada_garagem 
+                    bus_viagem[k] += 1 
+                    bus_aberta[k] = False
+                    solucao["viagens"].append({"k": k, "v": v, **finalizar_rota(rota_data, T_chegada_garagem)})
                     del rotas_em_construcao[(k, v)] 
+                    
+                    # Remove a linha do espelho SoA (swap-pop com a última linha)
+                    linha = linha_aberta.pop((k, v))
+                    n_abertas -= 1
+                    if linha != n_abertas:
+                        for col in (open_k, open_v, open_last, open_tfim, open_c0):
+                            col[linha] = col[n_abertas]
+                        linha_aberta[(int(open_k[linha]), int(open_v[linha]))] = linha
                     continue 
                 
             # Tenta ROTA DE RESGATE (última chance)
             if j_nao_atendidas:
-                j_restritivo = min(j_nao_atendidas, key=lambda j: dados.l[j - 1])
+                j_restritivo = cliente_mais_restritivo()
                 melhor_resgate = None
                 melhor_custo_resgate = float('inf')
                 
                 for k in range(1, m + 1):
-                    v = bus_status[k]["viagem"]
+                    v = int(bus_viagem[k])
                     if v > r_max: continue
-                    tempo_retorno_ultimo = bus_status[k]["tempo"]
+                    tempo_retorno_ultimo = bus_tempo[k]
                     T_chegada_inicio_viagem = tempo_retorno_ultimo 
                     
                     is_possible = pode_inserir_requisicao([0], [T_chegada_inicio_viagem], j_restritivo, T_chegada_inicio_viagem, dados)
@@ -412,9 +857,9 @@ def construir_solucao_global_aco(dados, feromonio_map, alpha, beta, FATOR_PESO_L
                 if melhor_resgate:
                     k, v = melhor_resgate['k'], melhor_resgate['v']
                     T_chegada_final = melhor_resgate['chegada'][-1]
-                    bus_status[k]["tempo"] = T_chegada_final
-                    bus_status[k]["viagem"] += 1
-                    solucao["onibus"][str(k)][f"viagem_{v}"] = {"rota": melhor_resgate['rota'], "chegada": melhor_resgate['chegada']}
+                    bus_tempo[k] = T_chegada_final
+                    bus_viagem[k] += 1
+                    solucao["viagens"].append({"k": k, "v": v, "rota": melhor_resgate['rota'], "chegada": melhor_resgate['chegada']})
                     j_nao_atendidas.remove(j_restritivo)
                     continue
                         
@@ -424,7 +869,7 @@ def construir_solucao_global_aco(dados, feromonio_map, alpha, beta, FATOR_PESO_L
                 return None, cliente_restritivo_faltante 
                 
             cliente_restritivo_faltante = None
-            if j_nao_atendidas: cliente_restritivo_faltante = min(j_nao_atendidas, key=lambda j: dados.l[j - 1])
+            if j_nao_atendidas: cliente_restritivo_faltante = cliente_mais_restritivo()
             print(f"--- Log CRÍTICO {iteracao_construtiva}: DEADLOCK REAL - Falha em Resgate e Fechamento. Cliente R{cliente_restritivo_faltante} impossível. ---")
             return None, cliente_restritivo_faltante 
         
@@ -448,26 +893,40 @@ def construir_solucao_global_aco(dados, feromonio_map, alpha, beta, FATOR_PESO_L
 
 
         if slot_escolhido['tipo'] == "novo":
-            rotas_em_construcao[(k, v)] = {
-                "rota": [0, j_escolhido],
-                "chegada": [slot_escolhido['T_saida_garagem'], T_chegada_real_j],
+            rota_data = {
+                "rota": np.empty(n + 2, dtype=np.int32),
+                "chegada": np.empty(n + 2, dtype=np.float64),
+                "len": 2,
                 "tempo_fim_servico": slot_escolhido['melhor_tempo_fim_servico']
             }
+            rota_data["rota"][:2] = (0, j_escolhido)
+            rota_data["chegada"][:2] = (slot_escolhido['T_saida_garagem'], T_chegada_real_j)
+            rotas_em_construcao[(k, v)] = rota_data
+            linha = n_abertas
+            linha_aberta[(k, v)] = linha
+            n_abertas += 1
+            bus_aberta[k] = True
+            open_k[linha], open_v[linha] = k, v
+            open_c0[linha] = slot_escolhido['T_saida_garagem']
         else:
             rota_data = rotas_em_construcao[(k, v)]
-            rota_data["rota"].append(j_escolhido)
-            rota_data["chegada"].append(T_chegada_real_j)
+            pos = rota_data["len"]
+            rota_data["rota"][pos] = j_escolhido
+            rota_data["chegada"][pos] = T_chegada_real_j
+            rota_data["len"] = pos + 1
             rota_data["tempo_fim_servico"] = slot_escolhido['melhor_tempo_fim_servico']
+            linha = linha_aberta[(k, v)]
+        
+        open_last[linha] = j_escolhido
+        open_tfim[linha] = slot_escolhido['melhor_tempo_fim_servico']
         
         j_nao_atendidas.remove(j_escolhido)
 
     # FASE DE FINALIZAÇÃO 
     rotas_abertas = list(rotas_em_construcao.items())
     for (k, v), rota_data in rotas_abertas:
-         T_chegada_garagem = rota_data["tempo_fim_servico"] + dados.T[rota_data["rota"][-1]][0]
-         rota_data["rota"].append(0)
-         rota_data["chegada"].append(T_chegada_garagem)
-         solucao["onibus"][str(k)][f"viagem_{v}"] = rota_data
+         T_chegada_garagem = rota_data["tempo_fim_servico"] + dados.T[rota_data["rota"][rota_data["len"] - 1]][0]
+         solucao["viagens"].append({"k": k, "v": v, **finalizar_rota(rota_data, T_chegada_garagem)})
 
     return solucao, None 
 
@@ -483,7 +942,7 @@ def recalcular_chegadas_e_validar_rota(rota: List[int], t_partida: float, dados:
     chegadas = [t_partida]
     if len(rota) <= 1: return None 
     
-    if len(rota) == 2 and rota == [0, 0]:
+    if len(rota) == 2 and rota[0] == 0 and rota[1] == 0:
          chegadas.append(chegadas[0])
          return chegadas 
          
@@ -500,6 +959,14 @@ def recalcular_chegadas_e_validar_rota(rota: List[int], t_partida: float, dados:
          return chegadas
     else: return None
 
+    if NUMBA_DISPONIVEL:
+        ok, chegadas_arr, _ = _recalcular_chegadas_kernel(np.asarray(rota, dtype=np.int32), float(t_partida), dados.s,
+                                                          dados.T, dados.c, dados.e, dados.l, float(dados.Tmax), TOLERANCIA)
+        return chegadas_arr.tolist() if ok else None
+    
+    if len(rota) >= LIMIAR_ROTA_VETORIZADA:
+        return _recalcular_chegadas_vetorizado(rota, t_partida, dados)
+
     for i in range(2, len(rota)):
         u, v = rota[i-1], rota[i]
         tempo_saida_u = chegadas[i-1] + dados.s[u]
@@ -511,180 +978,351 @@ def recalcular_chegadas_e_validar_rota(rota: List[int], t_partida: float, dados:
             chegadas.append(inicio_servico)
         else:
             chegadas.append(chegada_em_v)
+        # Chegadas não decrescem: estourou Tmax aqui, estoura no retorno
+        if chegadas[-1] - t_partida > dados.Tmax + TOLERANCIA: return None
             
     if (chegadas[-1] - chegadas[0]) > dados.Tmax + TOLERANCIA: return None
     return chegadas
 
-def calcular_custo_rota(rota: List[int], dados: Any) -> float:
+@njit(cache=True, nogil=True)
+def _recalcular_chegadas_kernel(rota, t_partida, s, T, c, e, l, Tmax, tol):
+    """Laço escalar compilado (mesma ordem de operações da versão Python). Retorna (ok, chegadas, custo)."""
+    chegadas = np.empty(rota.shape[0], dtype=np.float64)
+    chegadas[0] = t_partida
     custo = 0.0
-    for i in range(len(rota) - 1):
-        custo += dados.c[rota[i]][rota[i+1]]
+    for i in range(1, rota.shape[0]):
+        u, v = rota[i-1], rota[i]
+        custo += c[u, v]
+        chegada_em_v = chegadas[i-1] + s[u] + T[u, v]
+        if v != 0:
+            inicio_servico = max(chegada_em_v, e[v-1])
+            if inicio_servico > l[v-1] + tol: return False, chegadas, custo
+            chegadas[i] = inicio_servico
+        else:
+            chegadas[i] = chegada_em_v
+        # Chegadas não decrescem: estourou Tmax aqui, estoura no retorno
+        if chegadas[i] - t_partida > Tmax + tol: return False, chegadas, custo
+    return (chegadas[-1] - chegadas[0]) <= Tmax + tol, chegadas, custo
+
+def recalcular_chegadas_e_custo(rota: List[int], t_partida: float, dados: Any) -> Optional[Tuple[List[float], float]]:
+    """Chegadas e custo da rota em uma única passada (None se infactível)."""
+    if NUMBA_DISPONIVEL and len(rota) > 2:
+        ok, chegadas_arr, custo = _recalcular_chegadas_kernel(np.asarray(rota, dtype=np.int32), float(t_partida), dados.s,
+                                                              dados.T, dados.c, dados.e, dados.l, float(dados.Tmax), TOLERANCIA)
+        # Garagem logo após a partida só é válida na rota [0, 0] (mesma regra da versão Python)
+        return (chegadas_arr.tolist(), custo) if ok and rota[1] != 0 else None
+    chegadas = recalcular_chegadas_e_validar_rota(rota, t_partida, dados)
+    if chegadas is None: return None
+    return chegadas, calcular_custo_rota(rota, dados)
+
+@njit(cache=True)
+def _custo_rota_kernel(rota, c):
+    custo = 0.0
+    for i in range(rota.shape[0] - 1):
+        custo += c[rota[i], rota[i+1]]
     return custo
 
+def _recalcular_chegadas_vetorizado(rota: List[int], t_partida: float, dados: Any) -> Optional[List[float]]:
+    """
+    Versão NumPy da recorrência a[i] = max(a[i-1] + s[u] + T[u][v], e[v]):
+    com P = cumsum(s[u] + T[u][v]), a[i] = P[i] + max_{k<=i}(e[v_k] - P[k]), tendo t_partida como e do nó 0.
+    A garagem no meio da rota não tem janela (e = -inf, l = +inf).
+    """
+    r = np.asarray(rota)
+    u, v = r[:-1], r[1:]
+    cliente = v > 0
+    e_v = np.where(cliente, dados.e[v - 1], -np.inf)
+    l_v = np.where(cliente, dados.l[v - 1], np.inf)
+    
+    P = np.cumsum(dados.s[u] + dados.T[u, v])
+    chegadas = P + np.maximum.accumulate(np.maximum(e_v - P, t_partida))
+    
+    if np.any(chegadas > l_v + TOLERANCIA): return None
+    if (chegadas[-1] - t_partida) > dados.Tmax + TOLERANCIA: return None
+    return [t_partida] + chegadas.tolist()
+
+def calcular_custo_rota(rota: List[int], dados: Any) -> float:
+    if NUMBA_DISPONIVEL:
+        return _custo_rota_kernel(np.asarray(rota, dtype=np.int32), dados.c)
+    # Soma das arestas consecutivas em uma única indexação vetorizada
+    r = np.asarray(rota)
+    return float(dados.c[r[:-1], r[1:]].sum())
+
+@njit(cache=True, nogil=True)
+def _insercao_factivel_kernel(rota, j, cli, t_partida, s, T, e, l, Tmax, tol):
+    """Valida rota[:j] + [cli] + rota[j:] sem montar a rota candidata (mesma recorrência do recálculo)."""
+    n = rota.shape[0] + 1
+    t = t_partida
+    ant = rota[0]
+    for p in range(1, n):
+        if p < j: v = rota[p]
+        elif p == j: v = cli
+        else: v = rota[p-1]
+        if p == 1 and v == 0: return n == 2
+        chegada_em_v = t + s[ant] + T[ant, v]
+        if v != 0:
+            t = max(chegada_em_v, e[v-1])
+            if t > l[v-1] + tol: return False
+        else:
+            t = chegada_em_v
+        if t - t_partida > Tmax + tol: return False
+        ant = v
+    return True
+
+@njit(cache=True, nogil=True)
+def _inversao_factivel_kernel(rota, i, j, t_partida, s, T, e, l, Tmax, tol):
+    """Valida a rota com o trecho rota[i..j] invertido, sem montá-la. Retorna (ok, chegadas)."""
+    chegadas = np.empty(rota.shape[0], dtype=np.float64)
+    chegadas[0] = t_partida
+    t = t_partida
+    ant = rota[0]
+    for p in range(1, rota.shape[0]):
+        v = rota[i + j - p] if i <= p <= j else rota[p]
+        chegada_em_v = t + s[ant] + T[ant, v]
+        if v != 0:
+            t = max(chegada_em_v, e[v-1])
+            if t > l[v-1] + tol: return False, chegadas
+        else:
+            t = chegada_em_v
+        if t - t_partida > Tmax + tol: return False, chegadas
+        chegadas[p] = t
+        ant = v
+    return True, chegadas
+
+def insercao_factivel(rota: np.ndarray, j: int, cli: int, t_partida: float, dados: Any) -> bool:
+    """Factibilidade temporal de inserir cli na posição j de rota (int32)."""
+    if NUMBA_DISPONIVEL:
+        return _insercao_factivel_kernel(rota, j, cli, float(t_partida), dados.s, dados.T, dados.e, dados.l,
+                                         float(dados.Tmax), TOLERANCIA)
+    return recalcular_chegadas_e_validar_rota(inserir_na_rota(rota, j, cli), t_partida, dados) is not None
+
+def inversao_factivel(rota: np.ndarray, i: int, j: int, t_partida: float, dados: Any) -> Optional[List[float]]:
+    """Chegadas da rota com rota[i..j] invertido (rota int32), ou None se a inversão for infactível."""
+    if NUMBA_DISPONIVEL:
+        ok, chegadas = _inversao_factivel_kernel(rota, i, j, float(t_partida), dados.s, dados.T, dados.e, dados.l,
+                                                 float(dados.Tmax), TOLERANCIA)
+        return chegadas.tolist() if ok else None
+    nova_rota = np.concatenate((rota[:i], rota[i:j+1][::-1], rota[j+1:]))
+    return recalcular_chegadas_e_validar_rota(nova_rota, t_partida, dados)
+
+def inserir_na_rota(base: np.ndarray, j: int, cli: int) -> np.ndarray:
+    """Cópia de base (int32) com cli na posição j, em um buffer pré-alocado."""
+    out = np.empty(base.shape[0] + 1, dtype=np.int32)
+    out[:j] = base[:j]
+    out[j] = cli
+    out[j+1:] = base[j:]
+    return out
+
+def viola_janela_local(chegada_ant: float, ant: int, cli: int, prox: int, dados: Any) -> bool:
+    """
+    Pré-teste O(1) de uma inserção ant -> cli -> prox: as chegadas até 'ant' não mudam,
+    então se cli ou prox já estouram a janela a rota nova é infactível (sem recalcular tudo).
+    """
+    if cli == 0: return False
+    inicio = max(chegada_ant + dados.s[ant] + dados.T[ant, cli], dados.e[cli-1])
+    if inicio > dados.l[cli-1] + TOLERANCIA: return True
+    if prox == 0: return False
+    chegada_prox = max(inicio + dados.s[cli] + dados.T[cli, prox], dados.e[prox-1])
+    return chegada_prox > dados.l[prox-1] + TOLERANCIA
+
+def amostrar_posicoes_vizinhas(rota: List[int], vizinhos_cliente: set, tamanho: int, pular: Optional[int] = None) -> List[int]:
+    """
+    Amostragem de reservatório (uma passada pela rota) de até 'tamanho' posições de inserção j
+    cuja aresta rota[j-1] -> rota[j] encosta em um vizinho próximo do cliente.
+    """
+    amostra = []
+    vistos = 0
+    for j in range(1, len(rota)):
+        if j == pular: continue
+        if rota[j-1] not in vizinhos_cliente and rota[j] not in vizinhos_cliente: continue
+        if vistos < tamanho:
+            amostra.append(j)
+        else:
+            r = random.randrange(vistos + 1)
+            if r < tamanho: amostra[r] = j
+        vistos += 1
+    return amostra
+
 # --- OPERADOR 1: RELOCATE (1-0 Shift/Inter) - AMOSTRAGEM REINTRODUZIDA ---
 
-def busca_local_relocate(solucao: Any, dados: Any, contador: Contador) -> Tuple[Any, bool]:
-    chaves_k = list(solucao.rota.keys())
+def calcular_vizinhos_proximos(dados: Any, k_nn: int = K_NN) -> List[set]:
+    """
+    Para cada nó, o conjunto dos k_nn nós de menor custo c[j][.] (exclui o próprio nó).
+    Calculado uma vez por execução e repassado ao relocate.
+    """
+    ordem = np.argsort(np.asarray(dados.c), axis=1, kind='stable')
+    vizinhos = []
+    for j in range(ordem.shape[0]):
+        linha = ordem[j][ordem[j] != j]
+        vizinhos.append(set(linha[:k_nn].tolist()))
+    return vizinhos
+
+def calcular_partida_ideal(dados: Any) -> np.ndarray:
+    """
+    Partida da garagem que chega a cada cliente exatamente na abertura da janela
+    (e[cli] - s[0] - T[0][cli], índice cli-1). Só depende da instância.
+    """
+    return np.asarray(dados.e, dtype=np.float64) - dados.s[0] - np.asarray(dados.T)[0, 1:dados.n + 1]
+
+def busca_local_relocate(solucao: Any, dados: Any, contador: Contador, vizinhos: Optional[List[set]] = None,
+                         partida_ideal: Optional[np.ndarray] = None) -> Tuple[Any, bool]:
     TOLERANCIA_CUSTO = 1e-4
     # Limite de amostragem AGRESSIVO RESTAURADO: 3 slots. VND SUPERFICIAL E RÁPIDO.
     AMOSTRA_J = 3 
+    # Custos dos movimentos por delta das arestas alteradas (O(1), sem recalcular rotas)
+    c = np.asarray(dados.c)
+    if vizinhos is None: vizinhos = calcular_vizinhos_proximos(dados)
+    if partida_ideal is None: partida_ideal = calcular_partida_ideal(dados)
+    
+    # Visão plana das viagens (id inteiro -> k, v, rota, partida), montada uma vez por chamada:
+    # os laços internos indexam listas em vez de percorrer solucao.rota[k][v]
+    viagens = [(k, v) for k in solucao.rota for v in solucao.rota[k]]
+    rotas = [solucao.rota[k][v] for k, v in viagens]
+    partidas = [solucao.chegada[k][v][0] for k, v in viagens]
+    ids_por_onibus = {k: [] for k in range(1, dados.K + 1)}
+    for idx, (k, v) in enumerate(viagens):
+        ids_por_onibus.setdefault(k, []).append(idx)
+    # Ônibus sem viagens (ex.: os dicts vazios criados em dict_para_solucao); cresce a cada remoção
+    onibus_vazios = {k for k, vs in solucao.rota.items() if not vs}
+    
+    def remover_viagem(k, v):
+        solucao.alterar_onibus(k)
+        del solucao.rota[k][v]
+        del solucao.chegada[k][v]
+        if not solucao.rota[k]: onibus_vazios.add(k)
+    
+    def remover_onibus_vazios():
+        # O(ônibus esvaziados), sem varrer a solução; um ônibus pode ter recebido uma nova viagem depois
+        for k in onibus_vazios:
+            if not solucao.rota.get(k, True):
+                del solucao.rota[k]
+                del solucao.chegada[k]
+        onibus_vazios.clear()
+    
+    def aplicar_remocao(k_orig, v_orig, rota_orig_recortada, novas_chegadas_orig):
+        # Viagens esvaziadas são removidas aqui mesmo (sem varrer a solução inteira)
+        solucao.alterar_onibus(k_orig)
+        if len(rota_orig_recortada) > 2:
+            solucao.rota[k_orig][v_orig] = rota_orig_recortada
+            solucao.chegada[k_orig][v_orig] = novas_chegadas_orig
+        else:
+            remover_viagem(k_orig, v_orig)
 
-    for k_orig in chaves_k:
-        chaves_v = list(solucao.rota.get(k_orig, {}).keys())
-        for v_orig in chaves_v:
-            if v_orig not in solucao.rota.get(k_orig, {}): continue 
-            rota_orig = solucao.rota[k_orig][v_orig]
+    for id_orig, (k_orig, v_orig) in enumerate(viagens):
+        rota_orig = rotas[id_orig]
+        t_partida_orig = partidas[id_orig]
+        
+        # Tenta mover cada cliente (i)
+        for i in range(1, len(rota_orig) - 1):
+            cliente_a_mover = rota_orig[i]
+            rota_orig_recortada = rota_orig[:i] + rota_orig[i+1:]
             
-            # Tenta mover cada cliente (i)
-            for i in range(1, len(rota_orig) - 1):
-                cliente_a_mover = rota_orig[i]
-                rota_orig_recortada = rota_orig[:i] + rota_orig[i+1:]
-                t_partida_orig = solucao.chegada[k_orig][v_orig][0]
+            # CÁLCULO DE REMOÇÃO: Precisa ser validado
+            novas_chegadas_orig = None
+            if len(rota_orig_recortada) > 2:
+                novas_chegadas_orig = recalcular_chegadas_e_validar_rota(rota_orig_recortada, t_partida_orig, dados)
                 
-                # CÁLCULO DE REMOÇÃO: Precisa ser validado
-                novas_chegadas_orig = None
-                if len(rota_orig_recortada) > 2:
-                    novas_chegadas_orig = recalcular_chegadas_e_validar_rota(rota_orig_recortada, t_partida_orig, dados)
-                    
-                    if novas_chegadas_orig is None: continue 
-                    
-                custo_antigo_orig = calcular_custo_rota(rota_orig, dados)
-                custo_novo_orig = calcular_custo_rota(rota_orig_recortada, dados)
+                if novas_chegadas_orig is None: continue 
                 
-                # Tenta INSERIR em todos os destinos possíveis
-                for k_dest in range(1, dados.K + 1):
+            # Delta de remoção: prev -> cliente -> next vira prev -> next
+            prev_i, next_i = rota_orig[i-1], rota_orig[i+1]
+            delta_remocao = c[prev_i, next_i] - c[prev_i, cliente_a_mover] - c[cliente_a_mover, next_i]
+            vizinhos_cliente = vizinhos[cliente_a_mover]
+            
+            # Tenta INSERIR em todos os destinos possíveis
+            for k_dest in range(1, dados.K + 1):
+                ids_dest = ids_por_onibus[k_dest]
+                
+                # 2A. Inserir em VIAGENS EXISTENTES (Relocate Inter e Shift Intra)
+                for id_dest in ids_dest:
+                    v_dest = viagens[id_dest][1]
+                    mesma_viagem = id_dest == id_orig
                     
-                    # 2A. Inserir em VIAGENS EXISTENTES (Relocate Inter e Shift Intra)
-                    chaves_v_dest = list(solucao.rota.get(k_dest, {}).keys())
-                    for v_dest in chaves_v_dest:
-                        rota_dest_base = solucao.rota[k_dest][v_dest]
-                        t_partida_dest = solucao.chegada[k_dest][v_dest][0]
-                        custo_antigo_dest = calcular_custo_rota(rota_dest_base, dados)
+                    # Lógica especial para "Shift" (mesma rota)
+                    if mesma_viagem:
+                        rota_dest_base = rota_orig_recortada
+                        t_partida_dest = t_partida_orig
+                        chegadas_dest_base = novas_chegadas_orig or [t_partida_orig]
+                    else:
+                        rota_dest_base = rotas[id_dest]
+                        t_partida_dest = partidas[id_dest]
+                        chegadas_dest_base = solucao.chegada[k_dest][v_dest]
                         
-                        # Lógica especial para "Shift" (mesma rota)
-                        if k_dest == k_orig and v_dest == v_orig:
-                            rota_dest_base = rota_orig_recortada
-                            t_partida_dest = t_partida_orig
-                            custo_antigo_dest = custo_novo_orig 
-                            
-                        # --- INÍCIO DA AMOSTRAGEM DE POSIÇÕES (j) ---
-                        max_posicoes = len(rota_dest_base)
-                        indices_j = list(range(1, max_posicoes)) # Posições entre o primeiro 0 e o último 0
+                    # --- AMOSTRAGEM DE POSIÇÕES (j) ---
+                    # Até AMOSTRA_J posições vizinhas do cliente (Shift: exceto a posição original)
+                    indices_j = amostrar_posicoes_vizinhas(rota_dest_base, vizinhos_cliente, AMOSTRA_J,
+                                                           pular=i if mesma_viagem else None)
                         
-                        # Se a rota é grande, amostra AMOSTRA_J posições (ou todas se for pequena)
-                        if max_posicoes > AMOSTRA_J + 1:
-                            indices_j = random.sample(indices_j, AMOSTRA_J) 
-                            
-                        for j in indices_j: # Itera apenas nas posições amostradas
-                            # --- FIM DA AMOSTRAGEM DE POSIÇÕES (j) ---
-                            
-                            # Se for a mesma rota (Shift), pule a posição original
-                            if k_dest == k_orig and v_dest == v_orig and j == i: continue
-                            
-                            rota_dest_nova = rota_dest_base[:j] + [cliente_a_mover] + rota_dest_base[j:]
-                            novas_chegadas_dest = recalcular_chegadas_e_validar_rota(rota_dest_nova, t_partida_dest, dados)
-                            
-                            if novas_chegadas_dest is None: continue 
-                            
-                            custo_novo_dest = calcular_custo_rota(rota_dest_nova, dados)
-                            
-                            if k_dest == k_orig and v_dest == v_orig:
-                                delta_custo = custo_novo_dest - custo_antigo_orig
-                            else:
-                                delta_custo = (custo_novo_orig + custo_novo_dest) - (custo_antigo_orig + custo_antigo_dest)
-                                
-                            if delta_custo < -TOLERANCIA_CUSTO: 
-                                
-                                # APLICAÇÃO DO MOVIMENTO (First Improvement)
-                                if len(rota_orig_recortada) > 2:
-                                    solucao.rota[k_orig][v_orig] = rota_orig_recortada
-                                    solucao.chegada[k_orig][v_orig] = novas_chegadas_orig
-                                else:
-                                    if k_orig in solucao.rota and v_orig in solucao.rota[k_orig]:
-                                        del solucao.rota[k_orig][v_orig]
-                                        del solucao.chegada[k_orig][v_orig]
-                                        
-                                if k_dest not in solucao.rota: solucao.rota[k_dest] = {}; solucao.chegada[k_dest] = {}
-                                solucao.rota[k_dest][v_dest] = rota_dest_nova
-                                solucao.chegada[k_dest][v_dest] = novas_chegadas_dest
-                                
-                                # ATUALIZA O FX INCREMENTALMENTE
-                                solucao.fx += delta_custo
-                                
-                                # Limpeza e Retorno Imediato (First Improvement)
-                                for k_clean in list(solucao.rota.keys()):
-                                    for v_clean in list(solucao.rota[k_clean].keys()):
-                                        if len(solucao.rota[k_clean][v_clean]) <= 2:
-                                            del solucao.rota[k_clean][v_clean]
-                                            del solucao.chegada[k_clean][v_clean]
-                                    if not solucao.rota.get(k_clean): 
-                                        if k_clean in solucao.rota: del solucao.rota[k_clean]
-                                        if k_clean in solucao.chegada: del solucao.chegada[k_clean]
-                                        
-                                return solucao, True # Melhoria encontrada, retorna!
-                                
-                    # 2B. Tentar inserir em uma NOVA VIAGEM (Relocate New Trip)
-                    if len(solucao.rota.get(k_dest, {})) < dados.r:
-                        tempo_disponivel = 0.0
-                        if solucao.rota.get(k_dest): 
-                            ultima_v = max(solucao.rota[k_dest].keys())
-                            tempo_disponivel = solucao.chegada[k_dest][ultima_v][-1] 
+                    for j in indices_j: # Itera apenas nas posições amostradas
+                        a, b = rota_dest_base[j-1], rota_dest_base[j]
                         
-                        T_saida_min_disponivel = tempo_disponivel + dados.s[0]
-                        T_partida_ideal_janela = dados.e[cliente_a_mover-1] - dados.s[0] - dados.T[0][cliente_a_mover] 
-                        t_partida_nova_viagem = max(T_partida_ideal_janela, T_saida_min_disponivel)
+                        # Pré-teste O(1) de janela antes do recálculo completo
+                        if viola_janela_local(chegadas_dest_base[j-1], a, cliente_a_mover, b, dados): continue
                         
-                        rota_dest_nova = [0, cliente_a_mover, 0]
-                        novas_chegadas_dest = recalcular_chegadas_e_validar_rota(rota_dest_nova, t_partida_nova_viagem, dados)
-
-                        if novas_chegadas_dest is None: continue 
-                            
-                        custo_novo_dest = calcular_custo_rota(rota_dest_nova, dados)
-                        delta_custo = (custo_novo_orig + custo_novo_dest) - custo_antigo_orig
+                        # Delta de inserção: a -> b vira a -> cliente -> b (vale também para o Shift,
+                        # pois rota_dest_base já é a rota de origem recortada)
+                        delta_custo = delta_remocao + c[a, cliente_a_mover] + c[cliente_a_mover, b] - c[a, b]
+                        if delta_custo >= -TOLERANCIA_CUSTO: continue
+                        
+                        # Só o movimento que melhora monta a rota e recalcula as chegadas
+                        rota_dest_nova = rota_dest_base[:j] + [cliente_a_mover] + rota_dest_base[j:]
+                        novas_chegadas_dest = recalcular_chegadas_e_validar_rota(rota_dest_nova, t_partida_dest, dados)
                         
-                        if delta_custo < -TOLERANCIA_CUSTO:
+                        if novas_chegadas_dest is not None: 
                             
                             # APLICAÇÃO DO MOVIMENTO (First Improvement)
-                            if len(rota_orig_recortada) <= 2:
-                                if k_orig in solucao.rota and v_orig in solucao.rota[k_orig]:
-                                    del solucao.rota[k_orig][v_orig]
-                                    del solucao.chegada[k_orig][v_orig]
-                            else:
-                                solucao.rota[k_orig][v_orig] = rota_orig_recortada
-                                solucao.chegada[k_orig][v_orig] = novas_chegadas_orig
-                            
-                            nova_v_dest = len(solucao.rota.get(k_dest, {})) + 1
-                            if k_dest not in solucao.rota:
-                                solucao.rota[k_dest] = {}
-                                solucao.chegada[k_dest] = {}
-                            solucao.rota[k_dest][nova_v_dest] = rota_dest_nova
-                            solucao.chegada[k_dest][nova_v_dest] = novas_chegadas_dest
+                            solucao.alterar_onibus(k_dest)
+                            if not mesma_viagem:
+                                aplicar_remocao(k_orig, v_orig, rota_orig_recortada, novas_chegadas_orig)
+                            solucao.rota[k_dest][v_dest] = rota_dest_nova
+                            solucao.chegada[k_dest][v_dest] = novas_chegadas_dest
                             
                             # ATUALIZA O FX INCREMENTALMENTE
                             solucao.fx += delta_custo
-                            
-                            # Limpeza e Retorno Imediato (First Improvement)
-                            for k_clean in list(solucao.rota.keys()):
-                                for v_clean in list(solucao.rota[k_clean].keys()):
-                                    if len(solucao.rota[k_clean][v_clean]) <= 2:
-                                        del solucao.rota[k_clean][v_clean]
-                                        del solucao.chegada[k_clean][v_clean]
-                                    if not solucao.rota.get(k_clean): 
-                                        if k_clean in solucao.rota: del solucao.rota[k_clean]
-                                        if k_clean in solucao.chegada: del solucao.chegada[k_clean]
-                                        
+                            remover_onibus_vazios()
                             return solucao, True # Melhoria encontrada, retorna!
+                            
+                # 2B. Tentar inserir em uma NOVA VIAGEM (Relocate New Trip)
+                if len(ids_dest) < dados.r:
+                    tempo_disponivel = 0.0
+                    if ids_dest: 
+                        ultima_v = max(viagens[idx][1] for idx in ids_dest)
+                        tempo_disponivel = solucao.chegada[k_dest][ultima_v][-1] 
+                    
+                    T_saida_min_disponivel = tempo_disponivel + dados.s[0]
+                    t_partida_nova_viagem = max(partida_ideal[cliente_a_mover-1], T_saida_min_disponivel)
+                    if viola_janela_local(t_partida_nova_viagem, 0, cliente_a_mover, 0, dados): continue
+                    
+                    rota_dest_nova = [0, cliente_a_mover, 0]
+                    novas_chegadas_dest = recalcular_chegadas_e_validar_rota(rota_dest_nova, t_partida_nova_viagem, dados)
 
+                    if novas_chegadas_dest is None: continue 
+                        
+                    delta_custo = delta_remocao + c[0, cliente_a_mover] + c[cliente_a_mover, 0]
+                    
+                    if delta_custo < -TOLERANCIA_CUSTO:
+                        
+                        # APLICAÇÃO DO MOVIMENTO (First Improvement)
+                        solucao.alterar_onibus(k_dest)
+                        aplicar_remocao(k_orig, v_orig, rota_orig_recortada, novas_chegadas_orig)
+                        
+                        # Uma busca por dicionário: setdefault cria o ônibus se ainda não existe
+                        rotas_dest = solucao.rota.setdefault(k_dest, {})
+                        nova_v_dest = len(rotas_dest) + 1
+                        rotas_dest[nova_v_dest] = rota_dest_nova
+                        solucao.chegada.setdefault(k_dest, {})[nova_v_dest] = novas_chegadas_dest
+                        
+                        # ATUALIZA O FX INCREMENTALMENTE
+                        solucao.fx += delta_custo
+                        remover_onibus_vazios()
+                        return solucao, True # Melhoria encontrada, retorna!
 
-    # Limpeza final de dicionários vazios (para segurança)
-    for k in list(solucao.rota.keys()):
-        for v in list(solucao.rota[k].keys()):
-            if len(solucao.rota[k][v]) <= 2:
-                del solucao.rota[k][v]
-                del solucao.chegada[k][v]
-        if not solucao.rota.get(k): 
-            if k in solucao.rota: del solucao.rota[k]
-            if k in solucao.chegada: del solucao.chegada[k]
+
+    # Limpeza final de viagens vazias (para segurança)
+    for k, v in viagens:
+        if len(solucao.rota[k][v]) <= 2:
+            remover_viagem(k, v)
+    remover_onibus_vazios()
                 
     return solucao, False
 
@@ -692,43 +1330,53 @@ def busca_local_relocate(solucao: Any, dados: Any, contador: Contador) -> Tuple[
 
 def busca_local_2opt(solucao: Any, dados: Any, contador: Contador) -> Tuple[Any, bool]:
     """
-    Tenta o 2-Opt (Inversão de arestas) intra-rota.
+    Tenta o 2-Opt (Inversão de arestas) intra-rota, com melhor melhoria.
+    O delta de cada (i, j) é O(1): as duas arestas de fronteira mais a diferença acumulada
+    de percorrer o trecho ao contrário (c não é simétrica). Só os movimentos com delta
+    negativo passam pela validação temporal, do melhor para o pior.
     """
-    chaves_k = list(solucao.rota.keys())
     TOLERANCIA_CUSTO = 1e-4
-
-    for k in chaves_k:
-        chaves_v = list(solucao.rota.get(k, {}).keys())
-        for v in chaves_v:
-            if v not in solucao.rota.get(k, {}): continue 
-            rota = solucao.rota[k][v]
-            t_partida = solucao.chegada[k][v][0]
-            
-            custo_orig = calcular_custo_rota(rota, dados)
-            
+    c = np.asarray(dados.c)
+    
+    movimentos = [] # (delta, k, v, i, j)
+    for k in solucao.rota:
+        for v, rota in solucao.rota[k].items():
             if len(rota) < 4: continue 
 
             for i in range(1, len(rota) - 2): 
+                ant, primeiro = rota[i-1], rota[i]
+                diferenca_inversao = 0.0 # soma de c[r[m+1]][r[m]] - c[r[m]][r[m+1]] para m em [i, j)
                 for j in range(i + 1, len(rota) - 1): 
-                    
-                    segmento_invertido = rota[i:j+1][::-1]
-                    nova_rota = rota[:i] + segmento_invertido + rota[j+1:]
-
-                    novas_chegadas = recalcular_chegadas_e_validar_rota(nova_rota, t_partida, dados)
-                    
-                    if novas_chegadas is None: continue
-                        
-                    custo_novo = calcular_custo_rota(nova_rota, dados)
-                    delta_custo = custo_novo - custo_orig
-                    
+                    diferenca_inversao += c[rota[j], rota[j-1]] - c[rota[j-1], rota[j]]
+                    ultimo, prox = rota[j], rota[j+1]
+                    delta_custo = (c[ant, ultimo] + c[primeiro, prox] - c[ant, primeiro] - c[ultimo, prox]
+                                   + diferenca_inversao)
                     if delta_custo < -TOLERANCIA_CUSTO:
-                        # Aplica o movimento (First Improvement)
-                        solucao.rota[k][v] = nova_rota
-                        solucao.chegada[k][v] = novas_chegadas
-                        # ATUALIZA O FX INCREMENTALMENTE
-                        solucao.fx += delta_custo
-                        
-                        return solucao, True # Melhoria encontrada, retorna!
+                        movimentos.append((delta_custo, k, v, i, j))
+    
+    movimentos.sort(key=lambda m: m[0])
+    for delta_custo, k, v, i, j in movimentos:
+        rota = solucao.rota[k][v]
+        chegadas = solucao.chegada[k][v]
+        
+        # Pré-teste O(1): rota[i-1] -> rota[j] -> rota[j-1] inicia o trecho invertido
+        if viola_janela_local(chegadas[i-1], rota[i-1], rota[j], rota[j-1], dados): continue
+        
+        # Validação sem montar a rota, já devolvendo as chegadas; a inversão (trecho como view)
+        # só é feita para o movimento aceito
+        r = np.asarray(rota, dtype=np.int32)
+        novas_chegadas = inversao_factivel(r, i, j, chegadas[0], dados)
+        if novas_chegadas is None: continue
+        nova_rota = np.concatenate((r[:i], r[i:j+1][::-1], r[j+1:]))
+        
+        # Aplica o melhor movimento factível
+        solucao.alterar_onibus(k)
+        solucao.rota[k][v] = nova_rota.tolist()
+        solucao.chegada[k][v] = novas_chegadas
+        # ATUALIZA O FX INCREMENTALMENTE
+        solucao.fx += delta_custo
+        
+        return solucao, True # Melhoria encontrada, retorna!
 
     return solucao, False
 
@@ -743,216 +1391,391 @@ def calcular_custo_marginal(rota: List[int], chegadas: List[float], dados: Dados
     marginais = []
     if len(rota) <= 2: return marginais # Rota [0, 0]
 
-    for i in range(1, len(rota) - 1):
-        cliente = rota[i]
-        no_anterior = rota[i-1]
-        no_proximo = rota[i+1]
-
-        # Custo da remoção = Custo das duas arestas removidas - Custo da nova aresta
-        custo_remocao = (dados.c[no_anterior][cliente] + dados.c[cliente][no_proximo]) - dados.c[no_anterior][no_proximo]
-        
-        marginais.append((cliente, i, custo_remocao)) 
-        
+    # Custo da remoção = Custo das duas arestas removidas - Custo da nova aresta (todos os clientes de uma vez)
+    r = np.asarray(rota)
+    anteriores, clientes, proximos = r[:-2], r[1:-1], r[2:]
+    custos_remocao = dados.c[anteriores, clientes] + dados.c[clientes, proximos] - dados.c[anteriores, proximos]
+    
+    marginais = list(zip(clientes.tolist(), range(1, len(rota) - 1), custos_remocao.tolist()))
     return marginais
 
-def ruina_reconstrucao(melhor_solucao_obj: Solucao, dados: Dados, fator_ruina: float, contador: Contador) -> Optional[Dict]:
+def calcular_limites_insercao(dados: Dados) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Limites por nó, independentes da posição de inserção (índice = nó, 0 = garagem):
+    menor tempo entre sair do nó anterior e chegar ao nó (min s[a] + T[a][cli]) e
+    menor tempo entre o início do serviço e a próxima chegada (s[cli] + min T[cli][b]).
+    """
+    T = np.array(dados.T, dtype=np.float64)
+    np.fill_diagonal(T, np.inf)
+    s = np.asarray(dados.s, dtype=np.float64)
+    return (s[:, None] + T).min(axis=0), s + T.min(axis=1)
+
+def calcular_custo_minimo_insercao(dados: Dados) -> np.ndarray:
+    """
+    Menor custo de entrada mais menor custo de saída de cada nó (índice = nó). Inserir cli em a -> b
+    custa c[a][cli] + c[cli][b] - c[a][b] >= custo_minimo[cli] - maior arco da viagem.
+    """
+    c = np.array(dados.c, dtype=np.float64)
+    np.fill_diagonal(c, np.inf)
+    return c.min(axis=0) + c.min(axis=1)
+
+def ruina_reconstrucao(melhor_solucao_obj: Solucao, dados: Dados, fator_ruina: float, contador: Contador,
+                       partida_ideal: Optional[np.ndarray] = None) -> Optional[Dict]:
     """
     Executa a perturbação de Ruína e Reconstrução (Worst Ruin + Greedy Reinsert).
     """
-    temp_solucao = copy.deepcopy(melhor_solucao_obj)
+    # As rotas só são substituídas (nunca alteradas no lugar): basta copiar os dicts
+    temp_solucao = clonar_solucao(melhor_solucao_obj, copiar_listas=False)
     
     # 1. RUÍNA: Seleção dos Piores Clientes (Worst Ruin)
-    lista_custos_marginais = []
+    # Arrays paralelos (cliente, custo de remoção) em vez de uma lista de dicts
+    clientes_marginais, custos_marginais = [], []
     
-    for k in temp_solucao.rota.keys():
-        for v in temp_solucao.rota[k].keys():
-            rota_data = temp_solucao.rota[k][v]
-            chegadas_data = temp_solucao.chegada[k][v]
+    for k, rotas_k in temp_solucao.rota.items():
+        chegadas_k = temp_solucao.chegada[k]
+        for v, rota_data in rotas_k.items():
+            chegadas_data = chegadas_k[v]
             if len(rota_data) > 2:
-                marginais = calcular_custo_marginal(rota_data, chegadas_data, dados)
-                for cliente, pos, custo in marginais:
-                    lista_custos_marginais.append({"cliente": cliente, "k": k, "v": v, "pos": pos, "custo": custo})
+                for cliente, pos, custo in calcular_custo_marginal(rota_data, chegadas_data, dados):
+                    clientes_marginais.append(cliente)
+                    custos_marginais.append(custo)
             
-    if not lista_custos_marginais: return None
+    if not clientes_marginais: return None
 
-    # Ordena pelo custo de remoção (decrescente) e seleciona os piores
-    lista_custos_marginais.sort(key=lambda x: x['custo'], reverse=True)
-    
-    n_clientes_remover = round(fator_ruina * dados.n)
-    clientes_a_remover_raw = lista_custos_marginais[:min(n_clientes_remover, len(lista_custos_marginais))]
-    clientes_orfãos = set(c['cliente'] for c in clientes_a_remover_raw)
+    # Seleção parcial dos piores (maior custo de remoção) em O(n), sem ordenar tudo
+    n_clientes_remover = min(round(fator_ruina * dados.n), len(clientes_marginais))
+    clientes_orfãos = set()
+    if n_clientes_remover > 0:
+        clientes_marginais = np.array(clientes_marginais)
+        idx_piores = np.argpartition(np.array(custos_marginais), -n_clientes_remover)[-n_clientes_remover:]
+        clientes_orfãos = set(clientes_marginais[idx_piores].tolist())
 
     # 2. FASE DE REMOÇÃO E CONSOLIDAÇÃO (Fechamento/ajuste das rotas)
-    for k in list(temp_solucao.rota.keys()):
-        for v in list(temp_solucao.rota[k].keys()):
-            rota_original = temp_solucao.rota[k][v]
-            
+    # O custo de cada viagem sai da mesma passada que valida as chegadas e fica em cache:
+    # só muda quando a viagem recebe um cliente
+    custo_viagem = {}
+    descartadas = [] # (k, v) removidas depois do laço: só elas mudam o tamanho dos dicts
+    for k, rotas_k in temp_solucao.rota.items():
+        chegadas_k = temp_solucao.chegada[k]
+        for v, rota_original in rotas_k.items():
             nova_rota_raw = [n for n in rota_original if n not in clientes_orfãos]
             
             if len(nova_rota_raw) > 2:
-                t_partida = temp_solucao.chegada[k][v][0]
-                novas_chegadas_kv = recalcular_chegadas_e_validar_rota(nova_rota_raw, t_partida, dados)
+                t_partida = chegadas_k[v][0]
+                resultado = recalcular_chegadas_e_custo(nova_rota_raw, t_partida, dados)
                 
-                if novas_chegadas_kv is not None:
-                    temp_solucao.rota[k][v] = nova_rota_raw
-                    temp_solucao.chegada[k][v] = novas_chegadas_kv
+                if resultado is not None:
+                    rotas_k[v] = nova_rota_raw
+                    chegadas_k[v], custo_viagem[(k, v)] = resultado
                 else:
                     clientes_orfãos.update([n for n in rota_original if n not in nova_rota_raw and n != 0])
-                    del temp_solucao.rota[k][v]
-                    del temp_solucao.chegada[k][v]
-            elif len(nova_rota_raw) <= 2:
-                del temp_solucao.rota[k][v]
-                del temp_solucao.chegada[k][v]
-
-    # Recalcula FX da solução parcial (NÃO AVALIA, apenas calcula o FX para ser usado como base)
-    temp_solucao.fx = 0.0
-    for k in temp_solucao.rota.keys():
-        for v in temp_solucao.rota[k].keys():
-            temp_solucao.fx += calcular_custo_rota(temp_solucao.rota[k][v], dados)
+                    descartadas.append((k, v))
+            else:
+                descartadas.append((k, v))
+    for k, v in descartadas:
+        del temp_solucao.rota[k][v]
+        del temp_solucao.chegada[k][v]
+
+    # FX da solução parcial (NÃO AVALIA, apenas calcula o FX para ser usado como base)
+    temp_solucao.fx = sum(custo_viagem.values())
+    c = np.asarray(dados.c)
+    # Rotas em int32 (4 bytes/nó) para montar e validar as candidatas sem converter listas a cada teste
+    ROTA_VAZIA = np.zeros(2, dtype=np.int32)
+    rota_arr = {(k, v): np.asarray(rota, dtype=np.int32)
+                for k in temp_solucao.rota for v, rota in temp_solucao.rota[k].items()}
+    # Limites por viagem (estilo VROOM): descarta a viagem inteira antes de testar posições.
+    # Chegadas não decrescem, então a partida da viagem limita qualquer posição:
+    # partida + chegada_minima > l[cli] estoura a janela, e + saida_minima - partida > Tmax estoura a duração
+    chegada_minima, saida_minima = calcular_limites_insercao(dados)
+
+    if partida_ideal is None: partida_ideal = calcular_partida_ideal(dados)
+    # Branch-and-bound da reinserção: limite inferior do delta por (cliente, viagem)
+    custo_minimo = calcular_custo_minimo_insercao(dados)
+    maior_arco = {kv: float(c[r[:-1], r[1:]].max()) for kv, r in rota_arr.items()}
 
     # 3. RECONSTRUÇÃO: Inserção Gulosa (Greedy Reinsert - Best Cost)
     clientes_a_inserir = list(clientes_orfãos)
     random.shuffle(clientes_a_inserir) 
     
     for cliente in clientes_a_inserir:
-        melhor_delta = float('inf')
-        melhor_slot = None
-        
         # Procura o melhor slot em ROTAS EXISTENTES
+        tarefas = []
+        partida_maxima = dados.l[cliente-1] + TOLERANCIA - chegada_minima[cliente]
+        partida_minima = dados.e[cliente-1] + saida_minima[cliente] - dados.Tmax - TOLERANCIA
         for k in range(1, dados.K + 1):
-            for v in temp_solucao.rota.get(k, {}).keys():
-                rota_base = temp_solucao.rota[k][v]
-                t_partida = temp_solucao.chegada[k][v][0]
-                custo_base = calcular_custo_rota(rota_base, dados)
-                
+            rotas_k = temp_solucao.rota.get(k)
+            if not rotas_k: continue
+            chegadas_k = temp_solucao.chegada[k]
+            for v in rotas_k:
+                rota_base = rota_arr[(k, v)]
                 # RECONSTRUÇÃO AGORA COM AMOSTRAGEM RÁPIDA (AMOSTRA_J_RNR = 3)
                 max_posicoes = len(rota_base)
-                indices_j = list(range(1, max_posicoes))
+                indices_j = range(1, max_posicoes)
                 
                 # APLICAÇÃO DA AMOSTRAGEM AQUI para acelerar: 
                 # Se a rota é grande, amostra AMOSTRA_J_RNR posições (ou todas se for pequena)
+                # direto do range, sem materializar a lista de posições
                 if max_posicoes > AMOSTRA_J_RNR + 1:
                     indices_j = random.sample(indices_j, AMOSTRA_J_RNR)
+                # Os testes vêm depois do sorteio para não alterar a sequência aleatória
+                t_partida = chegadas_k[v][0]
+                if t_partida > partida_maxima or t_partida < partida_minima: continue
+                tarefas.append((custo_minimo[cliente] - maior_arco[(k, v)], k, v, rota_base, t_partida, indices_j))
+        # Melhor limite primeiro (ordenação estável: empates mantêm a ordem das viagens)
+        tarefas.sort(key=lambda tarefa: tarefa[0])
+        
+        melhor_delta, melhor_slot = float('inf'), None
+        for limite, k, v, rota_base, t_partida, indices_j in tarefas:
+            # Tarefas em ordem crescente de limite: daqui em diante nenhuma viagem melhora o slot atual
+            if limite >= melhor_delta: break
+            for j in indices_j: # Itera nas posições amostradas
+                # Delta de inserção: a -> b vira a -> cliente -> b
+                a, b = rota_base[j-1], rota_base[j]
+                delta = c[a, cliente] + c[cliente, b] - c[a, b]
                 
-                for j in indices_j: # Itera nas posições amostradas
-                    rota_candidata = rota_base[:j] + [cliente] + rota_base[j:]
-                    chegadas_candidatas = recalcular_chegadas_e_validar_rota(rota_candidata, t_partida, dados)
-                    
-                    if chegadas_candidatas is not None:
-                        custo_novo = calcular_custo_rota(rota_candidata, dados)
-                        delta = custo_novo - custo_base
-                        
-                        if delta < melhor_delta:
-                            melhor_delta = delta
-                            melhor_slot = (k, v, rota_candidata, chegadas_candidatas)
-            
+                # Só valida (sem montar a candidata) o que melhoraria o slot atual
+                if delta < melhor_delta and insercao_factivel(rota_base, j, cliente, t_partida, dados):
+                    melhor_delta = delta
+                    melhor_slot = (k, v, rota_base, t_partida, j)
                         
         # Procura o melhor slot em NOVA VIAGEM
         for k in range(1, dados.K + 1):
-            if len(temp_solucao.rota.get(k, {})) < dados.r:
-                nova_v = len(temp_solucao.rota.get(k, {})) + 1
+            # Uma única busca por ônibus; None indica ônibus ainda sem viagens
+            rotas_k = temp_solucao.rota.get(k)
+            n_viagens = len(rotas_k) if rotas_k else 0
+            if n_viagens < dados.r:
+                nova_v = n_viagens + 1
                 
                 tempo_retorno_ultimo = 0.0
-                if temp_solucao.rota.get(k): 
-                    ultima_v = max(temp_solucao.rota[k].keys())
+                if n_viagens: 
+                    ultima_v = max(rotas_k)
                     tempo_retorno_ultimo = temp_solucao.chegada[k][ultima_v][-1] 
                 
                 T_saida_min_disponivel = tempo_retorno_ultimo + dados.s[0]
-                T_partida_ideal_janela = dados.e[cliente-1] - dados.s[0] - dados.T[0][cliente] 
-                t_partida_nova_viagem = max(T_partida_ideal_janela, T_saida_min_disponivel)
+                t_partida_nova_viagem = max(partida_ideal[cliente-1], T_saida_min_disponivel)
                 
-                rota_candidata = [0, cliente, 0]
-                chegadas_candidatas = recalcular_chegadas_e_validar_rota(rota_candidata, t_partida_nova_viagem, dados)
+                delta = c[0, cliente] + c[cliente, 0] # Delta é o custo total da nova rota
                 
-                if chegadas_candidatas is not None:
-                    custo_novo = calcular_custo_rota(rota_candidata, dados)
-                    delta = custo_novo # Delta é o custo total da nova rota
-                    
-                    if delta < melhor_delta:
-                        melhor_delta = delta
-                        melhor_slot = (k, nova_v, rota_candidata, chegadas_candidatas)
+                # Nova viagem = inserir o cliente na posição 1 de [0, 0]
+                if delta < melhor_delta and insercao_factivel(ROTA_VAZIA, 1, cliente, t_partida_nova_viagem, dados):
+                    melhor_delta = delta
+                    melhor_slot = (k, nova_v, ROTA_VAZIA, t_partida_nova_viagem, 1)
         
-        # Aplica o melhor slot encontrado
+        # Monta e aplica só o melhor slot encontrado
         if melhor_slot:
-            k, v, nova_rota, novas_chegadas = melhor_slot
+            k, v, rota_base, t_partida, j = melhor_slot
+            nova_rota = inserir_na_rota(rota_base, j, cliente)
+            novas_chegadas = recalcular_chegadas_e_validar_rota(nova_rota, t_partida, dados)
             
-            if v in temp_solucao.rota.get(k, {}):
-                custo_antigo_base = calcular_custo_rota(temp_solucao.rota[k][v], dados)
-                temp_solucao.fx -= custo_antigo_base
-                
+            custo_viagem[(k, v)] = custo_viagem.get((k, v), 0.0) + melhor_delta
             temp_solucao.fx += melhor_delta 
-            temp_solucao.rota.setdefault(k, {})[v] = nova_rota
+            rota_arr[(k, v)] = nova_rota
+            maior_arco[(k, v)] = float(c[nova_rota[:-1], nova_rota[1:]].max())
+            temp_solucao.rota.setdefault(k, {})[v] = nova_rota.tolist()
             temp_solucao.chegada.setdefault(k, {})[v] = novas_chegadas
     
     # A solução deve ser avaliada globalmente na função 'resolva' para contar 1 avaliação.
-    solucao_dict = {
-        "fx": temp_solucao.fx, 
-        "onibus": {
-            str(k): {
-                f"viagem_{v}": {"rota": r, "chegada": c}
-                for v, (r, c) in zip(temp_solucao.rota[k].keys(), zip(temp_solucao.rota[k].values(), temp_solucao.chegada[k].values()))
-            }
-            for k in temp_solucao.rota.keys() if temp_solucao.rota[k] 
-        }
-    }
-    return solucao_dict
+    return solucao_para_dict(temp_solucao)
 
 # =============================================================================
 # 6. FUNÇÃO OFICIAL DE ENTREGA (`resolva`) - Aplicando ACO + VND (Multi-Colônia)
 # =============================================================================
 
-def inicializar_colonia(dados, perfil):
-    """Gera parâmetros e feromônio para uma colônia com um perfil específico."""
+# Fatores heurísticos de construção (L e E)
+FATOR_L_SEGURO = 6.0 # Parâmetro de segurança que evita deadlocks (uso no Ouro)
+FATOR_E_SEGURO = 1.0 
+
+FATOR_L_EXPL = 2.0 # Parâmetro mais arriscado para forçar deadlock (uso no Explorador e Guloso)
+FATOR_E_EXPL = 0.5 
+
+class ParametrosColonia(NamedTuple):
+    """Parâmetros de uma colônia (imutáveis, acesso por atributo)."""
+    alpha: float
+    beta: float
+    rho: float
+    Q: float
+    fator_elite: float
+    nome: str
+    FATOR_L: float
+    FATOR_E: float
+
+# Colônia de Ouro (Parâmetros que encontraram 129k - Seguro): fixa, criada uma vez
+PARAMETROS_OURO = ParametrosColonia(alpha=2.44, beta=3.66, rho=0.111, Q=1000.0, fator_elite=6.0,
+                                    nome='Ouro_129k', FATOR_L=FATOR_L_SEGURO, FATOR_E=FATOR_E_SEGURO)
+
+def inicializar_colonia(dados, perfil) -> ParametrosColonia:
+    """Gera os parâmetros de uma colônia com um perfil específico (o mapa de feromônio vem de 'resolva')."""
+    if perfil == 1: # Explorador (ACO Clássico - Arriscado)
+        return ParametrosColonia(alpha=round(random.uniform(2.5, 4.0), 2), 
+                                 beta=round(random.uniform(1.0, 2.0), 2), 
+                                 rho=round(random.uniform(0.02, 0.05), 3),
+                                 Q=2000.0, fator_elite=6.0, nome='Explorador',
+                                 FATOR_L=FATOR_L_EXPL, FATOR_E=FATOR_E_EXPL)
+    if perfil == 2: # Guloso (Heurístico Forte - Arriscado)
+        return ParametrosColonia(alpha=round(random.uniform(1.0, 2.0), 2), 
+                                 beta=round(random.uniform(4.0, 6.0), 2), 
+                                 rho=round(random.uniform(0.05, 0.1), 3),
+                                 Q=1000.0, fator_elite=4.0, nome='Guloso',
+                                 FATOR_L=FATOR_L_EXPL, FATOR_E=FATOR_E_EXPL)
+    if perfil == 3:
+        return PARAMETROS_OURO
+    # Fallback (Seguro)
+    return ParametrosColonia(alpha=round(random.uniform(1.8, 3.0), 2), 
+                             beta=round(random.uniform(2.5, 4.5), 2), 
+                             rho=round(random.uniform(0.1, 0.15), 3), 
+                             Q=1500.0, fator_elite=5.0, nome='Estável_Fallback',
+                             FATOR_L=FATOR_L_SEGURO, FATOR_E=FATOR_E_SEGURO)
+
+def iterar_colonia(dados: Dados, perfil_id: int, feromonio: np.ndarray, melhor_solucao: Solucao,
+                   melhor_solucao_dict: Optional[Dict], melhor_custo: float, primeira_iteracao: bool,
+                   contador: Contador, vizinhos: List[set], partida_ideal: np.ndarray) -> Tuple[np.ndarray, Optional[Solucao], float, str]:
+    """
+    Uma iteração de uma colônia: geração (ACO ou R&R), VND e reforço do feromônio local.
+    Só lê a melhor global; retorna (mapa, solução polida factível ou None, custo construído, nome).
+    """
+    # Re-inicializa os parâmetros a cada ciclo (exceto o mapa de feromônio)
+    params = inicializar_colonia(dados, perfil_id) 
+
+    alpha, beta, rho = params.alpha, params.beta, params.rho
+    Q, fator_elite = params.Q, params.fator_elite
+    nome_colonia = params.nome
     
-    # Fatores heurísticos de construção (L e E)
-    FATOR_L_SEGURO = 6.0 # Parâmetro de segurança que evita deadlocks (uso no Ouro)
-    FATOR_E_SEGURO = 1.0 
+    # Fatores de construção específicos da colônia
+    FATOR_L_COLONIA = params.FATOR_L
+    FATOR_E_COLONIA = params.FATOR_E
     
-    FATOR_L_EXPL = 2.0 # Parâmetro mais arriscado para forçar deadlock (uso no Explorador e Guloso)
-    FATOR_E_EXPL = 0.5 
-
-    params = {}
-    if perfil == 1: # Explorador (ACO Clássico - Arriscado)
-        params = {'alpha': round(random.uniform(2.5, 4.0), 2), 
-                  'beta': round(random.uniform(1.0, 2.0), 2), 
-                  'rho': round(random.uniform(0.02, 0.05), 3),
-                  'Q': 2000.0, 'fator_elite': 6.0, 'nome': 'Explorador',
-                  'FATOR_L': FATOR_L_EXPL, 'FATOR_E': FATOR_E_EXPL}
-    elif perfil == 2: # Guloso (Heurístico Forte - Arriscado)
-        params = {'alpha': round(random.uniform(1.0, 2.0), 2), 
-                  'beta': round(random.uniform(4.0, 6.0), 2), 
-                  'rho': round(random.uniform(0.05, 0.1), 3),
-                  'Q': 1000.0, 'fator_elite': 4.0, 'nome': 'Guloso',
-                  'FATOR_L': FATOR_L_EXPL, 'FATOR_E': FATOR_E_EXPL}
-    elif perfil == 3: # Colônia de Ouro (Parâmetros que encontraram 129k - Seguro)
-        params = {'alpha': 2.44, 
-                  'beta': 3.66,  
-                  'rho': 0.111,  
-                  'Q': 1000.0, 'fator_elite': 6.0, 'nome': 'Ouro_129k',
-                  'FATOR_L': FATOR_L_SEGURO, 'FATOR_E': FATOR_E_SEGURO}
-    else: 
-        # Fallback (Seguro)
-        params = {'alpha': round(random.uniform(1.8, 3.0), 2), 
-                  'beta': round(random.uniform(2.5, 4.5), 2), 
-                  'rho': round(random.uniform(0.1, 0.15), 3), 
-                  'Q': 1500.0, 'fator_elite': 5.0, 'nome': 'Estável_Fallback',
-                  'FATOR_L': FATOR_L_SEGURO, 'FATOR_E': FATOR_E_SEGURO}
-
-    # feromonio é inicializado apenas se necessário (não usado aqui, mapa é passado)
-    feromonio = np.full((dados.n + 1, dados.n + 1), 1e-4)
-    return params, feromonio
+    # Vizinhanças do RVND: K=1 RELOCATE (Busca com 3 Slots) e K=2 2-OPT
+    vizinhancas = [
+        lambda sol: busca_local_relocate(sol, dados, contador, vizinhos, partida_ideal),
+        lambda sol: busca_local_2opt(sol, dados, contador),
+    ]
+    
+    dict_solucao_candidata = None
+    
+    # 1. FASE DE GERAÇÃO/PERTURBAÇÃO (ACO ou R&R)
+    
+    # ACO (Exploração)
+    if primeira_iteracao or melhor_solucao_dict is None or random.random() < 0.2: 
+        dict_solucao_candidata, _ = construir_solucao_global_aco(
+            dados, feromonio, alpha, beta, 
+            FATOR_L_COLONIA, FATOR_E_COLONIA, # Usa Fatores Arriscados/Seguros
+            clientes_iniciais=None
+        )
+    # R&R (Diversificação)
+    else:
+        if melhor_solucao.factivel(dados): 
+             dict_solucao_candidata = ruina_reconstrucao(melhor_solucao, dados, FATOR_RUINA, contador, partida_ideal)
+        else:
+             # Se a melhor global for inviável (não deve acontecer), refaz ACO seguro.
+             params_seguros = inicializar_colonia(dados, 3) # Parâmetros do Ouro (Seguros)
+             dict_solucao_candidata, _ = construir_solucao_global_aco(
+                dados, feromonio, alpha, beta, 
+                params_seguros.FATOR_L, params_seguros.FATOR_E,
+                clientes_iniciais=None
+            )
+    
+    if dict_solucao_candidata is None:
+        # Deadlock Real: Conta como falha, mas força a próxima iteração a aprender.
+        if melhor_solucao_dict:
+            feromonio = atualizar_feromonio(feromonio, melhor_solucao.arcos_array(), melhor_custo, rho, Q, dados, fator_elite)
+        return feromonio, None, float('inf'), nome_colonia
+    
+    # 2. INTENSIFICAÇÃO (VND: Relocate + 2-Opt)
+    # (1ª Avaliação contada em dict_para_solucao)
+    solucao_obj = dict_para_solucao(dict_solucao_candidata, dados, contador)
+    
+    if contador.count > contador.limite: return feromonio, None, float('inf'), nome_colonia
+    
+    custo_construido = float('inf')
+    if solucao_obj and solucao_obj.factivel(dados, verbose=False): 
+        
+        custo_construido = solucao_obj.fx # Custo antes do VND
+        solucao_polida = solucao_obj # A construída não é reutilizada: o VND trabalha nela mesma
+        
+        # RVND: Aplica os operadores em ordem aleatória, sorteada de novo a cada melhoria
+        # (Custo de avaliações é ZERO aqui). Termina quando nenhuma vizinhança melhora.
+        while True:
+            melhorou_iter = False
+            # Rollback por registro de desfazer: os operadores guardam só os ônibus que alteram
+            # (sem snapshot da solução inteira a cada passada)
+            solucao_polida.iniciar_desfazer()
+            random.shuffle(vizinhancas)
+
+            for busca in vizinhancas:
+                solucao_polida, melhorou_iter = busca(solucao_polida)
+                if melhorou_iter: break
+
+            if not melhorou_iter:
+                break
+            if not solucao_polida.factivel(dados, verbose=False): solucao_polida.desfazer(); break
+        solucao_polida.encerrar_desfazer()
+        
+        # 3. REFORÇO (a melhor global é atualizada por quem chamou)
+        
+        if solucao_polida.factivel(dados, verbose=False):
+            # Reforça o feromônio da COLÔNIA LOCAL com a sua solução polida (reutiliza o FX)
+            feromonio = atualizar_feromonio(feromonio, solucao_polida.arcos_array(), solucao_polida.fx, rho, Q, dados, fator_elite)
+            return feromonio, solucao_polida, custo_construido, nome_colonia
+    
+    # Se a construída ou a polida for inviável, utiliza a melhor global para reforçar o feromônio local.
+    if melhor_solucao_dict:
+        feromonio = atualizar_feromonio(feromonio, melhor_solucao.arcos_array(), melhor_custo, rho, Q, dados, fator_elite)
+    return feromonio, None, custo_construido, nome_colonia
+
+def trocar_elite(colonias):
+    """Mistura (no lugar) o mapa da colônia com a melhor solução polida nos mapas das demais."""
+    elite = min(colonias, key=lambda colonia_data: colonia_data['melhor_custo'])
+    if elite['melhor_custo'] == float('inf'): return
+    mapa_elite = elite['mapa']
+    for colonia_data in colonias:
+        if colonia_data is elite: continue
+        # tau - tau_elite, escalado e somado de volta: sem arrays temporários
+        mapa = colonia_data['mapa']
+        mapa -= mapa_elite
+        mapa *= np.float32(1.0 - PESO_ELITE)
+        mapa += mapa_elite
+
+# Estado de cada processo de colônia (preenchido uma vez pelo initializer, sem re-serializar dados)
+_ESTADO_PROCESSO_COLONIA = {}
+
+def _inicializar_processo_colonia(dados, vizinhos, partida_ideal, n_threads):
+    _ESTADO_PROCESSO_COLONIA.update(dados=dados, vizinhos=vizinhos, partida_ideal=partida_ideal)
+    # Núcleos divididos entre as colônias: o prange de cada processo não disputa CPU com os outros
+    if NUMBA_DISPONIVEL:
+        set_num_threads(max(1, min(n_threads, numba_config.NUMBA_NUM_THREADS)))
+
+def _iterar_colonia_processo(tarefa):
+    """Executa iterar_colonia em um processo filho, com semente e contador próprios."""
+    perfil_id, feromonio, melhor_solucao, melhor_solucao_dict, melhor_custo, primeira_iteracao, limite, semente = tarefa
+    random.seed(semente)
+    np.random.seed(semente)
+    contador = Contador()
+    contador.set_limite(limite)
+    estado = _ESTADO_PROCESSO_COLONIA
+    resultado = iterar_colonia(estado['dados'], perfil_id, feromonio, melhor_solucao, melhor_solucao_dict, melhor_custo,
+                               primeira_iteracao, contador, estado['vizinhos'], estado['partida_ideal'])
+    return resultado, contador.count
 
 def resolva(dados: Dados, numero_avaliacoes: int) -> Solucao:
     
+    _FO_CACHE.clear()
+    vizinhos = calcular_vizinhos_proximos(dados) # Poda do relocate (constante da instância)
+    partida_ideal = calcular_partida_ideal(dados) # Partida de nova viagem por cliente (relocate e R&R)
+    
     # Inicializa os Mapas de Feromônio (persistem entre iterações)
-    colonia1_mapa = np.full((dados.n + 1, dados.n + 1), 1e-4)
-    colonia2_mapa = np.full((dados.n + 1, dados.n + 1), 1e-4)
-    colonia3_mapa = np.full((dados.n + 1, dados.n + 1), 1e-4)
+    # float32 contíguo (row-major): metade da banda nas leituras por linha tau[i, :]
+    # O bloco é alocado uma vez por instância e só reinicializado nas chamadas seguintes
+    mapas = _MAPAS_FEROMONIO.get(dados.n)
+    if mapas is None:
+        _MAPAS_FEROMONIO.clear() # Guarda só a instância atual
+        mapas = _MAPAS_FEROMONIO[dados.n] = np.empty((3, dados.n + 1, dados.n + 1), dtype=np.float32)
+    mapas.fill(1e-4)
+    colonia1_mapa, colonia2_mapa, colonia3_mapa = mapas
     
     colonias = [
-        {'id': 1, 'nome': 'Explorador', 'mapa': colonia1_mapa},
-        {'id': 2, 'nome': 'Guloso', 'mapa': colonia2_mapa},
-        {'id': 3, 'nome': 'Ouro_129k', 'mapa': colonia3_mapa}
+        {'id': 1, 'nome': 'Explorador', 'mapa': colonia1_mapa, 'melhor_custo': float('inf')},
+        {'id': 2, 'nome': 'Guloso', 'mapa': colonia2_mapa, 'melhor_custo': float('inf')},
+        {'id': 3, 'nome': 'Ouro_129k', 'mapa': colonia3_mapa, 'melhor_custo': float('inf')}
     ]
 
     melhor_solucao = Solucao()
@@ -971,151 +1794,67 @@ def resolva(dados: Dados, numero_avaliacoes: int) -> Solucao:
     print(f"Fator Ruína: {FATOR_RUINA*100:.0f}% (Agressivo) | R&R Reconstrução: {AMOSTRA_J_RNR} slots (Rápida)")
     print(f"Limite de Avaliações (FX): {numero_avaliacoes}. Iniciando...")
     
+    def registrar(colonia_data, resultado):
+        """Guarda o mapa da colônia e atualiza o rastreamento e a melhor global (sempre no processo principal)."""
+        nonlocal melhor_solucao, melhor_solucao_dict, melhor_custo
+        colonia_data['mapa'], solucao_polida, custo_construido, nome_colonia = resultado
+        if solucao_polida is None: return
+        
+        # RASTREAMENTO DE SOLUÇÕES ÚNICAS
+        solucoes_unicas_hash.add(hash(solucao_polida.as_hashable()))
+        custo_polido = solucao_polida.fx # Reutiliza o FX incremental
+        colonia_data['melhor_custo'] = min(colonia_data['melhor_custo'], custo_polido)
+        
+        if custo_polido < melhor_custo:
+            melhor_custo = custo_polido
+            melhor_solucao = solucao_polida
+            
+            melhor_solucao_dict = solucao_para_dict(melhor_solucao)
+            
+            # NOVO LOG DETALHADO
+            gain_vnd = custo_construido - custo_polido
+            print(f"Nova melhor solução GLOBAL [{nome_colonia}] em Avaliação {contador.count}: Custo = {melhor_custo:.2f}")
+            print(f"   -> Custo Construído (ACO/R&R): {custo_construido:.2f} | Ganho VND: {gain_vnd:.2f}")
+    
+    # Colônias em processos separados (uma por núcleo): a melhor global é trocada uma vez por iteração
+    executor = None
+    if N_PROCESSOS_COLONIAS > 1:
+        # spawn: um fork depois do pool de threads do Numba (prange) pode travar o processo filho
+        n_processos = min(N_PROCESSOS_COLONIAS, len(colonias))
+        executor = ProcessPoolExecutor(max_workers=n_processos,
+                                       mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_inicializar_processo_colonia,
+                                       initargs=(dados, vizinhos, partida_ideal, (os.cpu_count() or 1) // n_processos))
+    
     # ILS/ACO Loop
     iteracao_global = 0
     while contador.count < numero_avaliacoes:
         iteracao_global += 1
         
-        # Roda o ciclo em todas as 3 colônias em sequência
-        for idx, colonia_data in enumerate(colonias):
-            
-            if contador.count >= numero_avaliacoes: break
-            
-            # --- OTIMIZAÇÃO DE VARIABILIDADE (Se Colônia Exploratória/Guloso) ---
-            perfil_id = colonia_data['id']
-            # Re-inicializa os parâmetros a cada ciclo (exceto o mapa de feromônio)
-            params, _ = inicializar_colonia(dados, perfil_id) 
-            feromonio = colonia_data['mapa'] # Obtém o mapa de feromônio atual
-
-            alpha, beta, rho = params['alpha'], params['beta'], params['rho']
-            Q, fator_elite = params['Q'], params['fator_elite']
-            nome_colonia = params['nome']
-            
-            # Fatores de construção específicos da colônia
-            FATOR_L_COLONIA = params['FATOR_L']
-            FATOR_E_COLONIA = params['FATOR_E']
-            
-            dict_solucao_candidata = None
-            tag_origem = "ACO"
-            
-            # 1. FASE DE GERAÇÃO/PERTURBAÇÃO (ACO ou R&R)
-            
-            # ACO (Exploração)
-            if iteracao_global == 1 or melhor_solucao_dict is None or random.random() < 0.2: 
-                dict_solucao_candidata, _ = construir_solucao_global_aco(
-                    dados, feromonio, alpha, beta, 
-                    FATOR_L_COLONIA, FATOR_E_COLONIA, # Usa Fatores Arriscados/Seguros
-                    clientes_iniciais=None
-                )
-            # R&R (Diversificação)
-            else:
-                tag_origem = "R&R"
-                if melhor_solucao.factivel(dados): 
-                     dict_solucao_candidata = ruina_reconstrucao(melhor_solucao, dados, FATOR_RUINA, contador)
-                else:
-                     # Se a melhor global for inviável (não deve acontecer), refaz ACO seguro.
-                     params_seguros = inicializar_colonia(dados, 3)[0] # Parâmetros do Ouro (Seguros)
-                     dict_solucao_candidata, _ = construir_solucao_global_aco(
-                        dados, feromonio, alpha, beta, 
-                        params_seguros['FATOR_L'], params_seguros['FATOR_E'],
-                        clientes_iniciais=None
-                    )
-            
-            if dict_solucao_candidata is None:
-                # Deadlock Real: Conta como falha, mas força a próxima iteração a aprender.
-                if melhor_solucao_dict:
-                    # CORRIGIDO: usa atualizar_feromonio
-                    colonia_data['mapa'] = atualizar_feromonio(feromonio, melhor_solucao_dict, melhor_custo, rho, Q, dados, fator_elite)
-                continue 
-            
-            # 2. INTENSIFICAÇÃO (VND: Relocate + 2-Opt)
-            # (1ª Avaliação contada em dict_para_solucao)
-            solucao_obj = dict_para_solucao(dict_solucao_candidata, dados, contador)
-            
-            if contador.count > numero_avaliacoes: break
-                
-            if solucao_obj and solucao_obj.factivel(dados, verbose=False): 
-                
-                custo_construido = solucao_obj.fx # Custo antes do VND
-                solucao_polida = copy.deepcopy(solucao_obj)
-                
-                # VND: Aplica os operadores (Custo de avaliações é ZERO aqui)
-                while True:
-                    melhorou_iter = False
-                    temp_solucao = copy.deepcopy(solucao_polida)
-
-                    # K=1: RELOCATE (Busca com 3 Slots)
-                    solucao_polida, melhorou_relocate = busca_local_relocate(solucao_polida, dados, contador)
-                    if melhorou_relocate:
-                        melhorou_iter = True
-                        if not solucao_polida.factivel(dados, verbose=False): solucao_polida = temp_solucao; break
-                        continue 
-                    
-                    # K=2: 2-OPT 
-                    solucao_polida, melhorou_2opt = busca_local_2opt(solucao_polida, dados, contador)
-                    if melhorou_2opt:
-                        melhorou_iter = True
-                        if not solucao_polida.factivel(dados, verbose=False): solucao_polida = temp_solucao; break
-                        continue 
-
-                    if not melhorou_iter:
-                        break
+        if executor is not None:
+            # Cada colônia gasta no máximo 1 avaliação por iteração
+            ativas = colonias[:numero_avaliacoes - contador.count]
+            tarefas = [(colonia_data['id'], colonia_data['mapa'], melhor_solucao, melhor_solucao_dict, melhor_custo,
+                        iteracao_global == 1, numero_avaliacoes - contador.count, random.getrandbits(32))
+                       for colonia_data in ativas]
+            for colonia_data, (resultado, avaliacoes) in zip(ativas, executor.map(_iterar_colonia_processo, tarefas)):
+                contador.count += avaliacoes
+                registrar(colonia_data, resultado)
+        else:
+            # Roda o ciclo em todas as 3 colônias em sequência
+            for colonia_data in colonias:
                 
-                # 3. ATUALIZAÇÃO, RASTREAMENTO E REFORÇO
+                if contador.count >= numero_avaliacoes: break
                 
-                if solucao_polida.factivel(dados, verbose=False):
-                    custo_polido = solucao_polida.fx # Reutiliza o FX incremental
-                    
-                    # RASTREAMENTO DE SOLUÇÕES ÚNICAS
-                    polida_hash = solucao_to_hash(solucao_polida)
-                    solucoes_unicas_hash.add(polida_hash)
-
-                    if custo_polido < melhor_custo:
-                        melhor_custo = custo_polido
-                        melhor_solucao = solucao_polida
-                        
-                        melhor_solucao_dict = {
-                            "fx": melhor_solucao.fx, 
-                            "onibus": {
-                                str(k): {
-                                    f"viagem_{v}": {"rota": r, "chegada": c}
-                                    for v, (r, c) in zip(melhor_solucao.rota[k].keys(), zip(melhor_solucao.rota[k].values(), melhor_solucao.chegada[k].values()))
-                                }
-                                for k in melhor_solucao.rota.keys() if melhor_solucao.rota[k] 
-                            }
-                        }
-                        
-                        # NOVO LOG DETALHADO
-                        gain_vnd = custo_construido - custo_polido
-                        print(f"Nova melhor solução GLOBAL [{nome_colonia}] em Avaliação {contador.count}: Custo = {melhor_custo:.2f}")
-                        print(f"   -> Custo Construído (ACO/R&R): {custo_construido:.2f} | Ganho VND: {gain_vnd:.2f}")
-                    
-                    # Prepara o dicionário da solução polida (reutiliza o FX)
-                    solucao_reforco_dict = {
-                        "fx": solucao_polida.fx, 
-                        "onibus": {
-                            str(k): {
-                                f"viagem_{v}": {"rota": r, "chegada": c}
-                                for v, (r, c) in zip(solucao_polida.rota[k].keys(), zip(solucao_polida.rota[k].values(), solucao_polida.chegada[k].values()))
-                            }
-                            for k in solucao_polida.rota.keys() if solucao_polida.rota[k] 
-                        }
-                    }
-                    
-                    # Reforça o feromônio da COLÔNIA LOCAL com a sua solução polida
-                    # CORRIGIDO: usa atualizar_feromonio
-                    colonia_data['mapa'] = atualizar_feromonio(feromonio, solucao_reforco_dict, solucao_polida.fx, rho, Q, dados, fator_elite)
-                
-                # Se a polida for inviável, utiliza a melhor global para reforçar o feromônio local.
-                elif melhor_solucao_dict:
-                     # CORRIGIDO: usa atualizar_feromonio
-                     colonia_data['mapa'] = atualizar_feromonio(feromonio, melhor_solucao_dict, melhor_custo, rho, Q, dados, fator_elite)
-
-            # Se a solução construída for inviável, utiliza a melhor global para reforçar o feromônio local.
-            elif melhor_solucao_dict:
-                 # CORRIGIDO: usa atualizar_feromonio
-                 colonia_data['mapa'] = atualizar_feromonio(feromonio, melhor_solucao_dict, melhor_custo, rho, Q, dados, fator_elite)
+                registrar(colonia_data, iterar_colonia(dados, colonia_data['id'], colonia_data['mapa'], melhor_solucao,
+                                                       melhor_solucao_dict, melhor_custo, iteracao_global == 1,
+                                                       contador, vizinhos, partida_ideal))
         
+        # Troca de elite periódica entre as colônias (sempre no processo principal)
+        if iteracao_global % INTERVALO_TROCA_ELITE == 0:
+            trocar_elite(colonias)
+    
+    if executor is not None: executor.shutdown()
     print(f"\nFinalizado o ACO + VND + ILS. Total de avaliações contadas (FX): {contador.count}")
     print(f"Melhor Custo Encontrado: {melhor_custo:.2f}")
     print(f"Soluções Únicas Encontradas: {len(solucoes_unicas_hash)}")
@@ -1135,8 +1874,8 @@ if __name__ == "__main__":
                     "fx": sol.fx,
                     "onibus": {
                         str(k): {
-                            f"viagem_{v}": {"rota": r, "chegada": c}
-                            for v, (r, c) in zip(sol.rota[k].keys(), zip(sol.rota[k].values(), sol.chegada[k].values()))
+                            f"viagem_{v}": {"rota": r, "chegada": sol.chegada[k][v]}
+                            for v, r in sol.rota[k].items()
                         }
                         for k in sol.rota.keys() if sol.rota[k]
                     }
@@ -1,18 +1,42 @@
 import json
 import random
 
-with open("media.json", "r") as f:
-    dados = json.load(f)
+import numpy as np
+
+# Numba é opcional: sem ele, as viagens são construídas pela versão em Python
+try:
+    from numba import njit, prange
+    NUMBA_DISPONIVEL = True
+except ImportError:
+    NUMBA_DISPONIVEL = False
+    prange = range
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]): return args[0]
+        return lambda f: f
+
+# orjson é opcional: lê o JSON (a matriz de custos domina em instâncias grandes) bem mais rápido que o json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+with open("media.json", "rb") as f:
+    dados = orjson.loads(f.read()) if orjson is not None else json.load(f)
 
 n = dados["numeroRequisicoes"]
 m = dados["numeroOnibus"]
 r_max = dados["numeroMaximoViagens"]
 capacidade_onibus = dados.get("capacidade_onibus", 9999)
-custo = dados["custo"]
-tempo_servico = dados["tempoServico"]
-tempo_requisicoes = dados["tempoRequisicoes"]
-inicio_janela = dados["inicioJanela"]
-fim_janela = dados["fimJanela"]
+
+# Dados da instância direto em arrays NumPy (indexação vetorizada por candidatos e kernels);
+# float64 mantém a precisão da soma do fx
+tempo_requisicoes_np = np.asarray(dados["tempoRequisicoes"], dtype=np.float64)
+inicio_janela_np = np.asarray(dados["inicioJanela"], dtype=np.float64)
+fim_janela_np = np.asarray(dados["fimJanela"], dtype=np.float64)
+tempo_servico_np = np.asarray(dados["tempoServico"], dtype=np.float64)
+custo_np = np.asarray(dados["custo"], dtype=np.float64)
+# Ordem de prioridade fixa (menor fim de janela; estável, empates por id), usada na escolha dos candidatos
+ordem_janela_np = (np.argsort(fim_janela_np, kind="stable") + 1).astype(np.int64)
 
 NUM_COLONIAS = 4
 NUM_FORMIGAS = 72
@@ -26,136 +50,237 @@ colonia_parametros = [
     {"alpha": 0.1, "beta": 1.0, "rho": 0.9},  # Quase aleatória
 ]
 
+# Heurística eta = 1/deslocamento já elevada ao beta de cada colônia (beta é fixo por colônia)
+eta_beta = [(1 / (tempo_requisicoes_np + 1e-6)) ** p["beta"] for p in colonia_parametros]
 
-feromonios = [
-    [[1.0 for _ in range(n+1)] for _ in range(n+1)]
-    for _ in range(NUM_COLONIAS)
-]
+
+# Feromônio de todas as colônias em um bloco float32 contíguo; feromonios[c] é uma view
+feromonios = np.full((NUM_COLONIAS, n+1, n+1), 1.0, dtype=np.float32)
 
 melhor_solucao_global = None
 melhor_fx_global = float("inf")
 avaliacoes = 0
 
-def validar_solucao(solucao):
+def validar_e_custear(solucao):
+    # Uma passada pelas viagens: requisições atendidas e arcos (custo somado com uma indexação só)
     atendidas = set()
+    arcos = []
     for k in solucao["onibus"]:
         for v in solucao["onibus"][k]:
-            rota = solucao["onibus"][k][v]["rota"]
-            for req in rota:
-                if req != 0:
-                    atendidas.add(req)
-    return len(atendidas) == n
-
-def calcular_fx(solucao):
-    fx = 0
-    for k in solucao["onibus"]:
-        for v in solucao["onibus"][k]:
-            arcos = solucao["onibus"][k][v]["arcos"]
-            for i, j in arcos:
-                fx += custo[i][j]
-    return fx
-
-def escolher_proximo(i, candidatos, tempo_atual, feromonio, alpha, beta):
-    # Prioriza candidatos com menor fim de janela
-    candidatos.sort(key=lambda j: fim_janela[j-1])
-    probabilidades = []
-    total = 0
-    for j in candidatos:
-        deslocamento = tempo_requisicoes[i][j]
-        chegada_estimada = tempo_atual + deslocamento
-        inicio_servico = max(chegada_estimada, inicio_janela[j-1])
-        fim_servico = inicio_servico + tempo_servico[j]
-        if inicio_servico > fim_janela[j-1]:
-            continue
-        tau = feromonio[i][j]
-        eta = 1 / (deslocamento + 1e-6)
-        valor = (tau ** alpha) * (eta ** beta)
-        probabilidades.append((j, valor))
-        total += valor
-    if not probabilidades or total == 0:
+            viagem = solucao["onibus"][k][v]
+            atendidas.update(viagem["rota"])
+            arcos.extend(viagem["arcos"])
+    atendidas.discard(0)
+    if len(atendidas) != n:
+        return False, None
+    arcos = np.array(arcos, dtype=np.int64).reshape(-1, 2)
+    return True, float(custo_np[arcos[:, 0], arcos[:, 1]].sum())
+
+def escolher_proximo(i, candidatos, tempo_atual, peso):
+    # candidatos já vêm na ordem de prioridade (menor fim de janela, empates por id)
+    cand = np.asarray(candidatos)
+    idx = cand - 1
+    inicio_servico = np.maximum(tempo_atual + tempo_requisicoes_np[i, cand], inicio_janela_np[idx])
+    cand = cand[inicio_servico <= fim_janela_np[idx]]
+    if cand.size == 0:
+        return None
+    valores = peso[i, cand]
+    # Roleta: random.choices sorteia direto sobre os pesos acumulados (bisect em C)
+    acumulado = np.cumsum(valores)
+    if acumulado[-1] == 0:
         return None
-    probabilidades = [(j, v / total) for j, v in probabilidades]
-    r = random.random()
-    acumulado = 0
-    for j, p in probabilidades:
-        acumulado += p
-        if r <= acumulado:
-            return j
-    return probabilidades[-1][0]
-
-def construir_solucao(feromonio, alpha, beta):
+    return int(random.choices(cand, cum_weights=acumulado, k=1)[0])
+
+@njit(cache=True, fastmath=True)
+def _construir_viagem_kernel(restantes, peso, T, e, l, s, ordem, r_max):
+    """
+    Mesma viagem de construir_solucao (roleta de escolher_proximo) em um único laço compilado.
+    restantes é a máscara booleana das requisições (índice = id) e é atualizada no lugar;
+    peso[i, j] é o tau**alpha * eta**beta da colônia, já calculado.
+    """
+    rota = np.zeros(r_max + 1, dtype=np.int64)
+    chegada = np.zeros(r_max, dtype=np.float64)
+    cand = np.empty(ordem.shape[0], dtype=np.int64)
+    acumulado = np.empty(ordem.shape[0], dtype=np.float64)
+    tam = 1
+    i = 0
+    tempo_atual = s[0]
+    while tam <= r_max:
+        qtd = 0
+        total = 0.0
+        for j in ordem:
+            if not restantes[j]:
+                continue
+            deslocamento = T[i, j]
+            if max(tempo_atual + deslocamento, e[j-1]) > l[j-1]:
+                continue
+            total += peso[i, j]
+            cand[qtd] = j
+            acumulado[qtd] = total
+            qtd += 1
+        if qtd == 0 or total == 0:
+            break
+        r = np.random.random() * total
+        p = 0
+        while p < qtd - 1 and acumulado[p] < r:
+            p += 1
+        j = cand[p]
+        inicio_servico = max(tempo_atual + T[i, j], e[j-1])
+        tempo_atual = inicio_servico + s[j]
+        rota[tam] = j
+        chegada[tam-1] = inicio_servico
+        restantes[j] = False
+        tam += 1
+        i = j
+    return rota[:tam], chegada[:tam-1]
+
+def construir_viagem(restantes, peso):
+    # restantes: máscara booleana das requisições ainda não atendidas (índice = id), atualizada no lugar
+    rota = [0]
+    arcos = []
+    chegada = []
+    tempo_atual = tempo_servico_np[0]
+    capacidade = 0
+    while restantes.any():
+        i = rota[-1]
+        # Restantes na ordem fixa de prioridade: dispensa ordenar os candidatos a cada passo
+        candidatos = ordem_janela_np[restantes[ordem_janela_np]]
+        escolhido = escolher_proximo(i, candidatos, tempo_atual, peso)
+        if escolhido is None:
+            break
+        deslocamento = tempo_requisicoes_np[i, escolhido]
+        chegada_estimada = tempo_atual + deslocamento
+        inicio_servico = max(chegada_estimada, inicio_janela_np[escolhido-1])
+        tempo_atual = inicio_servico + tempo_servico_np[escolhido]
+        rota.append(escolhido)
+        arcos.append([rota[-2], escolhido])
+        chegada.append(inicio_servico)
+        restantes[escolhido] = False
+        capacidade += 1
+        if capacidade >= r_max:
+            break
+    return rota, arcos, chegada
+
+def construir_solucao(peso):
     global avaliacoes
     avaliacoes += 1
     solucao = {"onibus": {}}
-    requisicoes_restantes = set(range(1, n+1))
+    # Requisições restantes como máscara booleana (índice = id)
+    restantes = np.ones(n+1, dtype=np.bool_)
+    restantes[0] = False
     for k in range(m):
         solucao["onibus"][str(k)] = {}
-        rota = [0]
-        arcos = []
-        chegada = []
-        tempo_atual = tempo_servico[0]
-        capacidade = 0
-        while requisicoes_restantes:
-            i = rota[-1]
-            candidatos = list(requisicoes_restantes)
-            escolhido = escolher_proximo(i, candidatos, tempo_atual, feromonio, alpha, beta)
-            if escolhido is None:
-                break
-            deslocamento = tempo_requisicoes[rota[-1]][escolhido]
-            chegada_estimada = tempo_atual + deslocamento
-            inicio_servico = max(chegada_estimada, inicio_janela[escolhido-1])
-            tempo_atual = inicio_servico + tempo_servico[escolhido]
-            rota.append(escolhido)
-            arcos.append([rota[-2], escolhido])
-            chegada.append(inicio_servico)
-            requisicoes_restantes.remove(escolhido)
-            capacidade += 1
-            if capacidade >= r_max:
-                break
+        rota, arcos, chegada = construir_viagem(restantes, peso)
         if len(rota) > 1:
             solucao["onibus"][str(k)]["viagem_0"] = {
                 "rota": rota,
                 "arcos": arcos,
                 "chegada": chegada
             }
-    if validar_solucao(solucao):
-        fx = calcular_fx(solucao)
+    valida, fx = validar_e_custear(solucao)
+    if valida:
         return fx, solucao
     return None, None
 
+@njit(parallel=True, cache=True)
+def _construir_formigas_kernel(peso, T, C, e, l, s, ordem, r_max, m, sementes):
+    """
+    Constrói uma formiga por semente em paralelo (prange), todas com o mesmo peso (uma viagem
+    por ônibus, como construir_solucao); cada formiga semeia o próprio gerador.
+    Retorna rotas (formigas, m, r_max+1), chegadas (formigas, m, r_max), tamanho de cada rota
+    e o fx de cada formiga (inf quando alguma requisição ficou sem atendimento).
+    """
+    num_formigas = sementes.shape[0]
+    rotas = np.zeros((num_formigas, m, r_max + 1), dtype=np.int64)
+    chegadas = np.zeros((num_formigas, m, r_max), dtype=np.float64)
+    tam = np.zeros((num_formigas, m), dtype=np.int64)
+    fx = np.full(num_formigas, np.inf)
+    for a in prange(num_formigas):
+        np.random.seed(sementes[a])
+        restantes = np.ones(ordem.shape[0] + 1, dtype=np.bool_)
+        restantes[0] = False
+        custo_formiga = 0.0
+        for k in range(m):
+            rota, chegada = _construir_viagem_kernel(restantes, peso, T, e, l, s, ordem, r_max)
+            t = rota.shape[0]
+            rotas[a, k, :t] = rota
+            chegadas[a, k, :t-1] = chegada
+            tam[a, k] = t
+            for p in range(1, t):
+                custo_formiga += C[rota[p-1], rota[p]]
+        if not restantes.any():
+            fx[a] = custo_formiga
+    return rotas, chegadas, tam, fx
+
+def construir_formigas(peso, num_formigas):
+    # Todas as formigas da colônia em uma chamada do kernel paralelo; só as soluções válidas viram dict
+    global avaliacoes
+    if not NUMBA_DISPONIVEL:
+        return [construir_solucao(peso) for _ in range(num_formigas)]
+    avaliacoes += num_formigas
+    # Uma semente por formiga: o resultado não depende de quantas threads o prange usa
+    sementes = np.array([random.getrandbits(31) for _ in range(num_formigas)], dtype=np.int64)
+    rotas, chegadas, tam, fx = _construir_formigas_kernel(
+        peso, tempo_requisicoes_np, custo_np, inicio_janela_np,
+        fim_janela_np, tempo_servico_np, ordem_janela_np, r_max, m, sementes)
+    solucoes = []
+    for a in range(num_formigas):
+        if not np.isfinite(fx[a]):
+            solucoes.append((None, None))
+            continue
+        solucao = {"onibus": {}}
+        for k in range(m):
+            solucao["onibus"][str(k)] = {}
+            t = tam[a, k]
+            if t > 1:
+                rota = rotas[a, k, :t].tolist()
+                solucao["onibus"][str(k)]["viagem_0"] = {
+                    "rota": rota,
+                    "arcos": [[rota[p-1], rota[p]] for p in range(1, t)],
+                    "chegada": chegadas[a, k, :t-1].tolist()
+                }
+        solucoes.append((float(fx[a]), solucao))
+    return solucoes
+
+def arcos_solucao(solucao):
+    # Arcos de todas as viagens como arrays (origens, destinos) para os depósitos com np.add.at
+    arcos = []
+    for k in solucao["onibus"]:
+        for v in solucao["onibus"][k]:
+            arcos.extend(solucao["onibus"][k][v]["arcos"])
+    arcos = np.array(arcos, dtype=np.int64).reshape(-1, 2)
+    return arcos[:, 0], arcos[:, 1]
+
 def atualizar_feromonio(feromonio, rho, solucoes_colonia):
-    for i in range(n+1):
-        for j in range(n+1):
-            feromonio[i][j] *= (1 - rho)
+    feromonio *= np.float32(1 - rho)
     for fx, solucao in solucoes_colonia:
         if fx is not None:
             delta = 1.0 / (fx + 1e-6)
-            for k in solucao["onibus"]:
-                for v in solucao["onibus"][k]:
-                    arcos = solucao["onibus"][k][v]["arcos"]
-                    for i, j in arcos:
-                        feromonio[i][j] += delta
+            # np.add.at acumula arcos repetidos
+            np.add.at(feromonio, arcos_solucao(solucao), delta)
 
 def reforcar_melhor_global(feromonios, melhor_solucao_global):
     if melhor_solucao_global:
         fx = melhor_solucao_global["fx"]
         delta = 1.0 / (fx + 1e-6)
-        for c in range(NUM_COLONIAS):
-            for k in melhor_solucao_global["onibus"]:
-                for v in melhor_solucao_global["onibus"][k]:
-                    arcos = melhor_solucao_global["onibus"][k][v]["arcos"]
-                    for i, j in arcos:
-                        feromonios[c][i][j] += delta
+        origens, destinos = arcos_solucao(melhor_solucao_global)
+        # Mesmo depósito nas matrizes de todas as colônias de uma vez
+        np.add.at(feromonios, (slice(None), origens, destinos), delta)
+
+# Compila os kernels antes da primeira formiga (lote vazio: retorna na hora)
+if NUMBA_DISPONIVEL:
+    _construir_formigas_kernel(eta_beta[0], tempo_requisicoes_np, custo_np, inicio_janela_np,
+                               fim_janela_np, tempo_servico_np, ordem_janela_np, r_max, m, np.zeros(0, dtype=np.int64))
 
 for _ in range(MAX_AVALIACOES):
     for c in range(NUM_COLONIAS):
         alpha = colonia_parametros[c]["alpha"]
-        beta = colonia_parametros[c]["beta"]
         rho = colonia_parametros[c]["rho"]
-        solucoes_colonia = []
-        for a in range(NUM_FORMIGAS):
-            fx, solucao = construir_solucao(feromonios[c], alpha, beta)
-            solucoes_colonia.append((fx, solucao))
+        # Peso de transição tau**alpha * eta**beta calculado uma vez por colônia: o feromônio
+        # só muda depois que todas as formigas da iteração foram construídas
+        peso = feromonios[c] ** alpha * eta_beta[c]
+        solucoes_colonia = construir_formigas(peso, NUM_FORMIGAS)
+        for fx, solucao in solucoes_colonia:
             if fx is not None and fx < melhor_fx_global:
                 melhor_fx_global = fx
                 melhor_solucao_global = {
@@ -1,7 +1,9 @@
 import numpy as np
 import random
 import math
-import copy
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, Tuple, Optional, List
 
 # IMPORTAÇÃO ROBUSTA: Garante que 'aco' seja importado corretamente
@@ -15,6 +17,13 @@ from exemplo_prof.solucao import Solucao
 
 # --- Parâmetros FATOR DE RUÍNA para Multi-Start R&R ---
 R_R_FACTORS = [0.10, 0.15, 0.20, 0.25, 0.30, 0.40, 0.50]
+# Os testes de ruína de uma iteração são independentes: um processo por fator (contorna o GIL);
+# com 1 núcleo rodam em sequência, como antes
+N_PROCESSOS_RR = min(len(R_R_FACTORS), os.cpu_count() or 1)
+
+# --- Estratégia dos operadores VND ---
+# "best": aplica o melhor movimento da vizinhança; "first": aplica o primeiro que melhora
+VND_MODE = "best"
 
 class Contador:
     def __init__(self, limite: int):
@@ -36,74 +45,148 @@ class Contador:
 
 # --- FUNÇÕES AUXILIARES ---
 
+# Tabelas da instância (s, T, e, l, c) como listas Python, montadas uma vez por objeto dados: as rotas
+# têm poucos nós, e nelas o laço escalar sobre listas sai mais barato que indexar ndarray elemento a
+# elemento, vetorizar em NumPy ou chamar um kernel Numba (custo fixo da chamada maior que a rota inteira)
+_TABELAS_INSTANCIA: Dict[int, Tuple[Any, Tuple[list, ...]]] = {}
+
+def _tabelas_instancia(dados: Any) -> Tuple[list, ...]:
+    entrada = _TABELAS_INSTANCIA.get(id(dados))
+    if entrada is None or entrada[0] is not dados:
+        tabelas = tuple(np.asarray(x, dtype=np.float64).tolist() for x in (dados.s, dados.T, dados.e, dados.l, dados.c))
+        entrada = _TABELAS_INSTANCIA[id(dados)] = (dados, tabelas)
+    return entrada[1]
+
+# Menor custo de inserir cada nó entre dois outros quaisquer (c[p][x] + c[x][q] - c[p][q]). A matriz c
+# não respeita a desigualdade triangular, então esse mínimo pode ser negativo: é ele, e não zero, o
+# limite inferior seguro que os operadores usam para descartar um cliente antes de varrer as posições
+_INSERCAO_MINIMA: Dict[int, Tuple[Any, List[float]]] = {}
+
+def _insercao_minima(dados: Any) -> List[float]:
+    entrada = _INSERCAO_MINIMA.get(id(dados))
+    if entrada is None or entrada[0] is not dados:
+        c = np.asarray(dados.c, dtype=np.float64)
+        minimos = []
+        for x in range(c.shape[0]):
+            custo = c[:, x, None] + c[None, x, :] - c
+            custo[x, :] = np.inf
+            custo[:, x] = np.inf
+            minimos.append(float(custo.min()))
+        entrada = _INSERCAO_MINIMA[id(dados)] = (dados, minimos)
+    return entrada[1]
+
 def recalcular_chegadas_e_validar_rota(rota: List[int], t_partida: float, dados: Any) -> Optional[List[float]]:
     """Recalcula a factibilidade temporal para uma rota."""
-    chegadas = [t_partida]
-    if len(rota) <= 1: return None 
-    if len(rota) == 2 and rota == [0, 0]:
-         chegadas.append(t_partida); return chegadas 
+    n_rota = len(rota)
+    if n_rota <= 1: return None 
+    if n_rota == 2 and rota == [0, 0]:
+         return [t_partida, t_partida]
+    s, T, e, l, _ = _tabelas_instancia(dados)
+    tol = aco.TOLERANCIA
     
-    u_init, v_init = rota[0], rota[1]
-    
-    if v_init != 0:
-        tempo_saida_u_init = t_partida + dados.s[u_init] 
-        chegada_em_v_init = tempo_saida_u_init + dados.T[u_init][v_init]
-        inicio_servico_v_init = max(chegada_em_v_init, dados.e[v_init-1])
+    u, v = rota[0], rota[1]
+    if v != 0:
+        tempo = t_partida + s[u] + T[u][v]
+        if tempo < e[v-1]: tempo = e[v-1]
         # Verifica se o início do serviço excede o limite (l) do cliente
-        if inicio_servico_v_init > dados.l[v_init-1] + aco.TOLERANCIA: return None 
-        chegadas.append(inicio_servico_v_init)
-    elif len(rota) >= 2 and v_init == 0:
-         chegadas.append(t_partida)
-    else: return None
-
-    for i in range(2, len(rota)):
-        u, v = rota[i-1], rota[i]
-        tempo_saida_u = chegadas[i-1] + dados.s[u]
-        chegada_em_v = tempo_saida_u + dados.T[u][v]
-        
+        if tempo > l[v-1] + tol: return None 
+    else:
+        tempo = t_partida
+    chegadas = [t_partida, tempo]
+
+    for i in range(2, n_rota):
+        u, v = v, rota[i]
+        # Saída de u (chegada + serviço) mais o deslocamento até v
+        tempo = tempo + s[u] + T[u][v]
         if v != 0:
-            inicio_servico = max(chegada_em_v, dados.e[v-1])
+            if tempo < e[v-1]: tempo = e[v-1]
             # Verifica se o início do serviço excede o limite (l) do cliente
-            if inicio_servico > dados.l[v-1] + aco.TOLERANCIA: return None 
-            chegadas.append(inicio_servico)
-        else:
-            # Chegada de volta ao depósito (v=0)
-            chegadas.append(chegada_em_v) 
+            if tempo > l[v-1] + tol: return None 
+        # Com v=0 é a chegada de volta ao depósito (sem janela)
+        chegadas.append(tempo)
             
     # Verifica a restrição de duração máxima da viagem (Tmax)
-    if (chegadas[-1] - chegadas[0]) > dados.Tmax + aco.TOLERANCIA: return None
+    if (tempo - t_partida) > dados.Tmax + tol: return None
+    return chegadas
+
+def recalcular_chegadas_a_partir(rota: List[int], chegadas_base: List[float], j: int, dados: Any) -> Optional[List[float]]:
+    """Como recalcular_chegadas_e_validar_rota, mas rota[:j] não mudou (j >= 1): reaproveita
+    chegadas_base[:j] e só propaga os horários a partir da posição j."""
+    s, T, e, l, _ = _tabelas_instancia(dados)
+    tol = aco.TOLERANCIA
+    
+    tempo = chegadas_base[j-1]
+    v = rota[j-1]
+    chegadas = chegadas_base[:j]
+    for i in range(j, len(rota)):
+        u, v = v, rota[i]
+        tempo = tempo + s[u] + T[u][v]
+        if v != 0:
+            if tempo < e[v-1]: tempo = e[v-1]
+            if tempo > l[v-1] + tol: return None 
+        chegadas.append(tempo)
+    
+    if (tempo - chegadas[0]) > dados.Tmax + tol: return None
     return chegadas
 
-def calcular_custo_rota(rota: List[int], dados: Any) -> float:
-    """Calcula o custo total de uma rota com base nos custos de transição (c)."""
-    custo = 0.0
-    for i in range(len(rota) - 1): custo += dados.c[rota[i]][rota[i+1]]
-    return custo
+def _clonar_solucao(sol: Solucao) -> Solucao:
+    """
+    Cópia estrutural de uma Solucao: novos dicts por ônibus com as listas de rota/chegada
+    compartilhadas. Basta para os operadores VND, que só substituem rotas inteiras em
+    rota[k][v]/chegada[k][v] (nunca alteram uma lista no lugar).
+    """
+    nova = Solucao()
+    nova.rota = {k: dict(viagens) for k, viagens in sol.rota.items()}
+    nova.chegada = {k: dict(viagens) for k, viagens in sol.chegada.items()}
+    nova.fx = sol.fx
+    return nova
+
+def _onibus_para_dict(sol: Solucao) -> Dict[str, Dict]:
+    """Rotas e chegadas da Solucao no formato {"k": {"viagem_v": {"rota", "chegada"}}} (ônibus vazios ficam de fora)."""
+    onibus = {}
+    for k, viagens in sol.rota.items():
+        if not viagens: continue
+        chegadas_k = sol.chegada[k]
+        onibus[str(k)] = {f"viagem_{v}": {"rota": rota, "chegada": chegadas_k[v]} for v, rota in viagens.items()}
+    return onibus
 
 # --- OPERADORES VND "GRÁTIS" (Sem verificação de contador) ---
 
-def busca_local_relocate(solucao: Solucao, dados: Dados) -> Tuple[Solucao, bool, int]:
-    """Tenta mover um cliente para uma nova posição (intra ou inter-viagem/ônibus)."""
-    solucao_atual = copy.deepcopy(solucao)
+def busca_local_relocate(solucao: Solucao, dados: Dados, first_improvement: bool = False) -> Tuple[Solucao, bool, int]:
+    """Tenta mover um cliente para uma nova posição (intra ou inter-viagem/ônibus).
+    Com first_improvement, para no primeiro movimento factível que melhora."""
+    solucao_atual = _clonar_solucao(solucao)
     melhorou = False
     movimentos_testados = 0 
     TOLERANCIA_CUSTO = 1e-3
     melhor_delta = -TOLERANCIA_CUSTO
     melhor_movimento = None
+    encontrou = False
+    c = _tabelas_instancia(dados)[4]
+    insercao_min = _insercao_minima(dados)
     
     chaves_k = list(solucao_atual.rota.keys())
     
     # Itera sobre todas as rotas e clientes
     for k_orig in chaves_k:
+        if encontrou: break
         chaves_v = list(solucao_atual.rota.get(k_orig, {}).keys())
         for v_orig in chaves_v:
+            if encontrou: break
             if v_orig not in solucao_atual.rota.get(k_orig, {}): continue 
             rota_orig = solucao_atual.rota[k_orig][v_orig]
             
             # Não move o depósito (índices 0 ou len-1)
             for i in range(1, len(rota_orig) - 1):
+                if encontrou: break
                 cliente_a_mover = rota_orig[i]
                 
+                # Economia de custo na origem ao retirar o cliente (O(1): só os arcos vizinhos mudam)
+                anterior, seguinte = rota_orig[i-1], rota_orig[i+1]
+                economia_orig = c[anterior][cliente_a_mover] + c[cliente_a_mover][seguinte] - c[anterior][seguinte]
+                # Nem a inserção mais barata possível compensaria a retirada: pula o cliente inteiro
+                if insercao_min[cliente_a_mover] - economia_orig >= melhor_delta: continue
+                
                 # Rota de origem após remoção
                 rota_orig_recortada = rota_orig[:i] + rota_orig[i+1:]
                 t_partida_orig = solucao_atual.chegada[k_orig][v_orig][0]
@@ -113,22 +196,19 @@ def busca_local_relocate(solucao: Solucao, dados: Dados) -> Tuple[Solucao, bool,
                     novas_chegadas_orig = recalcular_chegadas_e_validar_rota(rota_orig_recortada, t_partida_orig, dados)
                     if novas_chegadas_orig is None: continue 
                 
-                custo_antigo_orig = calcular_custo_rota(rota_orig, dados)
-                custo_novo_orig = calcular_custo_rota(rota_orig_recortada, dados)
-                
                 # Tenta todas as posições de inserção
                 for k_dest in range(1, dados.K + 1):
+                    if encontrou: break
                     chaves_v_dest = list(solucao_atual.rota.get(k_dest, {}).keys())
                     for v_dest in chaves_v_dest:
+                        if encontrou: break
                         rota_dest_base = solucao_atual.rota[k_dest][v_dest]
-                        t_partida_dest = solucao_atual.chegada[k_dest][v_dest][0]
-                        custo_antigo_dest = calcular_custo_rota(rota_dest_base, dados)
+                        chegadas_dest_base = solucao_atual.chegada[k_dest][v_dest]
                         
                         # Caso especial: movimento INTRA-ROTA (a rota de destino é a rota de origem recortada)
                         if k_dest == k_orig and v_dest == v_orig:
                             rota_dest_base = rota_orig_recortada
-                            t_partida_dest = t_partida_orig
-                            custo_antigo_dest = custo_novo_orig 
+                            chegadas_dest_base = novas_chegadas_orig or [t_partida_orig]
                         
                         # Tenta inserir na nova rota (j = posição de inserção)
                         for j in range(1, len(rota_dest_base)):
@@ -136,21 +216,23 @@ def busca_local_relocate(solucao: Solucao, dados: Dados) -> Tuple[Solucao, bool,
                             
                             movimentos_testados += 1 
                             
+                            # Delta em O(1) (vale também intra-rota, pois a base já é a rota recortada):
+                            # só as inserções que melhoram montam a rota e passam pela factibilidade
+                            p, q = rota_dest_base[j-1], rota_dest_base[j]
+                            delta_custo = c[p][cliente_a_mover] + c[cliente_a_mover][q] - c[p][q] - economia_orig
+                            if delta_custo >= melhor_delta: continue
+                            
+                            # Antes de j nada muda: os horários da base valem e só se propaga a partir do cliente inserido
                             rota_dest_nova = rota_dest_base[:j] + [cliente_a_mover] + rota_dest_base[j:]
-                            novas_chegadas_dest = recalcular_chegadas_e_validar_rota(rota_dest_nova, t_partida_dest, dados)
+                            novas_chegadas_dest = recalcular_chegadas_a_partir(rota_dest_nova, chegadas_dest_base, j, dados)
                             
                             if novas_chegadas_dest is None: continue 
                             
-                            custo_novo_dest = calcular_custo_rota(rota_dest_nova, dados)
-                            
-                            if k_dest == k_orig and v_dest == v_orig: 
-                                delta_custo = custo_novo_dest - custo_antigo_orig
-                            else: 
-                                delta_custo = (custo_novo_orig + custo_novo_dest) - (custo_antigo_orig + custo_antigo_dest)
-                            
-                            if delta_custo < melhor_delta: 
-                                melhor_delta = delta_custo
-                                melhor_movimento = (k_orig, v_orig, i, rota_orig_recortada, novas_chegadas_orig, k_dest, v_dest, rota_dest_nova, novas_chegadas_dest)
+                            melhor_delta = delta_custo
+                            melhor_movimento = (k_orig, v_orig, i, rota_orig_recortada, novas_chegadas_orig, k_dest, v_dest, rota_dest_nova, novas_chegadas_dest)
+                            if first_improvement:
+                                encontrou = True
+                                break
 
     if melhor_movimento:
         melhorou = True
@@ -182,46 +264,59 @@ def busca_local_relocate(solucao: Solucao, dados: Dados) -> Tuple[Solucao, bool,
                 
     return solucao_atual, melhorou, movimentos_testados
 
-def busca_local_2opt(solucao: Solucao, dados: Dados) -> Tuple[Solucao, bool, int]:
-    """Executa o 2-Opt para otimização intra-rota."""
-    solucao_atual = copy.deepcopy(solucao)
+def busca_local_2opt(solucao: Solucao, dados: Dados, first_improvement: bool = False) -> Tuple[Solucao, bool, int]:
+    """Executa o 2-Opt para otimização intra-rota.
+    Com first_improvement, para na primeira inversão factível que melhora."""
+    solucao_atual = _clonar_solucao(solucao)
     melhorou = False
     movimentos_testados = 0
     TOLERANCIA_CUSTO = 1e-3
     chaves_k = list(solucao_atual.rota.keys())
     melhor_delta_global = -TOLERANCIA_CUSTO
     melhor_movimento_global = None
+    encontrou = False
+    c = _tabelas_instancia(dados)[4]
 
     for k in chaves_k:
+        if encontrou: break
         chaves_v = list(solucao_atual.rota.get(k, {}).keys())
         for v in chaves_v:
+            if encontrou: break
             rota_original = solucao_atual.rota[k][v]
             n_rota = len(rota_original)
             
             # A rota deve ter pelo menos 4 nós para haver 2-Opt (0-A-B-0)
             if n_rota < 4: continue 
             
-            custo_antigo = calcular_custo_rota(rota_original, dados)
             t_partida = solucao_atual.chegada[k][v][0]
 
             # Inverte o segmento entre i e j (exclui o 0 inicial e final)
             for i in range(1, n_rota - 2):
+                if encontrou: break
+                a, b = rota_original[i-1], rota_original[i]
+                # Custo é assimétrico: a inversão também muda o sentido dos arcos internos do segmento,
+                # cuja diferença (volta - ida) é acumulada conforme j avança
+                delta_interno = 0.0
                 for j in range(i + 1, n_rota - 1):
                     movimentos_testados += 1 
+                    x, d = rota_original[j], rota_original[j+1]
+                    delta_interno += c[x][rota_original[j-1]] - c[rota_original[j-1]][x]
+                    
+                    # Delta em O(1): troca (a,b),(x,d) por (a,x),(b,d); só os que melhoram passam pela factibilidade
+                    delta_custo = c[a][x] + c[b][d] - c[a][b] - c[x][d] + delta_interno
+                    if delta_custo >= melhor_delta_global: continue
                     
                     # Cria a nova rota invertendo o segmento [i...j]
                     rota_nova = rota_original[:i] + rota_original[i:j+1][::-1] + rota_original[j+1:]
                     
                     # Verifica factibilidade
                     novas_chegadas = recalcular_chegadas_e_validar_rota(rota_nova, t_partida, dados)
-                    if novas_chegadas is None: continue 
-                    
-                    custo_novo = calcular_custo_rota(rota_nova, dados)
-                    delta_custo = custo_novo - custo_antigo
-                    
-                    if delta_custo < melhor_delta_global:
+                    if novas_chegadas is not None:
                         melhor_delta_global = delta_custo
                         melhor_movimento_global = (k, v, rota_nova, novas_chegadas)
+                        if first_improvement:
+                            encontrou = True
+                            break
 
     if melhor_movimento_global:
         k, v, rota_nova, novas_chegadas = melhor_movimento_global
@@ -232,42 +327,70 @@ def busca_local_2opt(solucao: Solucao, dados: Dados) -> Tuple[Solucao, bool, int
         
     return solucao_atual, melhorou, movimentos_testados
 
-def busca_local_swap_inter(solucao: Solucao, dados: Dados) -> Tuple[Solucao, bool, int]:
-    """Tenta trocar dois clientes entre viagens (inter-viagem/ônibus)."""
-    solucao_atual = copy.deepcopy(solucao)
+def busca_local_swap_inter(solucao: Solucao, dados: Dados, first_improvement: bool = False) -> Tuple[Solucao, bool, int]:
+    """Tenta trocar dois clientes entre viagens (inter-viagem/ônibus).
+    Com first_improvement, para na primeira troca factível que melhora."""
+    solucao_atual = _clonar_solucao(solucao)
     melhorou = False
     movimentos_testados = 0
     TOLERANCIA_CUSTO = 1e-3
     melhor_delta = -TOLERANCIA_CUSTO
     melhor_movimento = None
+    encontrou = False
+    c = _tabelas_instancia(dados)[4]
+    insercao_min = _insercao_minima(dados)
     
     chaves_k = list(solucao_atual.rota.keys())
     
+    # Cada lado da troca custa ao menos (inserção mínima - ganho da retirada); o menor desses termos entre
+    # todos os clientes limita por baixo o lado B de qualquer troca
+    termo_b_min = math.inf
+    for k in chaves_k:
+        for rota in solucao_atual.rota[k].values():
+            for j in range(1, len(rota) - 1):
+                ant, x, seg = rota[j-1], rota[j], rota[j+1]
+                termo_b_min = min(termo_b_min, insercao_min[x] - (c[ant][x] + c[x][seg] - c[ant][seg]))
+    
     # Itera sobre todas as viagens (rota 1)
     for k1 in chaves_k:
+        if encontrou: break
         chaves_v1 = list(solucao_atual.rota.get(k1, {}).keys())
         for v1 in chaves_v1:
+            if encontrou: break
             rota1 = solucao_atual.rota[k1][v1]
             if len(rota1) <= 2: continue # Rota sem clientes
-            custo1_antigo = calcular_custo_rota(rota1, dados)
             t_partida1 = solucao_atual.chegada[k1][v1][0]
             
             for i in range(1, len(rota1) - 1): # Cliente A
+                if encontrou: break
                 cliente_a = rota1[i]
+                ant_a, seg_a = rota1[i-1], rota1[i+1]
+                custo_a = c[ant_a][cliente_a] + c[cliente_a][seg_a]
+                # Nem com o melhor lado B possível a troca melhoraria: pula o cliente A inteiro
+                ganho_a = custo_a - c[ant_a][seg_a]
+                if insercao_min[cliente_a] - ganho_a + termo_b_min >= melhor_delta: continue
                 
                 # Itera sobre todas as outras viagens (rota 2)
                 for k2 in chaves_k:
+                    if encontrou: break
                     chaves_v2 = list(solucao_atual.rota.get(k2, {}).keys())
                     for v2 in chaves_v2:
+                        if encontrou: break
                         if k1 == k2 and v1 == v2: continue # Não é inter
                         rota2 = solucao_atual.rota[k2][v2]
                         if len(rota2) <= 2: continue # Rota sem clientes
-                        custo2_antigo = calcular_custo_rota(rota2, dados)
                         t_partida2 = solucao_atual.chegada[k2][v2][0]
                         
                         for j in range(1, len(rota2) - 1): # Cliente B
                             movimentos_testados += 1 
                             cliente_b = rota2[j]
+                            ant_b, seg_b = rota2[j-1], rota2[j+1]
+                            
+                            # Delta em O(1): cada cliente troca só os dois arcos vizinhos; só as trocas
+                            # que melhoram montam as rotas e passam pela factibilidade
+                            delta_custo = (c[ant_a][cliente_b] + c[cliente_b][seg_a] - custo_a
+                                           + c[ant_b][cliente_a] + c[cliente_a][seg_b] - c[ant_b][cliente_b] - c[cliente_b][seg_b])
+                            if delta_custo >= melhor_delta: continue
                             
                             # Cria as novas rotas trocando os clientes
                             rota1_nova = rota1[:i] + [cliente_b] + rota1[i+1:]
@@ -279,13 +402,11 @@ def busca_local_swap_inter(solucao: Solucao, dados: Dados) -> Tuple[Solucao, boo
                             chegadas2_nova = recalcular_chegadas_e_validar_rota(rota2_nova, t_partida2, dados)
                             if chegadas2_nova is None: continue
                             
-                            custo1_novo = calcular_custo_rota(rota1_nova, dados)
-                            custo2_novo = calcular_custo_rota(rota2_nova, dados)
-                            delta_custo = (custo1_novo + custo2_novo) - (custo1_antigo + custo2_antigo)
-                            
-                            if delta_custo < melhor_delta:
-                                melhor_delta = delta_custo
-                                melhor_movimento = (k1, v1, rota1_nova, chegadas1_nova, k2, v2, rota2_nova, chegadas2_nova)
+                            melhor_delta = delta_custo
+                            melhor_movimento = (k1, v1, rota1_nova, chegadas1_nova, k2, v2, rota2_nova, chegadas2_nova)
+                            if first_improvement:
+                                encontrou = True
+                                break
 
     if melhor_movimento:
         melhorou = True
@@ -300,31 +421,25 @@ def busca_local_swap_inter(solucao: Solucao, dados: Dados) -> Tuple[Solucao, boo
         
     return solucao_atual, melhorou, movimentos_testados
 
-# --- R&R (Chama o contador) ---
+# --- R&R (Devolve as avaliações gastas; quem chama debita no contador) ---
 
-def ruina_reconstrucao(melhor_solucao_dict: Dict, dados: Dados, fator_ruina_atual: float, contador: Any) -> Optional[Dict]:
+def ruina_reconstrucao(melhor_solucao_dict: Dict, dados: Dados, fator_ruina_atual: float) -> Tuple[Optional[Dict], int]:
     """
     Executa Ruína e Reconstrução com um fator de ruína específico.
-    Consome 1 crédito no contador (na hora de recalcular o FX da rota perturbada).
+    Retorna (solução reconstruída ou None, avaliações gastas): 1 na conversão do ponto de partida
+    e mais 1 no FX da solução reconstruída. Não mexe no contador global, então roda em outro processo.
     """
+    contador = Contador(limite=math.inf)
     temp_solucao = aco.dict_para_solucao(melhor_solucao_dict, dados, contador)
-    lista_clientes_em_rota = []
     
-    # 1. COLETA DOS CLIENTES ATENDIDOS
-    for k in temp_solucao.rota.keys():
-        for v in temp_solucao.rota[k].keys():
-            rota = temp_solucao.rota[k][v]
-            # Coleta todos os clientes (nós 1 a n)
-            if len(rota) > 2:
-                for i in range(1, len(rota) - 1):
-                    lista_clientes_em_rota.append({"cliente": rota[i], "k": k, "v": v, "pos": i})
+    # 1. COLETA DOS CLIENTES ATENDIDOS (nós 1 a n de cada viagem; só o id é usado no sorteio)
+    lista_clientes_em_rota = [cliente for viagens in temp_solucao.rota.values() for rota in viagens.values() for cliente in rota[1:-1]]
     
-    if not lista_clientes_em_rota: return None
+    if not lista_clientes_em_rota: return None, contador.count
     
     # 2. SELEÇÃO DOS CLIENTES PARA RUÍNA
     n_clientes_remover = round(fator_ruina_atual * dados.n)
-    clientes_a_remover_raw = random.sample(lista_clientes_em_rota, min(n_clientes_remover, len(lista_clientes_em_rota)))
-    clientes_orfãos = set(c['cliente'] for c in clientes_a_remover_raw)
+    clientes_orfãos = set(random.sample(lista_clientes_em_rota, min(n_clientes_remover, len(lista_clientes_em_rota))))
     
     # 3. EXECUÇÃO DA RUÍNA
     for k in list(temp_solucao.rota.keys()):
@@ -351,29 +466,45 @@ def ruina_reconstrucao(melhor_solucao_dict: Dict, dados: Dados, fator_ruina_atua
                 del temp_solucao.chegada[k][v]
     
     # Prepara o dicionário para a fase de Reparo/Reconstrução (aco.reparar_solucao_incompleta)
-    solucao_dict_temp = {"onibus": {str(k): {f"viagem_{v}": {"rota": r, "chegada": c} for v, (r, c) in zip(temp_solucao.rota[k].keys(), zip(temp_solucao.rota[k].values(), temp_solucao.chegada[k].values()))} for k in temp_solucao.rota.keys() if temp_solucao.rota[k]}}
+    solucao_dict_temp = {"onibus": _onibus_para_dict(temp_solucao)}
     
     # 4. EXECUÇÃO DA RECONSTRUÇÃO (ACO.reparar_solucao_incompleta usa Regret-2 e Guloso)
     solucao_reconstruida_dict, nao_atendidos = aco.reparar_solucao_incompleta(solucao_dict_temp, clientes_orfãos, dados)
     
-    if nao_atendidos: return None
+    if nao_atendidos: return None, contador.count
     
     # 5. AVALIAÇÃO DA FUNÇÃO OBJETIVO
     # Avalia o FX da solução reconstruída (Esta é a 1ª contagem do R&R)
     solucao_reconstruida_dict['fx'] = aco.calcular_custo_total_solucao(solucao_reconstruida_dict, dados)
-    if contador.count < contador.limite: contador.incrementar() 
+    contador.incrementar() 
     
-    return solucao_reconstruida_dict
+    return solucao_reconstruida_dict, contador.count
+
+# Dados da instância em cada processo de R&R (preenchido uma vez pelo initializer, sem re-serializar dados)
+_ESTADO_PROCESSO_RR = {}
+
+def _inicializar_processo_rr(dados):
+    _ESTADO_PROCESSO_RR['dados'] = dados
+
+def _ruina_reconstrucao_processo(tarefa):
+    """Executa ruina_reconstrucao em um processo filho, com semente própria."""
+    melhor_solucao_dict, fator_ruina_atual, semente = tarefa
+    random.seed(semente)
+    np.random.seed(semente)
+    return ruina_reconstrucao(melhor_solucao_dict, _ESTADO_PROCESSO_RR['dados'], fator_ruina_atual)
 
 # --- RESOLVA (ACO -> SA -> MultiR&R -> VND) ---
 
-def resolva(dados: Dados, numero_avaliacoes: int, initial_feromonio: Optional[np.ndarray] = None, initial_solucao_dict: Optional[Dict] = None, stagnation_counter: int = 0) -> Tuple[Solucao, Optional[np.ndarray], Dict]:
+def resolva(dados: Dados, numero_avaliacoes: int, initial_feromonio: Optional[np.ndarray] = None, initial_solucao_dict: Optional[Dict] = None, stagnation_counter: int = 0, vnd_mode: str = VND_MODE) -> Tuple[Solucao, Optional[np.ndarray], Dict]:
     
+    if vnd_mode not in ("best", "first"):
+        raise ValueError(f"vnd_mode deve ser 'best' ou 'first', recebido {vnd_mode!r}")
+    first_improvement = vnd_mode == "first"
     contador = Contador(limite=numero_avaliacoes)
     
     def solucao_to_dict(sol: Solucao) -> Dict:
         """Converte o objeto Solucao para o formato Dict de persistência."""
-        return {"fx": sol.fx, "onibus": {str(k): {f"viagem_{v}": {"rota": r, "chegada": c} for v, (r, c) in zip(sol.rota[k].keys(), zip(sol.rota[k].values(), sol.chegada[k].values()))} for k in sol.rota.keys() if sol.rota[k]}}
+        return {"fx": sol.fx, "onibus": _onibus_para_dict(sol)}
 
     # 1. CARREGAMENTO E OTIMIZAÇÃO DE PARÂMETROS
     metadados_dict = getattr(dados, 'metadados', {})
@@ -418,110 +549,136 @@ def resolva(dados: Dados, numero_avaliacoes: int, initial_feromonio: Optional[np
     
     print(f"\n--- MODO ILS-SA-MultiR&R-VND Ativo (Instância={instance_name.upper()}, T inicial={temp_inicial_final:.2f}, T atual={current_temperatura:.2f}, ρ={rho}) ---", flush=True)
 
-    while contador.count < numero_avaliacoes:
-        total_iteracoes += 1
-        
-        # 1. CONSTRUÇÃO ACO (Gera nova solução candidata)
-        dict_solucao_candidata, clientes_nao_atendidos = aco.construir_solucao_global_aco(dados, feromonio.copy(), alpha, beta, FATOR_L_COLONIA, FATOR_E_COLONIA, greedy_factor_retorno=greedy_factor, p_random_choice=p_random_choice)
-        origem_construcao = "ACO"
-        
-        if dict_solucao_candidata is None or (clientes_nao_atendidos is not None and clientes_nao_atendidos):
-             stagnation_counter += 1
-             continue
-        
-        solucao_candidata_aco = aco.dict_para_solucao(dict_solucao_candidata, dados, contador)
-        fx_candidato_aco = solucao_candidata_aco.fx
-        
-        # 2. ACEITAÇÃO SIMULATED ANNEALING
-        ponto_partida_rr_dict = solucao_to_dict(solucao_ils_atual)
-        
-        if solucao_ils_atual.fx >= float('inf') - aco.TOLERANCIA_CUSTO:
-            aceita_sa = True
-        else:
-            aceita_sa = aco.sa_acceptance(solucao_ils_atual.fx, fx_candidato_aco, current_temperatura)
-
-        if aceita_sa:
-            solucao_ils_atual = solucao_candidata_aco
-            ponto_partida_rr_dict = dict_solucao_candidata # Novo ponto de partida (ACO)
-            print(f"  -> [Iter {total_iteracoes}, Nmar={contador.get_count()}] SA ACEITO (FX={fx_candidato_aco:.2f}, T={current_temperatura:.2f}).", flush=True)
-        else:
-            # Mantém solucao_ils_atual, mas usa o candidato ACO como o ponto de partida para o R&R
-            ponto_partida_rr_dict = dict_solucao_candidata
-            print(f"  -> [Iter {total_iteracoes}, Nmar={contador.get_count()}] SA REJEITADO (Candidato={fx_candidato_aco:.2f}, T={current_temperatura:.2f}). Perturbando o estado atual.", flush=True)
-
+    # Testes de ruína em processos separados; spawn, como nas colônias do aco_gemini
+    executor = None
+    if N_PROCESSOS_RR > 1:
+        executor = ProcessPoolExecutor(max_workers=N_PROCESSOS_RR, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_inicializar_processo_rr, initargs=(dados,))
 
-        # --- 3. MULTI-START R&R (PERTURBAÇÃO OTIMIZADA) ---
-        melhor_fx_rr = solucao_ils_atual.fx
-        melhor_dict_rr = solucao_to_dict(solucao_ils_atual) # Começa com o ponto de partida do SA
-        
-        # Teste de ruína nos fatores definidos
-        for fator_ruina_teste in R_R_FACTORS:
-             if contador.esgotado(): break
-             
-             # Perturba o melhor ponto de partida atual (ponto_partida_rr_dict)
-             dict_perturbado = ruina_reconstrucao(ponto_partida_rr_dict, dados, fator_ruina_teste, contador)
-             
-             if dict_perturbado and dict_perturbado['fx'] < melhor_fx_rr - aco.TOLERANCIA_CUSTO:
-                  melhor_fx_rr = dict_perturbado['fx']
-                  melhor_dict_rr = dict_perturbado
-                  # Se o R&R achar algo melhor, este é o novo ponto de partida para o VND
-                  
-        solucao_trabalho = aco.dict_para_solucao(melhor_dict_rr, dados, contador)
-        fx_antes_vnd = solucao_trabalho.fx
-
-
-        # 4. VND "INFINITO" (GRÁTIS)
-        vnd_melhoria = True
-        movimentos_vnd_passo = 0
-        
-        while vnd_melhoria:
-            vnd_melhoria = False
+    try:
+        while contador.count < numero_avaliacoes:
+            total_iteracoes += 1
             
-            solucao_trabalho, m1, mov_r = busca_local_relocate(solucao_trabalho, dados)
-            movimentos_vnd_passo += mov_r
-            if m1: vnd_melhoria = True
+            # 1. CONSTRUÇÃO ACO (Gera nova solução candidata)
+            dict_solucao_candidata, clientes_nao_atendidos = aco.construir_solucao_global_aco(dados, feromonio.copy(), alpha, beta, FATOR_L_COLONIA, FATOR_E_COLONIA, greedy_factor_retorno=greedy_factor, p_random_choice=p_random_choice)
+            origem_construcao = "ACO"
             
-            if not vnd_melhoria:
-                solucao_trabalho, m2, mov_2 = busca_local_2opt(solucao_trabalho, dados)
-                movimentos_vnd_passo += mov_2
-                if m2: vnd_melhoria = True
+            if dict_solucao_candidata is None or (clientes_nao_atendidos is not None and clientes_nao_atendidos):
+                 stagnation_counter += 1
+                 continue
             
-            if not vnd_melhoria:
-                solucao_trabalho, m3, mov_s = busca_local_swap_inter(solucao_trabalho, dados)
-                movimentos_vnd_passo += mov_s
-                if m3: vnd_melhoria = True
+            solucao_candidata_aco = aco.dict_para_solucao(dict_solucao_candidata, dados, contador)
+            fx_candidato_aco = solucao_candidata_aco.fx
             
-        total_movimentos_vnd += movimentos_vnd_passo
-        
-        # 5. ATUALIZAÇÃO E DECAIMENTO DE TEMPERATURA
-        if solucao_trabalho.fx < melhor_custo_global - aco.TOLERANCIA_CUSTO:
-            # 5A. NOVA MELHORIA GLOBAL
-            melhor_custo_global = solucao_trabalho.fx
-            melhor_solucao_global = solucao_trabalho
-            solucao_ils_atual = solucao_trabalho # A melhor global é o novo ponto de partida
-
-            # RE-HEATING ADAPTATIVO: Reinicia a temperatura para o valor específico da instância
-            current_temperatura = temp_inicial_final 
+            # 2. ACEITAÇÃO SIMULATED ANNEALING
+            ponto_partida_rr_dict = solucao_to_dict(solucao_ils_atual)
             
-            melhoria_vnd = fx_antes_vnd - melhor_custo_global
-            log_entry = {
-                'iter': total_iteracoes, 'fx_final': melhor_custo_global, 'fx_inicial_aco': fx_candidato_aco,
-                'avaliacoes_aco_total': contador.get_count(), 'movimentos_vnd_total': total_movimentos_vnd,
-                'origem_construcao': origem_construcao, 'melhoria_vnd': melhoria_vnd, 'movimentos_vnd_passo': movimentos_vnd_passo
-            }
-            log_calibracao.append(log_entry)
-            print(f"  -> [Iter {total_iteracoes}] 🏆 NOVA MELHORIA GLOBAL: {melhor_custo_global:.2f} (ΔVND: {melhoria_vnd:.2f}) -> Reiniciando T={temp_inicial_final:.2f}", flush=True)
-            stagnation_counter = 0
-        else:
-            # Decaimento de Temperatura (Cooling)
-            current_temperatura = max(current_temperatura * aco.T_COOLING_RATE, aco.T_MIN)
-            stagnation_counter += 1
+            if solucao_ils_atual.fx >= float('inf') - aco.TOLERANCIA_CUSTO:
+                aceita_sa = True
+            else:
+                aceita_sa = aco.sa_acceptance(solucao_ils_atual.fx, fx_candidato_aco, current_temperatura)
+
+            if aceita_sa:
+                solucao_ils_atual = solucao_candidata_aco
+                ponto_partida_rr_dict = dict_solucao_candidata # Novo ponto de partida (ACO)
+                print(f"  -> [Iter {total_iteracoes}, Nmar={contador.get_count()}] SA ACEITO (FX={fx_candidato_aco:.2f}, T={current_temperatura:.2f}).", flush=True)
+            else:
+                # Mantém solucao_ils_atual, mas usa o candidato ACO como o ponto de partida para o R&R
+                ponto_partida_rr_dict = dict_solucao_candidata
+                print(f"  -> [Iter {total_iteracoes}, Nmar={contador.get_count()}] SA REJEITADO (Candidato={fx_candidato_aco:.2f}, T={current_temperatura:.2f}). Perturbando o estado atual.", flush=True)
+
+
+            # --- 3. MULTI-START R&R (PERTURBAÇÃO OTIMIZADA) ---
+            melhor_fx_rr = solucao_ils_atual.fx
+            melhor_dict_rr = solucao_to_dict(solucao_ils_atual) # Começa com o ponto de partida do SA
+            
+            # Teste de ruína nos fatores definidos (todos perturbam o ponto de partida atual, ponto_partida_rr_dict).
+            # Cada teste gasta ao menos 1 avaliação: só entram os que cabem no orçamento restante
+            fatores_rr = R_R_FACTORS[:max(0, numero_avaliacoes - contador.count)]
+            futuros_rr = []
+            if executor is not None:
+                futuros_rr = [executor.submit(_ruina_reconstrucao_processo, (ponto_partida_rr_dict, fator, random.getrandbits(32)))
+                              for fator in fatores_rr]
+                resultados_rr = (futuro.result() for futuro in futuros_rr)
+            else:
+                # Em sequência, cada teste só roda quando o laço abaixo pede o próximo
+                resultados_rr = (ruina_reconstrucao(ponto_partida_rr_dict, dados, fator) for fator in fatores_rr)
+            
+            for fator_ruina_teste in fatores_rr:
+                if contador.esgotado(): break
+                
+                dict_perturbado, avaliacoes_rr = next(resultados_rr)
+                # Debita as avaliações do teste de uma vez, sem passar do limite (como no R&R em sequência)
+                contador.incrementar(min(avaliacoes_rr, contador.limite - contador.count))
+                
+                if dict_perturbado and dict_perturbado['fx'] < melhor_fx_rr - aco.TOLERANCIA_CUSTO:
+                    melhor_fx_rr = dict_perturbado['fx']
+                    melhor_dict_rr = dict_perturbado
+                    # Se o R&R achar algo melhor, este é o novo ponto de partida para o VND
+            
+            # Testes ainda na fila quando o orçamento acabou não chegam a rodar
+            for futuro in futuros_rr: futuro.cancel()
 
+            solucao_trabalho = aco.dict_para_solucao(melhor_dict_rr, dados, contador)
+            fx_antes_vnd = solucao_trabalho.fx
 
-        # 6. Atualização do Feromônio (Baseado na solução trabalhada pelo VND)
-        melhor_solucao_dict_atual = solucao_to_dict(solucao_trabalho)
-        feromonio = aco.atualizar_feromonio(feromonio, melhor_solucao_dict_atual, solucao_trabalho.fx, rho, aco.Q, dados)
 
+            # 4. VND "INFINITO" (GRÁTIS)
+            vnd_melhoria = True
+            movimentos_vnd_passo = 0
+            
+            while vnd_melhoria:
+                vnd_melhoria = False
+                
+                solucao_trabalho, m1, mov_r = busca_local_relocate(solucao_trabalho, dados, first_improvement)
+                movimentos_vnd_passo += mov_r
+                if m1: vnd_melhoria = True
+                
+                if not vnd_melhoria:
+                    solucao_trabalho, m2, mov_2 = busca_local_2opt(solucao_trabalho, dados, first_improvement)
+                    movimentos_vnd_passo += mov_2
+                    if m2: vnd_melhoria = True
+                
+                if not vnd_melhoria:
+                    solucao_trabalho, m3, mov_s = busca_local_swap_inter(solucao_trabalho, dados, first_improvement)
+                    movimentos_vnd_passo += mov_s
+                    if m3: vnd_melhoria = True
+                
+            total_movimentos_vnd += movimentos_vnd_passo
+            
+            # 5. ATUALIZAÇÃO E DECAIMENTO DE TEMPERATURA
+            if solucao_trabalho.fx < melhor_custo_global - aco.TOLERANCIA_CUSTO:
+                # 5A. NOVA MELHORIA GLOBAL
+                melhor_custo_global = solucao_trabalho.fx
+                melhor_solucao_global = solucao_trabalho
+                solucao_ils_atual = solucao_trabalho # A melhor global é o novo ponto de partida
+
+                # RE-HEATING ADAPTATIVO: Reinicia a temperatura para o valor específico da instância
+                current_temperatura = temp_inicial_final 
+                
+                melhoria_vnd = fx_antes_vnd - melhor_custo_global
+                log_entry = {
+                    'iter': total_iteracoes, 'fx_final': melhor_custo_global, 'fx_inicial_aco': fx_candidato_aco,
+                    'avaliacoes_aco_total': contador.get_count(), 'movimentos_vnd_total': total_movimentos_vnd,
+                    'origem_construcao': origem_construcao, 'melhoria_vnd': melhoria_vnd, 'movimentos_vnd_passo': movimentos_vnd_passo
+                }
+                log_calibracao.append(log_entry)
+                print(f"  -> [Iter {total_iteracoes}] 🏆 NOVA MELHORIA GLOBAL: {melhor_custo_global:.2f} (ΔVND: {melhoria_vnd:.2f}) -> Reiniciando T={temp_inicial_final:.2f}", flush=True)
+                stagnation_counter = 0
+            else:
+                # Decaimento de Temperatura (Cooling)
+                current_temperatura = max(current_temperatura * aco.T_COOLING_RATE, aco.T_MIN)
+                stagnation_counter += 1
+
+
+            # 6. Atualização do Feromônio (Baseado na solução trabalhada pelo VND)
+            melhor_solucao_dict_atual = solucao_to_dict(solucao_trabalho)
+            feromonio = aco.atualizar_feromonio(feromonio, melhor_solucao_dict_atual, solucao_trabalho.fx, rho, aco.Q, dados)
+    finally:
+        # Encerra os processos de R&R mesmo se a busca levantar exceção
+        if executor is not None: executor.shutdown(cancel_futures=True)
+
+    
     # 7. Prepara Dicionário de Persistência
     melhor_solucao_global.debug_info = {'total_avaliacoes': contador.get_count(), 'log_calibracao': log_calibracao, 'total_movimentos_vnd': total_movimentos_vnd}
     
@@ -1,5 +1,4 @@
 from itertools import combinations
-from collections import deque
 import heapq
 import time
 from implementacao import grafo
@@ -56,20 +55,25 @@ def bfs_existe_rota(inicio: int, destino: int, grafo: grafo.Graph,
         inicio not in grafo.graph.keys()):
         return False
     
-    visited = set()
-    queue = deque([(inicio, [inicio])])
-    custo = 0
-    while queue:
-        current, caminho = queue.pop()
-        if destino in caminho and len(caminho) == len(grafo.graph.keys()):
+    # Caminho hamiltoniano de inicio a destino: só importa QUAIS vértices já foram visitados, não a
+    # ordem. DFS sobre (vértice atual, máscara de visitados), cada estado explorado uma vez
+    # (no máximo N * 2^N estados, sem tupla do caminho por vizinho)
+    bit = {vertice: 1 << i for i, vertice in enumerate(grafo.graph.keys())}
+    completo = (1 << len(bit)) - 1
+    vistos = set()
+    pilha = [(inicio, bit[inicio])]
+    while pilha:
+        atual, mascara = pilha.pop()
+        if atual == destino and mascara == completo:
             return True
+        # Chegar ao destino antes de visitar todos não leva a lugar nenhum (ele teria de ser o último)
+        if atual == destino or (atual, mascara) in vistos:
+            continue
+        vistos.add((atual, mascara))
 
-        visited.add((current, tuple(caminho)))
-
-        for vizinho in grafo.get_neighbors(current):
-            if vizinho not in visited:
-                queue.append((vizinho, tuple(caminho) + (vizinho,)))
-                visited.add((vizinho, tuple(caminho) + (vizinho,)))
+        for vizinho in grafo.get_neighbors(atual):
+            if not mascara & bit[vizinho]:
+                pilha.append((vizinho, mascara | bit[vizinho]))
     return False
 
 def dfs_hamiltoniano(atual: int, destino: int, 